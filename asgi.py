@@ -0,0 +1,4 @@
+from listify.asgi import create_asgi_app
+
+# Entrada ASGI opcional: uvicorn asgi:app (ver README, "Modo ASGI")
+app = create_asgi_app()
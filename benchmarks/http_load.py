@@ -0,0 +1,96 @@
+"""
+Gerador de carga HTTP simples (stdlib) para comparar os modos síncrono e ASGI
+com o mesmo número de cores/workers. Imprime JSON com req/s e latências por rota.
+
+Exemplo, com 2 workers em cada modo e o mesmo banco:
+
+    gunicorn -w 2 -b 127.0.0.1:5000 run:app
+    python benchmarks/http_load.py --url http://127.0.0.1:5000 --token $TOKEN --label sync
+
+    uvicorn asgi:app --workers 2 --port 5001
+    python benchmarks/http_load.py --url http://127.0.0.1:5001 --token $TOKEN --label asgi
+"""
+import argparse
+import http.client
+import json
+import statistics
+import threading
+import time
+from urllib.parse import urlparse
+
+
+def _percentil(valores, p):
+    if not valores:
+        return None
+    valores = sorted(valores)
+    return round(valores[min(len(valores) - 1, int(len(valores) * p))], 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', required=True)
+    parser.add_argument('--token', required=True, help='access token JWT')
+    parser.add_argument('--paths', default='/history,/lists,/products/barcode/7891000100103')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=20.0)
+    parser.add_argument('--label', default='run')
+    args = parser.parse_args()
+
+    alvo = urlparse(args.url)
+    paths = [p.strip() for p in args.paths.split(',') if p.strip()]
+    headers = {'Authorization': f'Bearer {args.token}', 'Connection': 'keep-alive'}
+    latencias = {p: [] for p in paths}
+    status = {}
+    lock = threading.Lock()
+    fim = time.monotonic() + args.duration
+
+    def worker(n):
+        conn = http.client.HTTPConnection(alvo.hostname, alvo.port or 80, timeout=30)
+        i = n
+        while time.monotonic() < fim:
+            path = paths[i % len(paths)]
+            i += 1
+            inicio = time.perf_counter()
+            try:
+                conn.request('GET', path, headers=headers)
+                resp = conn.getresponse()
+                resp.read()
+                codigo = resp.status
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection(alvo.hostname, alvo.port or 80, timeout=30)
+                codigo = 'erro'
+            decorrido = (time.perf_counter() - inicio) * 1000
+            with lock:
+                latencias[path].append(decorrido)
+                status[codigo] = status.get(codigo, 0) + 1
+        conn.close()
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(args.concurrency)]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    total = time.perf_counter() - inicio
+
+    print(json.dumps({
+        "label": args.label,
+        "concurrency": args.concurrency,
+        "segundos": round(total, 2),
+        "req_por_s": round(sum(len(v) for v in latencias.values()) / total, 2),
+        "status": {str(k): v for k, v in status.items()},
+        "rotas": {
+            p: {
+                "n": len(v),
+                "p50_ms": round(statistics.median(v), 2) if v else None,
+                "p95_ms": _percentil(v, 0.95),
+                "p99_ms": _percentil(v, 0.99),
+            }
+            for p, v in latencias.items()
+        },
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark de throughput de login (bcrypt) por core.
+
+Executa POST /auth/login concorrentes contra um SQLite temporário, com o hashing
+no próprio worker (BCRYPT_POOL_WORKERS=0) e no pool de processos, e imprime JSON
+com logins/s, logins/s por core, latências e quantas requisições receberam 429.
+
+    python benchmarks/login_throughput.py --threads 16 --logins 400 --rounds 12
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config  # noqa: E402
+from listify import create_app, db, password_hasher  # noqa: E402
+
+EMAIL = 'bench@listify.test'
+SENHA = 'SenhaBench123'
+
+
+def executar(workers: int, args) -> dict:
+    caminho = os.path.join(tempfile.mkdtemp(), 'login_bench.db')
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{caminho}'
+        BCRYPT_LOG_ROUNDS = args.rounds
+        BCRYPT_POOL_WORKERS = workers
+        BCRYPT_POOL_MAX_PENDING = args.max_pending
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+    app.test_client().post('/auth/register', json={'nome': 'Bench', 'email': EMAIL, 'senha': SENHA})
+
+    latencias = []
+    status = {}
+    lock = threading.Lock()
+    por_thread = args.logins // args.threads
+
+    def worker():
+        client = app.test_client()
+        for _ in range(por_thread):
+            inicio = time.perf_counter()
+            resp = client.post('/auth/login', json={'email': EMAIL, 'senha': SENHA})
+            decorrido = (time.perf_counter() - inicio) * 1000
+            with lock:
+                latencias.append(decorrido)
+                status[resp.status_code] = status.get(resp.status_code, 0) + 1
+
+    # Aquece o pool (spawn dos processos) fora da medição
+    app.test_client().post('/auth/login', json={'email': EMAIL, 'senha': SENHA})
+
+    threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    total = time.perf_counter() - inicio
+    password_hasher.shutdown()
+
+    ok = status.get(200, 0)
+    cores = os.cpu_count() or 1
+    latencias.sort()
+    return {
+        "bcrypt_pool_workers": workers,
+        "logins_ok": ok,
+        "status": status,
+        "segundos": round(total, 3),
+        "logins_por_s": round(ok / total, 2),
+        "logins_por_s_por_core": round(ok / total / cores, 2),
+        "p50_ms": round(statistics.median(latencias), 2),
+        "p95_ms": round(latencias[int(len(latencias) * 0.95) - 1], 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=12)
+    parser.add_argument('--max-pending', type=int, default=32)
+    parser.add_argument('--pool-workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    print(json.dumps({
+        "cores": os.cpu_count(),
+        "bcrypt_log_rounds": args.rounds,
+        "threads": args.threads,
+        "resultados": [executar(0, args), executar(args.pool_workers, args)],
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark do custo da checagem de revogação de tokens por requisição.
+
+Popula a lista de revogação com N tokens (padrão 50.000) e mede, para cada backend
+(database: tabela + filtro de Bloom; memory; redis, se REDIS_URL estiver definido):
+
+- a checagem isolada (token_in_blocklist: jti + versão de token) para tokens não
+  revogados, o caso comum, comparada à decodificação do JWT que toda rota protegida já faz;
+- a latência de GET /auth/me (só claims, sem consultar o banco), com a lista vazia e cheia;
+- a taxa de falsos positivos do filtro (checagens que foram ao banco).
+
+    python benchmarks/revocation_overhead.py --revogados 100000 --repeticoes 20000
+"""
+import argparse
+import datetime
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask_jwt_extended import create_access_token, decode_token  # noqa: E402
+from sqlalchemy import event, insert  # noqa: E402
+from config import Config  # noqa: E402
+from listify import create_app, db, token_revocation, token_versions  # noqa: E402
+from listify.models import TokenRevogado, Usuario  # noqa: E402
+from listify.tokens import claims_do_usuario  # noqa: E402
+
+
+def _percentis_us(tempos) -> dict:
+    tempos = sorted(tempos)
+    return {
+        "p50_us": round(statistics.median(tempos) * 1e6, 2),
+        "p99_us": round(tempos[int(len(tempos) * 0.99) - 1] * 1e6, 2),
+    }
+
+
+def _popular(total: int) -> None:
+    expira_em = datetime.datetime.utcnow() + datetime.timedelta(days=30)
+    for base in range(0, total, 20000):
+        linhas = [{"jti": str(uuid.uuid4()), "expira_em": expira_em} for _ in range(min(20000, total - base))]
+        if token_revocation.store.name == 'database':
+            db.session.execute(insert(TokenRevogado), linhas)
+            db.session.commit()
+        else:
+            for linha in linhas:
+                token_revocation.store.revogar(linha["jti"], linha["expira_em"])
+
+
+def executar(backend: str, args) -> dict:
+    caminho = os.path.join(tempfile.mkdtemp(), 'revogacao_bench.db')
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or f'sqlite:///{caminho}'
+        JWT_REVOCATION_BACKEND = backend
+        METRICS_ENABLED = False
+
+    app = create_app(BenchConfig)
+    client = app.test_client()
+    resultado = {"backend": backend, "revogados": args.revogados}
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        usuario = Usuario(nome='Bench', email='bench@listify.test', hash_senha='-')
+        db.session.add(usuario)
+        db.session.commit()
+        tokens = [create_access_token(identity=str(usuario.id), additional_claims=claims_do_usuario(usuario))
+                  for _ in range(200)]
+        payloads = [decode_token(t) for t in tokens]
+        headers = {'Authorization': 'Bearer ' + tokens[0]}
+
+        def medir_http(chave):
+            client.get('/auth/me', headers=headers)  # sincroniza os caches fora da medição
+            tempos = []
+            for _ in range(args.requisicoes):
+                inicio = time.perf_counter()
+                client.get('/auth/me', headers=headers)
+                tempos.append(time.perf_counter() - inicio)
+            resultado[chave] = {k.replace('_us', '_ms'): round(v / 1000, 3) for k, v in _percentis_us(tempos).items()}
+
+        medir_http("auth_me_lista_vazia")
+        _popular(args.revogados)
+        if backend == 'database':
+            token_revocation.store.invalidar()
+            inicio = time.perf_counter()
+            token_revocation.revogado(payloads[0])  # reconstrução do filtro com a lista cheia
+            resultado["reconstrucao_filtro_ms"] = round((time.perf_counter() - inicio) * 1000, 1)
+        medir_http("auth_me_lista_cheia")
+
+        consultas = []
+        event.listen(db.engine, 'before_cursor_execute', lambda *a: consultas.append(1))
+        tempos_decode, tempos_check = [], []
+        for i in range(args.repeticoes):
+            token, payload = tokens[i % len(tokens)], payloads[i % len(payloads)]
+            inicio = time.perf_counter()
+            decode_token(token)
+            tempos_decode.append(time.perf_counter() - inicio)
+            inicio = time.perf_counter()
+            token_revocation.revogado(payload) or token_versions.revogado(payload)
+            tempos_check.append(time.perf_counter() - inicio)
+        resultado["decode_jwt"] = _percentis_us(tempos_decode)
+        resultado["checagem_revogacao"] = _percentis_us(tempos_check)
+        resultado["overhead_sobre_decode_pct"] = round(
+            100 * statistics.median(tempos_check) / statistics.median(tempos_decode), 1)
+        resultado["consultas_ao_banco"] = len(consultas)
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--revogados', type=int, default=50000)
+    parser.add_argument('--repeticoes', type=int, default=10000)
+    parser.add_argument('--requisicoes', type=int, default=2000)
+    args = parser.parse_args()
+
+    backends = ['database', 'memory'] + (['redis'] if os.environ.get('REDIS_URL') else [])
+    print(json.dumps({"resultados": [executar(b, args) for b in backends]}, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
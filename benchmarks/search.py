@@ -0,0 +1,142 @@
+"""
+Benchmark de latência de GET /products/search sobre um catálogo grande.
+
+Com DATABASE_URL apontando para um PostgreSQL descartável, popula o catálogo
+(padrão: 1 milhão de produtos), cria os índices GIN da busca (mesmo DDL da
+migração) e mede o backend tsvector + pg_trgm. Sem DATABASE_URL, usa um SQLite
+temporário e o índice de n-gramas em memória (catálogo padrão menor: o índice vive
+no processo). Para cada tipo de consulta (prefixo, palavra, marca, erro de
+digitação, vários termos) imprime p50/p95/p99 e, no PostgreSQL, o plano com --explain.
+
+    DATABASE_URL=postgresql://localhost/listify_bench python benchmarks/search.py --reset
+    python benchmarks/search.py --produtos 200000
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+from sqlalchemy import func, insert, text  # noqa: E402
+from config import Config  # noqa: E402
+from listify import create_app, db  # noqa: E402
+from listify.models import Produto  # noqa: E402
+from listify.search import DDL_POSTGRES, consulta_postgres  # noqa: E402
+from suite import MARCAS, NOMES, VARIANTES, _codigo  # noqa: E402
+
+CONSULTAS = {
+    "prefixo": ['lei', 'arr', 'caf', 'bisc', 'deterg'],
+    "palavra": ['leite', 'arroz', 'manteiga', 'refrigerante', 'farinha'],
+    "marca": ['piracanjuba', 'nestlé', 'dona benta', 'ypê', 'italac'],
+    "erro_digitacao": ['leiet', 'arros', 'manteinga', 'refrigerate', 'biscoto'],
+    "varios_termos": ['leite integral', 'arroz tipo 1', 'café premium pilão', 'suco zero', 'óleo liza'],
+}
+
+
+def popular_catalogo(total: int, semente: int, lote: int = 20000):
+    rnd = random.Random(semente)
+    agora = datetime.datetime(2025, 1, 1)
+    inicio = time.perf_counter()
+    for base in range(1, total + 1, lote):
+        db.session.execute(insert(Produto.__table__), [
+            {"id": p, "codigo_barras": _codigo(p),
+             "nome": f'{rnd.choice(NOMES)} {rnd.choice(VARIANTES)} {rnd.randint(1, 5)}kg',
+             "marca": rnd.choice(MARCAS), "data_criacao": agora}
+            for p in range(base, min(base + lote, total + 1))
+        ])
+        db.session.commit()
+    print(f"seed: {total} produtos em {time.perf_counter() - inicio:.1f}s", file=sys.stderr)
+
+
+def criar_indices_postgres():
+    inicio = time.perf_counter()
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        for ddl in DDL_POSTGRES:
+            conn.execute(text(ddl))
+        conn.execute(text('ANALYZE produto'))
+    print(f"índices de busca criados em {time.perf_counter() - inicio:.1f}s", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--produtos', type=int, default=None,
+                        help='Tamanho do catálogo (padrão: 1.000.000 no PostgreSQL, 100.000 no SQLite)')
+    parser.add_argument('--repeticoes', type=int, default=20)
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--reset', action='store_true', help='Recria as tabelas (banco descartável!)')
+    parser.add_argument('--explain', action='store_true', help='Imprime EXPLAIN ANALYZE (PostgreSQL)')
+    args = parser.parse_args()
+
+    url = os.environ.get('DATABASE_URL') or 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'busca.db')
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = url
+        METRICS_ENABLED = False
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        postgres = db.engine.dialect.name == 'postgresql'
+        total = args.produtos or (1_000_000 if postgres else 100_000)
+        if args.reset or not postgres:
+            db.drop_all()
+        db.create_all()
+        existentes = db.session.query(func.count(Produto.id)).scalar()
+        if existentes == 0:
+            popular_catalogo(total, args.semente)
+            if postgres:
+                db.session.execute(text(
+                    "SELECT setval(pg_get_serial_sequence('produto', 'id'), (SELECT max(id) FROM produto))"
+                ))
+                db.session.commit()
+        elif existentes != total:
+            print(f"aviso: o banco já tem {existentes} produtos (use --reset)", file=sys.stderr)
+        if postgres:
+            criar_indices_postgres()
+        headers = {'Authorization': 'Bearer ' + create_access_token(identity='1')}
+
+    client = app.test_client()
+    resultado = {"backend": "postgres" if postgres else "ngram", "produtos": total, "consultas": {}}
+
+    # Primeira busca no SQLite constrói o índice em memória: medida à parte
+    inicio = time.perf_counter()
+    client.get('/products/search', query_string={"q": 'leite'}, headers=headers)
+    resultado["primeira_busca_ms"] = round((time.perf_counter() - inicio) * 1000, 1)
+
+    for tipo, consultas in CONSULTAS.items():
+        tempos, resultados = [], []
+        for q in consultas:
+            for _ in range(args.repeticoes):
+                inicio = time.perf_counter()
+                r = client.get('/products/search', query_string={"q": q, "limit": args.limit}, headers=headers)
+                tempos.append((time.perf_counter() - inicio) * 1000)
+            resultados.append(len(r.get_json()["itens"]))
+        tempos.sort()
+        resultado["consultas"][tipo] = {
+            "p50_ms": round(statistics.median(tempos), 2),
+            "p95_ms": round(tempos[int(len(tempos) * 0.95) - 1], 2),
+            "p99_ms": round(tempos[int(len(tempos) * 0.99) - 1], 2),
+            "resultados_por_consulta": resultados,
+        }
+
+    if args.explain and postgres:
+        with app.app_context():
+            resultado["explain"] = {}
+            for q in ('lei', 'leiet', 'leite integral'):
+                sql = consulta_postgres(q, args.limit).statement.compile(
+                    db.engine, compile_kwargs={"literal_binds": True})
+                resultado["explain"][q] = db.session.execute(text(f'EXPLAIN ANALYZE {sql}')).scalars().all()
+
+    print(json.dumps(resultado, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
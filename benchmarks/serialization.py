@@ -0,0 +1,125 @@
+"""
+Benchmark da serialização de payloads grandes (histórico e listas).
+
+Popula um SQLite temporário (mesmo seed de benchmarks/suite.py) e mede, para
+GET /history?paginate=false, GET /lists?paginate=false e GET /history/export:
+
+- a rota completa com JSON_PROVIDER=default (json da stdlib) e =orjson;
+- só a etapa de busca: objetos ORM (selectinload) vs. seleção só de colunas;
+- só a etapa de encoding do payload já montado, por provider.
+
+    python benchmarks/serialization.py --compras 5000 --listas 1000 --itens-por-lista 80
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy.orm import selectinload  # noqa: E402
+from config import Config  # noqa: E402
+from listify import create_app, db  # noqa: E402
+from listify.models import Compra, ItemDaLista, ListaDeCompras  # noqa: E402
+from listify.serializers import (  # noqa: E402
+    COMPRA_COLUNAS, ITEM_LISTA_COLUNAS, LISTA_COLUNAS, agrupar_itens_lista, serialize_compra,
+    serialize_lista,
+)
+from suite import EMAIL, SENHA, popular  # noqa: E402
+
+ROTAS = ['/history?paginate=false', '/lists?paginate=false', '/history/export?format=ndjson']
+
+
+def _medir(fn, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        fn()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return {"p50_ms": round(statistics.median(tempos), 2), "min_ms": round(min(tempos), 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--compras', type=int, default=3000)
+    parser.add_argument('--itens-por-compra', type=int, default=20)
+    parser.add_argument('--listas', type=int, default=500)
+    parser.add_argument('--itens-por-lista', type=int, default=60)
+    parser.add_argument('--repeticoes', type=int, default=15)
+    args = parser.parse_args()
+
+    caminho = os.path.join(tempfile.mkdtemp(), 'serializacao.db')
+    volumes = dict(usuarios=2, produtos=5000, compras=args.compras, compras_outros=0,
+                   itens_por_compra=args.itens_por_compra, listas=args.listas,
+                   itens_por_lista=args.itens_por_lista)
+    resultado = {"volumes": volumes, "rotas": {}, "busca": {}, "encoding": {}}
+
+    apps = {}
+    for provider in ('default', 'orjson'):
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{caminho}'
+            BCRYPT_LOG_ROUNDS = 4
+            JSON_PROVIDER = provider
+            METRICS_ENABLED = False
+        apps[provider] = create_app(BenchConfig)
+
+    with apps['default'].app_context():
+        db.create_all()
+        popular(volumes, 42)
+
+    for provider, app in apps.items():
+        client = app.test_client()
+        token = client.post('/auth/login', json={"email": EMAIL, "senha": SENHA}).get_json()['access_token']
+        headers = {'Authorization': f'Bearer {token}'}
+        for rota in ROTAS:
+            tamanho = len(client.get(rota, headers=headers).get_data())
+            medida = _medir(lambda: client.get(rota, headers=headers).get_data(), args.repeticoes)
+            resultado["rotas"].setdefault(rota, {"bytes": tamanho})[provider] = medida
+
+    app = apps['orjson']
+    with app.app_context():
+        def historico_orm():
+            compras = Compra.query.filter_by(usuario_id=1, finalizada=True).order_by(Compra.data_compra.desc()).all()
+            db.session.expunge_all()
+            return [serialize_compra(c) for c in compras]
+
+        def historico_colunas():
+            linhas = db.session.query(*COMPRA_COLUNAS)\
+                .filter(Compra.usuario_id == 1, Compra.finalizada.is_(True))\
+                .order_by(Compra.data_compra.desc()).all()
+            return [serialize_compra(c) for c in linhas]
+
+        def listas_orm():
+            listas = ListaDeCompras.query.options(selectinload(ListaDeCompras.itens))\
+                .filter_by(usuario_id=1).order_by(ListaDeCompras.data_criacao.desc()).all()
+            payload = [serialize_lista(l) for l in listas]
+            db.session.expunge_all()
+            return payload
+
+        def listas_colunas():
+            listas = db.session.query(*LISTA_COLUNAS).filter(ListaDeCompras.usuario_id == 1)\
+                .order_by(ListaDeCompras.data_criacao.desc()).all()
+            itens = agrupar_itens_lista(db.session.query(*ITEM_LISTA_COLUNAS).order_by(ItemDaLista.id))
+            return [serialize_lista(l, itens.get(l.id, [])) for l in listas]
+
+        for nome, orm, colunas in (('historico', historico_orm, historico_colunas),
+                                   ('listas', listas_orm, listas_colunas)):
+            resultado["busca"][nome] = {
+                "orm": _medir(orm, args.repeticoes),
+                "colunas": _medir(colunas, args.repeticoes),
+            }
+            payload = colunas()
+            resultado["encoding"][nome] = {
+                provider: _medir(lambda: apps[provider].json.response(payload).get_data(), args.repeticoes)
+                for provider in apps
+            }
+
+    print(json.dumps(resultado, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,395 @@
+"""
+Suíte de benchmarks reprodutível cobrindo todos os blueprints (auth, products,
+purchase, lists, history).
+
+Popula um banco descartável com volumes realistas a partir de uma semente fixa
+(usuários, catálogo de produtos, um usuário com histórico longo e listas grandes),
+executa cada cenário pelo Flask test client e imprime JSON com p50/p95/p99,
+média, requisições/s (sequencial) e comandos SQL por requisição. Rode antes e
+depois de uma mudança e compare os dois arquivos:
+
+    python benchmarks/suite.py --out antes.json
+    git checkout minha-branch
+    python benchmarks/suite.py --out depois.json
+    python benchmarks/suite.py --compare antes.json depois.json
+
+Volumes: --perfil pequeno|medio|grande (cada volume também pode ser ajustado
+individualmente). Por padrão usa um SQLite temporário; --sqlite CAMINHO ou
+DATABASE_URL (PostgreSQL local, banco descartável!) com --reset apontam para outro banco.
+--cenarios history,lists.listar filtra por blueprint ou nome.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, insert, select, text  # noqa: E402
+from config import Config  # noqa: E402
+from listify import create_app, db, password_hasher  # noqa: E402
+from listify.instrumentation import contar_consultas  # noqa: E402
+from listify.models import (  # noqa: E402
+    Compra, ItemDaCompra, ItemDaLista, ListaDeCompras, Produto, Usuario,
+)
+from listify.services import reconstruir_rollup_precos  # noqa: E402
+
+PERFIS = {
+    # usuarios, produtos, compras do usuário principal, compras por outro usuário,
+    # itens por compra, listas do usuário principal, itens por lista
+    "pequeno": dict(usuarios=50, produtos=5000, compras=500, compras_outros=20,
+                    itens_por_compra=15, listas=100, itens_por_lista=40),
+    "medio": dict(usuarios=500, produtos=50000, compras=5000, compras_outros=50,
+                  itens_por_compra=20, listas=500, itens_por_lista=60),
+    "grande": dict(usuarios=2000, produtos=200000, compras=20000, compras_outros=100,
+                   itens_por_compra=25, listas=2000, itens_por_lista=80),
+}
+
+EMAIL = 'bench1@listify.test'
+SENHA = 'SenhaBench123'
+NOMES = ['Arroz', 'Feijão', 'Macarrão', 'Leite', 'Café', 'Açúcar', 'Óleo', 'Farinha', 'Biscoito',
+         'Sabão', 'Detergente', 'Queijo', 'Iogurte', 'Manteiga', 'Suco', 'Refrigerante', 'Molho', 'Sal']
+VARIANTES = ['Integral', 'Tradicional', 'Light', 'Zero', 'Premium', 'Tipo 1', 'Orgânico', 'Família']
+MARCAS = ['Camil', 'Tio João', 'Nestlé', 'Piracanjuba', 'Pilão', 'União', 'Liza', 'Dona Benta',
+          'Ypê', 'Danone', 'Italac', 'Qualy', 'Del Valle', 'Coca-Cola', 'Quero', 'Cisne']
+CHUNK = 5000
+
+
+def _codigo(n: int) -> str:
+    return f'789{n:010d}'
+
+
+def _inserir(tabela, linhas):
+    for i in range(0, len(linhas), CHUNK):
+        db.session.execute(insert(tabela), linhas[i:i + CHUNK])
+
+
+def popular(volumes: dict, semente: int) -> dict:
+    """Gera os dados com ids explícitos (banco vazio) e devolve o contexto dos cenários."""
+    rnd = random.Random(semente)
+    inicio = time.perf_counter()
+    agora = datetime.datetime(2025, 1, 1)
+    hash_senha = password_hasher.hash(SENHA)
+
+    _inserir(Usuario.__table__, [
+        {"id": u, "nome": f'Usuario {u}', "email": f'bench{u}@listify.test',
+         "hash_senha": hash_senha, "data_cadastro": agora}
+        for u in range(1, volumes['usuarios'] + 1)
+    ])
+    _inserir(Produto.__table__, [
+        {"id": p, "codigo_barras": _codigo(p),
+         "nome": f'{rnd.choice(NOMES)} {rnd.choice(VARIANTES)} {rnd.randint(1, 5)}kg',
+         "marca": rnd.choice(MARCAS), "data_criacao": agora}
+        for p in range(1, volumes['produtos'] + 1)
+    ])
+
+    # Catálogo "quente": os usuários compram quase sempre os mesmos ~300 produtos
+    populares = rnd.sample(range(1, volumes['produtos'] + 1), min(300, volumes['produtos']))
+    compras, itens = [], []
+    compra_id = item_id = 0
+    donos = [1] * volumes['compras'] + [
+        u for u in range(2, volumes['usuarios'] + 1) for _ in range(volumes['compras_outros'])
+    ]
+    for dono in donos:
+        compra_id += 1
+        total = Decimal('0.00')
+        for _ in range(rnd.randint(max(1, volumes['itens_por_compra'] // 2), volumes['itens_por_compra'])):
+            item_id += 1
+            preco = Decimal(rnd.randint(150, 4999)) / 100
+            quantidade = rnd.randint(1, 4)
+            total += preco * quantidade
+            produto = rnd.choice(populares) if rnd.random() < 0.8 else rnd.randint(1, volumes['produtos'])
+            itens.append({"id": item_id, "preco_pago": preco, "quantidade": quantidade,
+                          "compra_id": compra_id, "produto_id": produto})
+        compras.append({"id": compra_id, "usuario_id": dono, "valor_total": total, "finalizada": True,
+                        "data_compra": agora - datetime.timedelta(hours=rnd.randint(0, 2 * 365 * 24))})
+    _inserir(Compra.__table__, compras)
+    _inserir(ItemDaCompra.__table__, itens)
+
+    listas, itens_lista = [], []
+    item_lista_id = 0
+    for lista_id in range(1, volumes['listas'] + 1):
+        listas.append({"id": lista_id, "nome": f'Lista {lista_id}', "usuario_id": 1,
+                       "data_criacao": agora - datetime.timedelta(hours=lista_id)})
+        for _ in range(volumes['itens_por_lista']):
+            item_lista_id += 1
+            itens_lista.append({"id": item_lista_id, "descricao_item": f'{rnd.choice(NOMES)} {item_lista_id}',
+                                "concluido": rnd.random() < 0.3, "lista_id": lista_id})
+    _inserir(ListaDeCompras.__table__, listas)
+    _inserir(ItemDaLista.__table__, itens_lista)
+    db.session.commit()
+    reconstruir_rollup_precos()
+
+    if db.engine.dialect.name == 'postgresql':
+        # ids explícitos não avançam as sequências
+        for tabela in ('usuario', 'produto', 'compra', 'item_da_compra', 'lista_de_compras', 'item_da_lista'):
+            db.session.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{tabela}', 'id'), (SELECT max(id) FROM {tabela}))"
+            ))
+        db.session.commit()
+        db.session.execute(text("ANALYZE"))
+        db.session.commit()
+
+    compras_usuario = [c["id"] for c in compras if c["usuario_id"] == 1]
+    print(f"seed: {len(compras)} compras, {len(itens)} itens, {len(itens_lista)} itens de lista "
+          f"em {time.perf_counter() - inicio:.1f}s", file=sys.stderr)
+    return {
+        "rnd": rnd,
+        "produtos": volumes['produtos'],
+        "populares": populares,
+        "compras": compras_usuario,
+        "listas": list(range(1, volumes['listas'] + 1)),
+        "itens_lista": volumes['listas'] * volumes['itens_por_lista'],
+    }
+
+
+# --- cenários ---
+# Cada cenário: (blueprint, nome, preparar(app, ctx, n) -> estado, requisicao(ctx, estado, i) -> (método, url, json))
+
+def _nova_compra(app, client, headers, itens: int, ctx) -> int:
+    compra_id = client.post('/purchase/start', headers=headers).get_json()['compra_id']
+    for _ in range(itens):
+        client.post(f'/purchase/{compra_id}/add', headers=headers, json={
+            "produto_id": ctx['rnd'].choice(ctx['populares']), "preco_pago": "9.90", "quantidade": 1})
+    return compra_id
+
+
+def _cenarios(client, headers):
+    def sem_estado(app, ctx, n):
+        return None
+
+    def compras_abertas(itens):
+        def preparar(app, ctx, n):
+            return [_nova_compra(app, client, headers, itens, ctx) for _ in range(n)]
+        return preparar
+
+    def novas_listas(com_itens):
+        def preparar(app, ctx, n):
+            ids = []
+            for i in range(n):
+                lista = client.post('/lists', headers=headers, json={"nome": f'Bench {i}'}).get_json()
+                item = client.post(f"/lists/{lista['id']}/items", headers=headers,
+                                   json={"descricao_item": 'Item'}).get_json() if com_itens else None
+                ids.append(item['id'] if com_itens else lista['id'])
+            return ids
+        return preparar
+
+    def token_sync(app, ctx, n):
+        return client.get('/lists/sync', headers=headers).get_json()['token']
+
+    compra_aberta = compras_abertas(0)
+    return [
+        ("auth", "login", sem_estado, lambda ctx, e, i: ('POST', '/auth/login', {"email": EMAIL, "senha": SENHA})),
+        ("auth", "me", sem_estado, lambda ctx, e, i: ('GET', '/auth/me', None)),
+        ("auth", "register", sem_estado, lambda ctx, e, i: (
+            'POST', '/auth/register', {"nome": 'Bench', "email": f'novo{i}-{time.time_ns()}@listify.test',
+                                       "senha": SENHA})),
+        ("products", "barcode_hit", sem_estado, lambda ctx, e, i: (
+            'GET', f"/products/barcode/{_codigo(ctx['rnd'].randint(1, ctx['produtos']))}", None)),
+        ("products", "barcode_miss", sem_estado, lambda ctx, e, i: (
+            'GET', f"/products/barcode/000{ctx['rnd'].randint(0, 10 ** 9)}", None)),
+        ("products", "create", sem_estado, lambda ctx, e, i: (
+            'POST', '/products', {"codigo_barras": f'BENCH{time.time_ns()}{i}', "nome": 'Produto Bench',
+                                  "marca": 'Bench'})),
+        ("products", "prices", sem_estado, lambda ctx, e, i: (
+            'GET', f"/products/{ctx['rnd'].choice(ctx['populares'])}/prices", None)),
+        ("purchase", "start", sem_estado, lambda ctx, e, i: ('POST', '/purchase/start', None)),
+        ("purchase", "add", lambda app, ctx, n: compra_aberta(app, ctx, 1)[0], lambda ctx, e, i: (
+            'POST', f'/purchase/{e}/add', {"produto_id": ctx['rnd'].choice(ctx['populares']),
+                                          "preco_pago": "12.34", "quantidade": 2})),
+        ("purchase", "add_batch_20", lambda app, ctx, n: compra_aberta(app, ctx, 1)[0], lambda ctx, e, i: (
+            'POST', f'/purchase/{e}/add/batch', {"itens": [
+                {"codigo_barras": _codigo(ctx['rnd'].choice(ctx['populares'])), "preco_pago": "4.50"}
+                for _ in range(20)
+            ]})),
+        ("purchase", "finish", compras_abertas(10), lambda ctx, e, i: ('POST', f'/purchase/{e[i]}/finish', None)),
+        ("lists", "listar", sem_estado, lambda ctx, e, i: ('GET', '/lists', None)),
+        ("lists", "criar", sem_estado, lambda ctx, e, i: ('POST', '/lists', {"nome": f'Nova {i}'})),
+        ("lists", "adicionar_item", sem_estado, lambda ctx, e, i: (
+            'POST', f"/lists/{ctx['rnd'].choice(ctx['listas'])}/items", {"descricao_item": f'Item {i}'})),
+        ("lists", "concluir_item", sem_estado, lambda ctx, e, i: (
+            'PUT', f"/lists/items/{ctx['rnd'].randint(1, ctx['itens_lista'])}", None)),
+        ("lists", "atualizar_item", sem_estado, lambda ctx, e, i: (
+            'PATCH', f"/lists/items/{ctx['rnd'].randint(1, ctx['itens_lista'])}", {"concluido": i % 2 == 0})),
+        ("lists", "excluir_item", novas_listas(True), lambda ctx, e, i: ('DELETE', f'/lists/items/{e[i]}', None)),
+        ("lists", "excluir_lista", novas_listas(False), lambda ctx, e, i: ('DELETE', f'/lists/{e[i]}', None)),
+        ("lists", "sync_delta", token_sync, lambda ctx, e, i: ('GET', f'/lists/sync?since={e}', None)),
+        ("history", "listar", sem_estado, lambda ctx, e, i: ('GET', '/history', None)),
+        ("history", "detalhar", sem_estado, lambda ctx, e, i: (
+            'GET', f"/history/{ctx['rnd'].choice(ctx['compras'])}", None)),
+        ("history", "compare", sem_estado, lambda ctx, e, i: (
+            'GET', '/history/compare?a={}&b={}'.format(*ctx['rnd'].sample(ctx['compras'], 2)), None)),
+        ("history", "trend", sem_estado, lambda ctx, e, i: ('GET', '/history/trend?last=10', None)),
+        ("history", "export_ndjson", sem_estado, lambda ctx, e, i: ('GET', '/history/export?format=ndjson', None)),
+    ]
+
+
+def _percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+
+def executar_cenario(app, engine, client, headers, ctx, cenario, iteracoes, aquecimento):
+    blueprint, nome, preparar, requisicao = cenario
+    # cenários pesados (export do histórico inteiro, login com bcrypt) usam menos iterações
+    if nome in ('export_ndjson', 'login', 'register'):
+        iteracoes = max(5, iteracoes // 10)
+        aquecimento = min(aquecimento, 2)
+    with app.app_context():
+        estado = preparar(app, ctx, aquecimento + iteracoes)
+
+    latencias, consultas, status = [], [], {}
+    inicio_total = time.perf_counter()
+    for i in range(aquecimento + iteracoes):
+        metodo, url, corpo = requisicao(ctx, estado, i)
+        with contar_consultas(engine) as contador:
+            inicio = time.perf_counter()
+            resp = client.open(url, method=metodo, headers=headers, json=corpo)
+            resp.get_data()  # consome respostas em streaming
+            decorrido = (time.perf_counter() - inicio) * 1000
+        if i < aquecimento:
+            inicio_total = time.perf_counter()
+            continue
+        latencias.append(decorrido)
+        consultas.append(contador.total)
+        status[resp.status_code] = status.get(resp.status_code, 0) + 1
+    total = time.perf_counter() - inicio_total
+
+    return {
+        "blueprint": blueprint,
+        "n": len(latencias),
+        "p50_ms": round(statistics.median(latencias), 3),
+        "p95_ms": round(_percentil(latencias, 0.95), 3),
+        "p99_ms": round(_percentil(latencias, 0.99), 3),
+        "media_ms": round(statistics.fmean(latencias), 3),
+        "req_por_s": round(len(latencias) / total, 1),
+        "consultas_por_req": round(statistics.fmean(consultas), 2),
+        "consultas_max": max(consultas),
+        "status": {str(k): v for k, v in sorted(status.items())},
+    }
+
+
+def _commit_atual():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL, text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(caminho_antes: str, caminho_depois: str) -> dict:
+    with open(caminho_antes, encoding='utf-8') as f:
+        antes = json.load(f)
+    with open(caminho_depois, encoding='utf-8') as f:
+        depois = json.load(f)
+    resultado = {}
+    for nome, d in depois['cenarios'].items():
+        a = antes['cenarios'].get(nome)
+        if a is None:
+            continue
+        resultado[nome] = {
+            campo: {"antes": a[campo], "depois": d[campo],
+                    "variacao_pct": round((d[campo] - a[campo]) / a[campo] * 100, 1) if a[campo] else None}
+            for campo in ('p50_ms', 'p95_ms', 'p99_ms', 'req_por_s', 'consultas_por_req')
+        }
+    return {"antes": antes['meta'].get('commit'), "depois": depois['meta'].get('commit'), "cenarios": resultado}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--perfil', choices=sorted(PERFIS), default='pequeno')
+    for campo in PERFIS['pequeno']:
+        parser.add_argument('--' + campo.replace('_', '-'), type=int, dest=campo)
+    parser.add_argument('--sqlite', help='arquivo SQLite (padrão: temporário)')
+    parser.add_argument('--reset', action='store_true', help='apaga e recria as tabelas antes do seed')
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--iteracoes', type=int, default=200)
+    parser.add_argument('--aquecimento', type=int, default=10)
+    parser.add_argument('--rounds', type=int, default=4, help='BCRYPT_LOG_ROUNDS (custo baixo isola o custo da API)')
+    parser.add_argument('--cenarios', help='filtro por blueprint ou blueprint.nome, separados por vírgula')
+    parser.add_argument('--out', help='grava o JSON neste arquivo além de imprimir')
+    parser.add_argument('--compare', nargs=2, metavar=('ANTES', 'DEPOIS'), help='compara dois resultados')
+    args = parser.parse_args()
+
+    if args.compare:
+        print(json.dumps(comparar(*args.compare), indent=2, ensure_ascii=False))
+        return
+
+    volumes = dict(PERFIS[args.perfil])
+    volumes.update({k: getattr(args, k) for k in volumes if getattr(args, k) is not None})
+    if args.sqlite:
+        uri = f'sqlite:///{args.sqlite}'
+    elif Config.SQLALCHEMY_DATABASE_URI and args.reset:
+        uri = Config.SQLALCHEMY_DATABASE_URI
+    else:
+        if Config.SQLALCHEMY_DATABASE_URI:
+            print("DATABASE_URL ignorado (use --reset para popular esse banco); usando SQLite temporário",
+                  file=sys.stderr)
+        uri = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'listify_suite.db')
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = uri
+        BCRYPT_LOG_ROUNDS = args.rounds
+        BCRYPT_POOL_WORKERS = 0
+        PROFILING_ENABLED = False
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        if args.reset:
+            db.drop_all()
+        db.create_all()
+        if db.session.scalar(select(func.count()).select_from(Usuario)):
+            parser.error('o banco já tem dados; use --reset ou um --sqlite novo')
+        ctx = popular(volumes, args.semente)
+        engine = db.engine
+        dialeto = engine.dialect.name
+
+    client = app.test_client()
+    token = client.post('/auth/login', json={"email": EMAIL, "senha": SENHA}).get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+
+    filtros = [f.strip() for f in (args.cenarios or '').split(',') if f.strip()]
+    resultados = {}
+    for cenario in _cenarios(client, headers):
+        chave = f'{cenario[0]}.{cenario[1]}'
+        if filtros and cenario[0] not in filtros and chave not in filtros:
+            continue
+        resultados[chave] = executar_cenario(
+            app, engine, client, headers, ctx, cenario, args.iteracoes, args.aquecimento
+        )
+        print(f"{chave}: p50 {resultados[chave]['p50_ms']} ms, "
+              f"{resultados[chave]['consultas_por_req']} consultas/req", file=sys.stderr)
+
+    saida = json.dumps({
+        "meta": {
+            "commit": _commit_atual(),
+            "data": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "dialeto": dialeto,
+            "perfil": args.perfil,
+            "volumes": volumes,
+            "semente": args.semente,
+            "iteracoes": args.iteracoes,
+            "bcrypt_rounds": args.rounds,
+        },
+        "cenarios": resultados,
+    }, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(saida + '\n')
+    print(saida)
+
+
+if __name__ == '__main__':
+    main()
@@ -9,9 +9,91 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Pool de conexões (PostgreSQL). DB_POOL_MODE=pgbouncer desliga o pool local (NullPool)
+    DB_POOL_MODE = os.environ.get('DB_POOL_MODE', 'queue')
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ('true', '1', 'yes')
+    DB_CONNECT_TIMEOUT = int(os.environ.get('DB_CONNECT_TIMEOUT', 10))
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 0))
     # JWT configuration
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or SECRET_KEY
-    JWT_ACCESS_TOKEN_EXPIRES = datetime.timedelta(days=1)
+    # Access token curto, renovado pelo refresh token (POST /auth/refresh)
+    JWT_ACCESS_TOKEN_EXPIRES = datetime.timedelta(minutes=int(os.environ.get('JWT_ACCESS_TOKEN_MINUTES', 15)))
+    JWT_REFRESH_TOKEN_EXPIRES = datetime.timedelta(days=int(os.environ.get('JWT_REFRESH_TOKEN_DAYS', 30)))
+    # Revogação: database (tabela + filtro de Bloom por processo) | redis | memory
+    JWT_REVOCATION_BACKEND = os.environ.get('JWT_REVOCATION_BACKEND', 'database')
+    # Cliente no estilo Redis já construído para o backend 'redis' (ex.: testes); sem ele usa REDIS_URL
+    JWT_REVOCATION_CLIENT = None
+    JWT_REVOCATION_BLOOM_CAPACITY = int(os.environ.get('JWT_REVOCATION_BLOOM_CAPACITY', 100000))
+    # Intervalo de sincronização dos caches de revogação de cada processo (versões e filtro)
+    JWT_REVOCATION_CACHE_TTL = int(os.environ.get('JWT_REVOCATION_CACHE_TTL', 30))
+    # Bcrypt: custo e pool de processos (0 workers = hashing no próprio worker)
+    BCRYPT_LOG_ROUNDS = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))
+    # Total de processos de hashing no host, dividido entre os WEB_CONCURRENCY workers web
+    BCRYPT_POOL_WORKERS = int(os.environ.get('BCRYPT_POOL_WORKERS', 0))
+    # Número de workers web do host (a mesma variável que gunicorn e uvicorn leem)
+    WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', 1))
+    BCRYPT_POOL_MAX_PENDING = int(os.environ.get('BCRYPT_POOL_MAX_PENDING', 32))
+    BCRYPT_POOL_TIMEOUT = float(os.environ.get('BCRYPT_POOL_TIMEOUT', 10))
+    # Google login: verificação local do ID token (JWKS em cache) ou 'tokeninfo' remoto
+    GOOGLE_VERIFY_MODE = os.environ.get('GOOGLE_VERIFY_MODE', 'local')
+    GOOGLE_CLIENT_IDS = os.environ.get('GOOGLE_CLIENT_IDS', '')
+    GOOGLE_JWKS_URL = os.environ.get('GOOGLE_JWKS_URL', 'https://www.googleapis.com/oauth2/v3/certs')
+    GOOGLE_TOKENINFO_URL = os.environ.get('GOOGLE_TOKENINFO_URL', 'https://oauth2.googleapis.com/tokeninfo')
+    GOOGLE_HTTP_TIMEOUT = float(os.environ.get('GOOGLE_HTTP_TIMEOUT', 3))
+    GOOGLE_BREAKER_FAILURES = int(os.environ.get('GOOGLE_BREAKER_FAILURES', 5))
+    GOOGLE_BREAKER_RESET = float(os.environ.get('GOOGLE_BREAKER_RESET', 30))
+    # Purchase configuration
+    PURCHASE_BATCH_MAX_ITEMS = int(os.environ.get('PURCHASE_BATCH_MAX_ITEMS', 500))
+    # Retenção das respostas de Idempotency-Key (flask purchase prune-idempotency-keys)
+    IDEMPOTENCY_RETENTION_HOURS = int(os.environ.get('IDEMPOTENCY_RETENTION_HOURS', 24))
+    # Operações em lote nos itens das listas (/lists/.../items/batch)
+    LISTS_BATCH_MAX_ITEMS = int(os.environ.get('LISTS_BATCH_MAX_ITEMS', 500))
+    # Cursor pagination (/history, /lists)
+    PAGINATION_DEFAULT_SIZE = int(os.environ.get('PAGINATION_DEFAULT_SIZE', 50))
+    PAGINATION_MAX_SIZE = int(os.environ.get('PAGINATION_MAX_SIZE', 200))
+    # Máximo de compras na matriz de /history/trend
+    HISTORY_TREND_MAX = int(os.environ.get('HISTORY_TREND_MAX', 50))
+    # Modo ASGI (asgi.py): rotas de leitura async com engine assíncrono
+    ASYNC_ROUTES = os.environ.get('ASYNC_ROUTES', 'true').lower() in ('true', '1', 'yes')
+    ASYNC_DATABASE_URL = os.environ.get('ASYNC_DATABASE_URL')
+    ASGI_WSGI_THREADS = int(os.environ.get('ASGI_WSGI_THREADS', 32))
+    # Busca de produtos (/products/search): auto | postgres (tsvector + pg_trgm) | ngram (em memória)
+    PRODUCT_SEARCH_BACKEND = os.environ.get('PRODUCT_SEARCH_BACKEND', 'auto')
+    PRODUCT_SEARCH_MIN_LENGTH = int(os.environ.get('PRODUCT_SEARCH_MIN_LENGTH', 2))
+    PRODUCT_SEARCH_MAX_RESULTS = int(os.environ.get('PRODUCT_SEARCH_MAX_RESULTS', 1000))
+    # Importação do catálogo (flask products import, POST /admin/products/import)
+    PRODUCT_IMPORT_CHUNK_SIZE = int(os.environ.get('PRODUCT_IMPORT_CHUNK_SIZE', 5000))
+    PRODUCT_IMPORT_DIR = os.environ.get('PRODUCT_IMPORT_DIR')
+    # Product cache configuration (memory | redis | none)
+    PRODUCT_CACHE_BACKEND = os.environ.get('PRODUCT_CACHE_BACKEND', 'memory')
+    PRODUCT_CACHE_TTL = int(os.environ.get('PRODUCT_CACHE_TTL', 300))
+    PRODUCT_CACHE_NEGATIVE_TTL = int(os.environ.get('PRODUCT_CACHE_NEGATIVE_TTL', 30))
+    PRODUCT_CACHE_MAXSIZE = int(os.environ.get('PRODUCT_CACHE_MAXSIZE', 10000))
+    # Backend memory: intervalo (s) para conferir a versão do catálogo (importações de outros processos)
+    PRODUCT_CACHE_CATALOG_CHECK = float(os.environ.get('PRODUCT_CACHE_CATALOG_CHECK', 5))
+    REDIS_URL = os.environ.get('REDIS_URL')
+    # Sync de listas (/lists/sync): retenção dos tombstones e validade dos tokens
+    SYNC_TOMBSTONE_RETENTION_DAYS = int(os.environ.get('SYNC_TOMBSTONE_RETENTION_DAYS', 30))
+    # Serialização JSON: orjson (padrão, se instalado) ou 'default' (json da stdlib)
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'orjson')
+    # Métricas Prometheus em /metrics (multiprocesso: defina PROMETHEUS_MULTIPROC_DIR)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() in ('true', '1', 'yes')
+    # Token do scrape (Authorization: Bearer); o ADMIN_TOKEN também é aceito em X-Admin-Token
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    # Token das rotas /admin (header X-Admin-Token); sem ele as rotas respondem 403
+    ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+    # Profiling de requisições: sorteio (0.0-1.0) ou header X-Profile com o ADMIN_TOKEN
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'false').lower() in ('true', '1', 'yes')
+    PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+    PROFILING_ENGINE = os.environ.get('PROFILING_ENGINE', 'cprofile')
+    PROFILING_DIR = os.environ.get('PROFILING_DIR')
+    PROFILING_MAX_ENTRIES = int(os.environ.get('PROFILING_MAX_ENTRIES', 200))
+    # Funções listadas no resumo do cProfile (ordenadas por tempo acumulado)
+    PROFILING_TOP_FUNCTIONS = int(os.environ.get('PROFILING_TOP_FUNCTIONS', 40))
     # CORS configuration
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', 'http://localhost:3000')
     CORS_SUPPORTS_CREDENTIALS = True
\ No newline at end of file
@@ -0,0 +1,18 @@
+# Carregado automaticamente pelo gunicorn quando executado na raiz do projeto.
+import os
+
+
+def on_starting(server):
+    # O pool de bcrypt só tira o hash do caminho da requisição com workers concorrentes;
+    # num worker sync a requisição fica bloqueada em future.result() do mesmo jeito.
+    if int(os.environ.get('BCRYPT_POOL_WORKERS', 0)) > 0 and server.cfg.worker_class_str == 'sync':
+        server.log.warning(
+            "BCRYPT_POOL_WORKERS > 0 com worker sync: use --worker-class gthread (ou o modo ASGI)"
+        )
+
+
+def child_exit(server, worker):
+    # Remove os gauges "live" do worker encerrado da agregação multiprocesso do /metrics
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -1,17 +1,31 @@
 from flask import Flask, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
-from flask_bcrypt import Bcrypt
 from flask_jwt_extended import JWTManager
 from config import Config
 from flask_cors import CORS
+from sqlalchemy.exc import IntegrityError
+from listify.cache import ProductCache
+from listify.hashing import PasswordHasher, HashingSobrecarregado
+from listify.google_auth import GoogleTokenVerifier
+from listify.db_pool import build_engine_options, pool_status
+from listify.metrics import Metrics
+from listify.profiling import RequestProfiler
+from listify.json_provider import criar_json_provider
+from listify.tokens import RevogacaoIndisponivel, TokenRevocation, VersoesDeToken, usuario_dos_claims
 import logging
 
 # Instancia as extensões (sem app ainda)
 db = SQLAlchemy()
 migrate = Migrate()
-bcrypt = Bcrypt()
+password_hasher = PasswordHasher()
+google_verifier = GoogleTokenVerifier()
 jwt = JWTManager()
+token_versions = VersoesDeToken()
+token_revocation = TokenRevocation()
+product_cache = ProductCache()
+metrics = Metrics()
+profiler = RequestProfiler()
 
 def create_app(config_class=Config):
     """
@@ -19,12 +33,20 @@ def create_app(config_class=Config):
     """
     app = Flask(__name__)
     app.config.from_object(config_class)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = build_engine_options(app.config)
+    app.json = criar_json_provider(app)
 
     # Inicializa as extensões com a app
     db.init_app(app)
     migrate.init_app(app, db)
-    bcrypt.init_app(app)
+    password_hasher.init_app(app)
+    google_verifier.init_app(app)
     jwt.init_app(app)
+    token_versions.init_app(app)
+    token_revocation.init_app(app)
+    product_cache.init_app(app)
+    metrics.init_app(app)
+    profiler.init_app(app)
 
     # Configurar CORS
     CORS(
@@ -58,11 +80,23 @@ def create_app(config_class=Config):
     from listify.history import history_bp
     app.register_blueprint(history_bp, url_prefix='/history')
 
+    # Blueprint administrativo (X-Admin-Token)
+    from listify.admin import admin_bp
+    app.register_blueprint(admin_bp, url_prefix='/admin')
+
     # Uma rota simples para verificar se a API está no ar
     @app.route('/health')
     def health_check():
         return jsonify({"status": "healthy"}), 200
 
+    # Métricas do pool de conexões deste processo (dimensionamento do pool), só para admin
+    from listify.admin.routes import admin_required
+
+    @app.route('/health/db-pool')
+    @admin_required
+    def health_db_pool():
+        return jsonify(pool_status(db.engine)), 200
+
     # --- Handlers Globais de Erros JSON ---
     @app.errorhandler(404)
     def handle_404(e):
@@ -80,6 +114,26 @@ def create_app(config_class=Config):
     def handle_403(e):
         return jsonify({"error": "forbidden", "message": "Acesso negado"}), 403
 
+    @app.errorhandler(HashingSobrecarregado)
+    def handle_hashing_sobrecarregado(e):
+        resp = jsonify({"error": "too_many_requests", "message": "Servidor ocupado, tente novamente em instantes"})
+        resp.headers['Retry-After'] = '1'
+        return resp, 429
+
+    @app.errorhandler(RevogacaoIndisponivel)
+    def handle_revogacao_indisponivel(e):
+        # Falha fechado: sem o store de revogação não dá para aceitar o token
+        resp = jsonify({"error": "service_unavailable", "message": "Verificação de token indisponível, tente novamente em instantes"})
+        resp.headers['Retry-After'] = '5'
+        return resp, 503
+
+    @app.errorhandler(IntegrityError)
+    def handle_integrity_error(e):
+        # Violação de constraint não tratada na rota (ex.: corrida entre requisições concorrentes)
+        db.session.rollback()
+        logger.warning("Violação de integridade: %s", e.orig)
+        return jsonify({"error": "conflict", "message": "Registro em conflito com dados existentes"}), 409
+
     @app.errorhandler(500)
     def handle_500(e):
         logger.exception("Erro interno do servidor")
@@ -98,6 +152,16 @@ def create_app(config_class=Config):
     def jwt_expired_token_loader(jwt_header, jwt_payload):
         return jsonify({"error": "jwt_expired", "message": "Token JWT expirado"}), 401
 
+    # current_user vem dos claims do token, sem consultar a tabela usuario
+    @jwt.user_lookup_loader
+    def jwt_user_lookup_loader(jwt_header, jwt_payload):
+        return usuario_dos_claims(jwt_payload, app.config['JWT_IDENTITY_CLAIM'])
+
+    @jwt.token_in_blocklist_loader
+    def jwt_token_in_blocklist_loader(jwt_header, jwt_payload):
+        return (token_revocation.revogado(jwt_payload)
+                or token_versions.revogado(jwt_payload, app.config['JWT_IDENTITY_CLAIM']))
+
     @jwt.revoked_token_loader
     def jwt_revoked_token_loader(jwt_header, jwt_payload):
         return jsonify({"error": "jwt_revoked", "message": "Token JWT revogado"}), 401
@@ -0,0 +1,6 @@
+from flask import Blueprint
+
+# Rotas operacionais, protegidas pelo header X-Admin-Token (ADMIN_TOKEN)
+admin_bp = Blueprint('admin', __name__)
+
+from . import routes
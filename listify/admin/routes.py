@@ -0,0 +1,140 @@
+import hmac
+import io
+import json
+import os
+import re
+import tempfile
+import uuid
+from functools import wraps
+
+from flask import Response, current_app, jsonify, request, send_file, stream_with_context
+from . import admin_bp
+from listify.products.importer import detectar_formato, importar_em_lotes, ler_registros
+
+
+def admin_required(fn):
+    """Exige o header X-Admin-Token igual ao ADMIN_TOKEN (rotas desativadas se não configurado)."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        esperado = current_app.config.get('ADMIN_TOKEN')
+        recebido = request.headers.get('X-Admin-Token', '')
+        if not esperado or not hmac.compare_digest(recebido.encode(), esperado.encode()):
+            return jsonify({"error": "forbidden", "message": "Acesso negado"}), 403
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+def _profile_store():
+    profiler = current_app.extensions.get('profiler')
+    return profiler.store if profiler is not None else None
+
+
+@admin_bp.route('/profiles', methods=['GET'])
+@admin_required
+def listar_perfis():
+    """Perfis gravados no ring buffer (mais recentes primeiro), sem o SQL e o perfil completos."""
+    store = _profile_store()
+    if store is None:
+        return jsonify({"error": "Profiling desativado (PROFILING_ENABLED)"}), 404
+    return jsonify(store.list()), 200
+
+
+@admin_bp.route('/profiles/<string:profile_id>', methods=['GET'])
+@admin_required
+def detalhar_perfil(profile_id):
+    store = _profile_store()
+    entry = store.get(profile_id) if store is not None else None
+    if entry is None:
+        return jsonify({"error": "Perfil não encontrado"}), 404
+    return jsonify(entry), 200
+
+
+@admin_bp.route('/profiles/<string:profile_id>/raw', methods=['GET'])
+@admin_required
+def baixar_perfil(profile_id):
+    """Arquivo .prof do cProfile (abrir com pstats, snakeviz etc.)."""
+    store = _profile_store()
+    caminho = store.raw_path(profile_id) if store is not None else None
+    if caminho is None:
+        return jsonify({"error": "Perfil não encontrado"}), 404
+    return send_file(caminho, mimetype='application/octet-stream', as_attachment=True,
+                     download_name=f'{profile_id}.prof')
+
+
+# --- importação do catálogo ---
+def _diretorio_importacoes() -> str:
+    diretorio = current_app.config.get('PRODUCT_IMPORT_DIR') or os.path.join(tempfile.gettempdir(), 'listify-imports')
+    os.makedirs(diretorio, exist_ok=True)
+    return diretorio
+
+
+@admin_bp.route('/products/import', methods=['POST'])
+@admin_required
+def importar_catalogo():
+    """
+    Importa um CSV/NDJSON de produtos (multipart no campo 'arquivo' ou o corpo cru, com
+    '?format='). Responde em streaming NDJSON: uma linha de progresso por lote e o resumo
+    final, com o id para baixar as linhas rejeitadas.
+    """
+    arquivo = request.files.get('arquivo')
+    nome = arquivo.filename if arquivo is not None else None
+    try:
+        formato = detectar_formato(nome, request.args.get('format'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        tamanho_lote = int(request.args.get('chunk_size') or current_app.config.get('PRODUCT_IMPORT_CHUNK_SIZE', 5000))
+        if tamanho_lote < 1:
+            raise ValueError
+    except ValueError:
+        return jsonify({"error": "Parâmetro 'chunk_size' inválido"}), 400
+    import_id = uuid.uuid4().hex
+    diretorio = _diretorio_importacoes()
+    caminho_rejeitados = os.path.join(diretorio, f'{import_id}.rejected.ndjson')
+    caminho_upload = None
+    if arquivo is not None:
+        # Os arquivos do multipart são fechados quando a view retorna, antes do
+        # streaming: o upload é copiado (em blocos) para o diretório de importações.
+        caminho_upload = os.path.join(diretorio, f'{import_id}.upload')
+        arquivo.save(caminho_upload)
+
+    def gerar():
+        # O corpo cru é lido conforme cada lote é processado; uma linha de progresso
+        # é emitida logo após o commit de cada lote.
+        bruto = open(caminho_upload, 'rb') if caminho_upload else request.stream
+        entrada = io.TextIOWrapper(bruto, encoding='utf-8-sig', newline='')
+        resumo = None
+        try:
+            with open(caminho_rejeitados, 'w', encoding='utf-8') as rejeitados:
+                for resumo in importar_em_lotes(ler_registros(entrada, formato), tamanho_lote, rejeitados):
+                    yield json.dumps({"progresso": resumo}) + '\n'
+        except Exception as e:
+            current_app.logger.exception('Falha na importação %s', import_id)
+            yield json.dumps({"id": import_id, "error": "Falha na importação", "message": str(e),
+                              "progresso": resumo}, ensure_ascii=False) + '\n'
+            return
+        finally:
+            entrada.close()
+            if caminho_upload:
+                os.remove(caminho_upload)
+        final = dict(resumo or {"linhas": 0, "rejeitados": 0}, id=import_id)
+        if final["rejeitados"]:
+            final["rejeitados_url"] = f'/admin/products/import/{import_id}/rejected'
+        else:
+            os.remove(caminho_rejeitados)
+        yield json.dumps({"concluido": final}) + '\n'
+
+    return Response(stream_with_context(gerar()), mimetype='application/x-ndjson')
+
+
+@admin_bp.route('/products/import/<string:import_id>/rejected', methods=['GET'])
+@admin_required
+def baixar_rejeitados(import_id):
+    """Linhas rejeitadas de uma importação (NDJSON: linha, registro, erros)."""
+    if not re.fullmatch(r'[0-9a-f]{32}', import_id):
+        return jsonify({"error": "Importação não encontrada"}), 404
+    caminho = os.path.join(_diretorio_importacoes(), f'{import_id}.rejected.ndjson')
+    if not os.path.exists(caminho):
+        return jsonify({"error": "Importação não encontrada ou sem linhas rejeitadas"}), 404
+    return send_file(caminho, mimetype='application/x-ndjson', as_attachment=True,
+                     download_name=f'{import_id}.rejected.ndjson')
@@ -0,0 +1,367 @@
+"""
+Modo de execução ASGI (opcional).
+
+As rotas de leitura mais quentes (GET /history, GET /lists e
+GET /products/barcode/<codigo>) são atendidas por handlers async com um engine
+SQLAlchemy assíncrono (asyncpg/aiosqlite), sem ocupar uma thread enquanto esperam o
+banco. Todas as demais rotas seguem para a aplicação Flask (WSGI), executada num
+pool de threads limitado (ASGI_WSGI_THREADS), com respostas em streaming preservadas.
+Os handlers async registram as mesmas métricas de latência do Flask (com os rótulos da
+rota Flask equivalente); requisições sorteadas para profiling seguem para o Flask.
+
+Dependências extras: pip install -r requirements-asgi.txt
+Execução: uvicorn asgi:app --workers 2   (ou gunicorn -k uvicorn.workers.UvicornWorker asgi:app)
+"""
+import asyncio
+import io
+import logging
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+import jwt
+from sqlalchemy import select
+
+try:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+except ImportError as exc:  # pragma: no cover - depende do ambiente
+    raise ImportError(
+        "O modo ASGI requer dependências extras: pip install -r requirements-asgi.txt"
+    ) from exc
+
+from config import Config
+from listify import create_app, product_cache, token_revocation, token_versions
+from listify.db_pool import build_async_engine_options
+from listify.http_cache import CACHE_REVALIDAR, calcular_etag, etag_confere
+from listify.models import Compra, ItemDaLista, ListaDeCompras, Produto, Usuario
+from listify.pagination import aplicar_keyset, parse_parametros_paginacao, proxima_pagina
+from listify.serializers import (
+    COMPRA_COLUNAS, ITEM_LISTA_COLUNAS, LISTA_COLUNAS, agrupar_itens_lista, serialize_compra,
+    serialize_lista, serialize_produto,
+)
+from listify.tokens import RevogacaoIndisponivel
+
+logger = logging.getLogger("listify")
+
+
+def async_database_url(url: str) -> str:
+    """Converte a URL síncrona (psycopg2/pysqlite) para o driver assíncrono equivalente."""
+    url = re.sub(r'^postgres(ql)?(\+psycopg2)?://', 'postgresql+asyncpg://', url)
+    return re.sub(r'^sqlite(\+pysqlite)?://', 'sqlite+aiosqlite://', url)
+
+
+class ErroHTTP(Exception):
+    def __init__(self, status: int, corpo: dict):
+        self.status = status
+        self.corpo = corpo
+
+
+class ListifyASGI:
+    """Aplicação ASGI híbrida: handlers async para leituras, Flask (WSGI) para o resto."""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        config = flask_app.config
+        self.executor = ThreadPoolExecutor(max_workers=config.get('ASGI_WSGI_THREADS', 32))
+        self.async_enabled = config.get('ASYNC_ROUTES', True)
+        # (padrão, handler, rótulos de métrica: blueprint e regra da rota Flask equivalente)
+        self.rotas = [
+            (re.compile(r'^/history/?$'), self.listar_historico, ('history', '/history')),
+            (re.compile(r'^/lists/?$'), self.listar_listas, ('lists', '/lists')),
+            (re.compile(r'^/products/barcode/(?P<codigo_barras>[^/]+)$'), self.buscar_por_codigo_barras,
+             ('products', '/products/barcode/<string:codigo_barras>')),
+        ]
+        self.engine = None
+        if self.async_enabled:
+            url = config.get('ASYNC_DATABASE_URL') or async_database_url(config['SQLALCHEMY_DATABASE_URI'])
+            self.engine = create_async_engine(url, **build_async_engine_options(config))
+            self.sessionmaker = async_sessionmaker(self.engine, expire_on_commit=False)
+        origens = config.get('CORS_ORIGINS', '*')
+        self.cors_origens = [o.strip() for o in origens.split(',')] if isinstance(origens, str) else list(origens)
+
+    # --- protocolo ASGI ---
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] == 'http' and self.async_enabled and scope['method'] in ('GET', 'HEAD'):
+            for padrao, handler, rotulos in self.rotas:
+                match = padrao.match(scope['path'])
+                if match and self._perfilar(scope):
+                    # o profiler só instrumenta o Flask: a requisição sorteada segue por lá
+                    return await self._wsgi(scope, receive, send, {'listify.profile': True})
+                if match:
+                    return await self._despachar(handler, rotulos, match.groupdict(), scope, send)
+        if scope['type'] == 'http':
+            return await self._wsgi(scope, receive, send)
+
+    def _perfilar(self, scope) -> bool:
+        profiler = self.flask_app.extensions.get('profiler')
+        if profiler is None:
+            return False
+        header = next((v.decode('latin-1') for k, v in scope['headers'] if k.lower() == b'x-profile'), None)
+        return profiler.sortear(header)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self.engine is not None:
+                    await self.engine.dispose()
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    # --- ponte para a aplicação Flask (WSGI) ---
+    @staticmethod
+    def _environ(scope, body: bytes) -> dict:
+        server = scope.get('server') or ('localhost', 80)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', ''),
+            'PATH_INFO': scope['path'],
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': str(server[0]),
+            'SERVER_PORT': str(server[1] or 80),
+            'SERVER_PROTOCOL': 'HTTP/' + scope.get('http_version', '1.1'),
+            'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+            'CONTENT_LENGTH': str(len(body)),
+        }
+        for nome, valor in scope['headers']:
+            nome = nome.decode('latin-1').upper().replace('-', '_')
+            valor = valor.decode('latin-1')
+            if nome == 'CONTENT_TYPE':
+                environ['CONTENT_TYPE'] = valor
+            elif nome != 'CONTENT_LENGTH':
+                chave = 'HTTP_' + nome
+                environ[chave] = environ[chave] + ',' + valor if chave in environ else valor
+        return environ
+
+    async def _wsgi(self, scope, receive, send, extra_environ=None):
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+        environ = self._environ(scope, body)
+        environ.update(extra_environ or {})
+        loop = asyncio.get_running_loop()
+
+        def enviar(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        def executar():
+            inicio = {}
+
+            def start_response(status, headers, exc_info=None):
+                inicio['message'] = {
+                    'type': 'http.response.start',
+                    'status': int(status.split(' ', 1)[0]),
+                    'headers': [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers],
+                }
+
+            resultado = self.flask_app(environ, start_response)
+            try:
+                for chunk in resultado:
+                    if inicio.get('message'):
+                        enviar(inicio.pop('message'))
+                    if chunk:
+                        enviar({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                if inicio.get('message'):
+                    enviar(inicio.pop('message'))
+                enviar({'type': 'http.response.body', 'body': b''})
+            finally:
+                if hasattr(resultado, 'close'):
+                    resultado.close()
+
+        await loop.run_in_executor(self.executor, executar)
+
+    # --- rotas async ---
+    async def _despachar(self, handler, rotulos, params, scope, send):
+        metrics = self.flask_app.extensions.get('metrics')
+        if metrics is None:
+            await self._responder(handler, params, scope, send)
+            return
+        inicio, status = metrics.iniciar_externa(*rotulos, scope['method']), 500
+        try:
+            status = await self._responder(handler, params, scope, send)
+        finally:
+            # cliente desconectado/cancelamento: o gauge não pode ficar preso
+            metrics.registrar_externa(*rotulos, scope['method'], status, inicio)
+
+    async def _responder(self, handler, params, scope, send) -> int:
+        headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope['headers']}
+        args = {k: v[-1] for k, v in parse_qs(scope.get('query_string', b'').decode('latin-1')).items()}
+        extras = []
+        try:
+            user_id = await self._autenticar(headers)
+            status, corpo, *extras = await handler(user_id, args, headers, **params)
+        except ErroHTTP as err:
+            status, corpo = err.status, err.corpo
+        except Exception:
+            # Mesmo corpo do handler de 500 da aplicação Flask
+            logger.exception("Erro interno do servidor")
+            status, extras = 500, []
+            corpo = {"error": "internal_server_error", "message": "Erro interno do servidor"}
+        if status == 304:
+            body, resp_headers = b'', []
+        else:
+            body = self.flask_app.json.dumps(corpo).encode('utf-8') + b'\n'
+            resp_headers = [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+        if extras:
+            resp_headers += extras[0]
+        resp_headers += self._cors(headers.get('origin'))
+        await send({'type': 'http.response.start', 'status': status, 'headers': resp_headers})
+        await send({'type': 'http.response.body', 'body': b'' if scope['method'] == 'HEAD' else body})
+        return status
+
+    def _cors(self, origin):
+        if not origin or ('*' not in self.cors_origens and origin not in self.cors_origens):
+            return []
+        cabecalhos = [(b'access-control-allow-origin', origin.encode('latin-1')), (b'vary', b'Origin')]
+        if self.flask_app.config.get('CORS_SUPPORTS_CREDENTIALS', True):
+            cabecalhos.append((b'access-control-allow-credentials', b'true'))
+        return cabecalhos
+
+    async def _autenticar(self, headers) -> int:
+        """
+        Mesma validação do @jwt_required() para access tokens no header Authorization,
+        inclusive a revogação por versão de token (cache recarregado pelo engine async)
+        e por jti (o filtro local responde o caso comum sem I/O).
+        """
+        config = self.flask_app.config
+        auth = headers.get('authorization', '')
+        if not auth.startswith('Bearer '):
+            raise ErroHTTP(401, {"error": "jwt_unauthorized", "message": "Missing Authorization Header"})
+        try:
+            claims = jwt.decode(
+                auth[len('Bearer '):],
+                config['JWT_SECRET_KEY'],
+                algorithms=[config.get('JWT_ALGORITHM', 'HS256')],
+                leeway=config.get('JWT_DECODE_LEEWAY', 0),
+                options={"verify_aud": False},
+            )
+        except jwt.ExpiredSignatureError:
+            raise ErroHTTP(401, {"error": "jwt_expired", "message": "Token JWT expirado"})
+        except jwt.PyJWTError as exc:
+            raise ErroHTTP(401, {"error": "jwt_invalid_token", "message": str(exc)})
+        if claims.get('type') != 'access':
+            raise ErroHTTP(401, {"error": "jwt_invalid_token", "message": "Only non-refresh tokens are allowed"})
+        identity_claim = config.get('JWT_IDENTITY_CLAIM', 'sub')
+        if token_versions.expirado():
+            async with self.sessionmaker() as session:
+                token_versions.atualizar({uid: v for uid, v in await session.execute(token_versions.consulta())})
+        revogado = token_versions.revogado(claims, identity_claim)
+        if not revogado and token_revocation.precisa_verificar(claims):
+            # Sincronização do filtro ou positivo a confirmar (raro): consulta síncrona no pool
+            try:
+                revogado = await asyncio.get_running_loop().run_in_executor(self.executor, self._jti_revogado, claims)
+            except RevogacaoIndisponivel:
+                raise ErroHTTP(503, {
+                    "error": "service_unavailable",
+                    "message": "Verificação de token indisponível, tente novamente em instantes",
+                })
+        if revogado:
+            raise ErroHTTP(401, {"error": "jwt_revoked", "message": "Token JWT revogado"})
+        return int(claims[identity_claim])
+
+    def _jti_revogado(self, claims) -> bool:
+        with self.flask_app.app_context():
+            return token_revocation.revogado(claims)
+
+    async def _cache_produto(self, metodo, *args):
+        """Cache de produtos no pool de threads: o backend redis (e a conferência do catálogo) fazem I/O síncrono."""
+        def executar():
+            with self.flask_app.app_context():
+                return metodo(*args)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, executar)
+
+    def _paginacao(self, args):
+        config = self.flask_app.config
+        try:
+            return parse_parametros_paginacao(
+                args, config.get('PAGINATION_DEFAULT_SIZE', 50), config.get('PAGINATION_MAX_SIZE', 200)
+            )
+        except ValueError as err:
+            raise ErroHTTP(400, {"error": str(err)})
+
+    @staticmethod
+    def _cache(etag: str, cache_control: str):
+        return [(b'etag', f'W/"{etag}"'.encode('latin-1')), (b'cache-control', cache_control.encode('latin-1'))]
+
+    @staticmethod
+    async def _etag_versao(session, recurso: str, coluna, user_id, args):
+        versao = (await session.execute(select(coluna).where(Usuario.id == user_id))).scalar() or 0
+        return calcular_etag(recurso, user_id, versao, args=args)
+
+    # --- handlers (mesmas respostas das rotas Flask equivalentes) ---
+    async def listar_historico(self, user_id, args, headers):
+        stmt = select(*COMPRA_COLUNAS).where(Compra.usuario_id == user_id, Compra.finalizada.is_(True))
+        async with self.sessionmaker() as session:
+            etag = await self._etag_versao(session, 'history', Usuario.versao_historico, user_id, args)
+            cache = self._cache(etag, CACHE_REVALIDAR)
+            if etag_confere(headers.get('if-none-match'), etag):
+                return 304, None, cache
+            if args.get('paginate', 'true').lower() in ('false', '0', 'no'):
+                compras = (await session.execute(stmt.order_by(Compra.data_compra.desc()))).all()
+                return 200, [serialize_compra(c) for c in compras], cache
+            limit, cursor = self._paginacao(args)
+            linhas = (await session.execute(aplicar_keyset(stmt, Compra.data_compra, Compra.id, limit, cursor))).all()
+        compras, next_cursor = proxima_pagina(linhas, Compra.data_compra, Compra.id, limit)
+        return 200, {"itens": [serialize_compra(c) for c in compras], "next_cursor": next_cursor}, cache
+
+    @staticmethod
+    async def _serializar_listas(session, listas, lote: int = 500):
+        ids = [l.id for l in listas]
+        itens = {}
+        for i in range(0, len(ids), lote):
+            stmt = select(*ITEM_LISTA_COLUNAS).where(ItemDaLista.lista_id.in_(ids[i:i + lote])).order_by(ItemDaLista.id)
+            itens.update(agrupar_itens_lista(await session.execute(stmt)))
+        return [serialize_lista(l, itens.get(l.id, [])) for l in listas]
+
+    async def listar_listas(self, user_id, args, headers):
+        stmt = select(*LISTA_COLUNAS).where(ListaDeCompras.usuario_id == user_id)
+        async with self.sessionmaker() as session:
+            etag = await self._etag_versao(session, 'lists', Usuario.versao_listas, user_id, args)
+            cache = self._cache(etag, CACHE_REVALIDAR)
+            if etag_confere(headers.get('if-none-match'), etag):
+                return 304, None, cache
+            if args.get('paginate', 'true').lower() in ('false', '0', 'no'):
+                listas = (await session.execute(stmt.order_by(ListaDeCompras.data_criacao.desc()))).all()
+                return 200, await self._serializar_listas(session, listas), cache
+            limit, cursor = self._paginacao(args)
+            stmt = aplicar_keyset(stmt, ListaDeCompras.data_criacao, ListaDeCompras.id, limit, cursor)
+            linhas = (await session.execute(stmt)).all()
+            listas, next_cursor = proxima_pagina(linhas, ListaDeCompras.data_criacao, ListaDeCompras.id, limit)
+            return 200, {"itens": await self._serializar_listas(session, listas), "next_cursor": next_cursor}, cache
+
+    async def buscar_por_codigo_barras(self, user_id, args, headers, codigo_barras):
+        encontrado, data = await self._cache_produto(product_cache.lookup, codigo_barras)
+        if not encontrado:
+            async with self.sessionmaker() as session:
+                prod = (await session.scalars(
+                    select(Produto).where(Produto.codigo_barras == codigo_barras).limit(1)
+                )).first()
+            data = serialize_produto(prod) if prod else None
+            await self._cache_produto(product_cache.store, codigo_barras, data)
+        if data is None:
+            return 404, {"error": "Produto não encontrado"}
+        etag = calcular_etag('produto', data['id'], data['codigo_barras'], data['nome'], data['marca'])
+        cache = self._cache(etag, CACHE_REVALIDAR)
+        if etag_confere(headers.get('if-none-match'), etag):
+            return 304, None, cache
+        return 200, data, cache
+
+
+def create_asgi_app(config_class=Config):
+    return ListifyASGI(create_app(config_class))
@@ -4,4 +4,4 @@ from flask import Blueprint
 auth_bp = Blueprint('auth', __name__)
 
 # Importamos as rotas no final para evitar importação circular
-from . import routes
\ No newline at end of file
+from . import routes, commands
\ No newline at end of file
@@ -0,0 +1,11 @@
+import click
+from . import auth_bp
+from listify import token_revocation
+from listify.tokens import expurgar_sessoes_refresh
+
+
+@auth_bp.cli.command('prune-revoked-tokens')
+def prune_revoked_tokens():
+    """Remove da lista de revogação os tokens que já expiraram, e as sessões de refresh expiradas."""
+    click.echo(f'{token_revocation.store.expurgar()} token(s) revogado(s) expirado(s) removido(s).')
+    click.echo(f'{expurgar_sessoes_refresh()} sessão(ões) de refresh expirada(s) removida(s).')
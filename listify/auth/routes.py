@@ -1,10 +1,14 @@
-from flask import jsonify, request
+from flask import current_app, jsonify, request
 from . import auth_bp
-from listify import db
+from listify import db, google_verifier, token_revocation, token_versions
+from listify.google_auth import TokenGoogleInvalido, GoogleIndisponivel
 from listify.models import Usuario
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from listify.services import inserir_se_ausente
+from listify.tokens import emitir_tokens, encerrar_sessoes_refresh, rotacionar_sessao_refresh
+from flask_jwt_extended import current_user, decode_token, get_jwt, jwt_required
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt import PyJWTError
 import re
-import requests
 import uuid
 from marshmallow import ValidationError
 from listify.schemas import RegisterSchema, LoginSchema, GoogleLoginSchema
@@ -36,19 +40,20 @@ def register():
             "error": "RN03: senha deve ter pelo menos 8 caracteres, incluir maiúscula, minúscula e número"
         }), 400
 
-    # RN02: e-mail já cadastrado
-    if Usuario.query.filter_by(email=email).first():
-        return jsonify({"error": "RN02: e-mail já cadastrado"}), 409
-
+    # RN02: e-mail único garantido pela constraint (ON CONFLICT), sem SELECT prévio
     usuario = Usuario(nome=nome, email=email)
     usuario.set_password(senha)  # RNF03: Bcrypt
-
-    db.session.add(usuario)
+    inserido = inserir_se_ausente(Usuario, {
+        "nome": nome, "email": email, "hash_senha": usuario.hash_senha,
+    }, 'email', Usuario.id)
+    if inserido is None:
+        db.session.rollback()
+        return jsonify({"error": "RN02: e-mail já cadastrado"}), 409
     db.session.commit()
 
     return jsonify({
         "message": "Usuário cadastrado com sucesso",
-        "usuario": {"id": usuario.id, "nome": usuario.nome, "email": usuario.email}
+        "usuario": {"id": inserido.id, "nome": nome, "email": email}
     }), 201
 
 
@@ -66,20 +71,27 @@ def login():
     if not usuario or not usuario.check_password(senha):
         return jsonify({"error": "Credenciais inválidas"}), 401
 
-    access_token = create_access_token(identity=str(usuario.id))
+    # Rehash transparente quando BCRYPT_LOG_ROUNDS muda
+    if usuario.senha_precisa_rehash():
+        usuario.set_password(senha)
+
+    tokens = emitir_tokens(usuario)  # abre a sessão de refresh
+    db.session.commit()
     return jsonify({
-        "access_token": access_token,
+        **tokens,
         "usuario": {"id": usuario.id, "nome": usuario.nome, "email": usuario.email}
     }), 200
 
 
 @auth_bp.route('/google', methods=['POST'])
 def login_google():
-    """RF01 (Google): Login com Google simplificado via tokeninfo API."""
+    """RF01 (Google): Login com Google; o ID token é verificado localmente contra as chaves JWKS em cache."""
     # Aceita 'id_token' diretamente ou 'token' como alias
     dados_raw = request.get_json() or {}
     if 'id_token' not in dados_raw and 'token' in dados_raw:
         dados_raw['id_token'] = dados_raw['token']
+    # remover o alias para evitar erro de 'Unknown field' do Marshmallow
+    dados_raw.pop('token', None)
     try:
         dados = GoogleLoginSchema().load(dados_raw)
     except ValidationError as err:
@@ -87,47 +99,116 @@ def login_google():
     id_token = dados['id_token']
 
     try:
-        resp = requests.get(
-            'https://oauth2.googleapis.com/tokeninfo', params={'id_token': id_token}, timeout=5
-        )
-        if resp.status_code != 200:
-            return jsonify({"error": "Token do Google inválido"}), 401
+        info = google_verifier.verify(id_token)
+    except TokenGoogleInvalido:
+        return jsonify({"error": "Token do Google inválido"}), 401
+    except GoogleIndisponivel:
+        return jsonify({"error": "Falha ao validar token do Google"}), 503
 
-        info = resp.json()
-        email = info.get('email')
-        email_verified = info.get('email_verified')
-        nome_google = info.get('name') or 'Usuário Google'
+    email = info.get('email')
+    email_verified = info.get('email_verified')
+    nome_google = info.get('name') or 'Usuário Google'
 
-        if not email:
-            return jsonify({"error": "Token do Google sem e-mail"}), 400
+    if not email:
+        return jsonify({"error": "Token do Google sem e-mail"}), 400
 
-        if str(email_verified).lower() not in ('true', '1'):
-            return jsonify({"error": "E-mail do Google não verificado"}), 401
+    if str(email_verified).lower() not in ('true', '1'):
+        return jsonify({"error": "E-mail do Google não verificado"}), 401
 
-        usuario = Usuario.query.filter_by(email=email).first()
-        if not usuario:
-            usuario = Usuario(nome=nome_google, email=email)
-            # Cria uma senha aleatória apenas para cumprir o modelo; não será usada.
-            senha_fake = uuid.uuid4().hex + 'Aa1'
-            usuario.set_password(senha_fake)
-            db.session.add(usuario)
-            db.session.commit()
-
-        access_token = create_access_token(identity=str(usuario.id))
-        return jsonify({
-            "access_token": access_token,
-            "usuario": {"id": usuario.id, "nome": usuario.nome, "email": usuario.email}
-        }), 200
-    except Exception:
-        return jsonify({"error": "Falha ao validar token do Google"}), 500
+    usuario = Usuario.query.filter_by(email=email).first()
+    if not usuario:
+        novo = Usuario(nome=nome_google, email=email)
+        # Cria uma senha aleatória apenas para cumprir o modelo; não será usada.
+        senha_fake = uuid.uuid4().hex + 'Aa1'
+        novo.set_password(senha_fake)
+        # Primeiro login concorrente do mesmo e-mail: quem perder a corrida usa o usuário criado
+        inserir_se_ausente(Usuario, {
+            "nome": novo.nome, "email": email, "hash_senha": novo.hash_senha,
+        }, 'email', Usuario.id)
+        db.session.commit()
+        usuario = Usuario.query.filter_by(email=email).one()
+
+    tokens = emitir_tokens(usuario)  # abre a sessão de refresh
+    db.session.commit()
+    return jsonify({
+        **tokens,
+        "usuario": {"id": usuario.id, "nome": usuario.nome, "email": usuario.email}
+    }), 200
 
 
 @auth_bp.route('/me', methods=['GET'])
 @jwt_required()
 def me():
-    """Exemplo de rota protegida usando @jwt_required()."""
-    user_id = get_jwt_identity()
-    usuario = Usuario.query.get(int(user_id))
+    """Usuário autenticado, a partir dos claims do token (sem consulta ao banco)."""
+    if current_user.nome is None:
+        # Token emitido antes dos claims de usuário: busca no banco
+        usuario = db.session.get(Usuario, current_user.id)
+        if not usuario:
+            return jsonify({"error": "Usuário não encontrado"}), 404
+        return jsonify({"id": usuario.id, "nome": usuario.nome, "email": usuario.email}), 200
+    return jsonify({"id": current_user.id, "nome": current_user.nome, "email": current_user.email}), 200
+
+
+@auth_bp.route('/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refresh():
+    """
+    Troca o refresh token por um novo par access + refresh (rotação: a sessão de refresh
+    passa para o novo token). Reusar um refresh já trocado responde 401 jwt_revoked.
+    """
+    usuario = db.session.get(Usuario, current_user.id)
     if not usuario:
-        return jsonify({"error": "Usuário não encontrado"}), 404
-    return jsonify({"id": usuario.id, "nome": usuario.nome, "email": usuario.email}), 200
\ No newline at end of file
+        return jsonify({"error": "Usuário não encontrado"}), 401
+    payload = get_jwt()
+    if 'sid' in payload:
+        sessao = rotacionar_sessao_refresh(payload)
+        revogado = sessao is None
+    else:
+        # Refresh emitido antes das sessões: rotação pela lista de revogação, até esses
+        # tokens expirarem; o novo par já abre uma sessão
+        sessao = None
+        revogado = not token_revocation.revogar(payload)
+    if revogado:
+        db.session.rollback()
+        return jsonify({"error": "jwt_revoked", "message": "Token JWT revogado"}), 401
+    tokens = emitir_tokens(usuario, sessao)
+    db.session.commit()
+    return jsonify(tokens), 200
+
+
+@auth_bp.route('/logout', methods=['POST'])
+@jwt_required(verify_type=False)
+def logout():
+    """
+    Revoga o token do header e, se enviado, o 'refresh_token' do corpo. Access tokens
+    entram na lista de revogação; refresh tokens encerram a sua sessão de refresh.
+    """
+    tokens = [get_jwt()]
+    refresh_token = (request.get_json(silent=True) or {}).get('refresh_token')
+    if refresh_token:
+        try:
+            payload = decode_token(refresh_token, allow_expired=True)
+        except (PyJWTError, JWTExtendedException):
+            return jsonify({"error": "refresh_token inválido"}), 400
+        identity_claim = current_app.config['JWT_IDENTITY_CLAIM']
+        if payload.get('type') != 'refresh' or payload.get(identity_claim) != tokens[0][identity_claim]:
+            return jsonify({"error": "refresh_token inválido"}), 400
+        tokens.append(payload)
+    for payload in tokens:
+        if payload.get('type') == 'refresh' and 'sid' in payload:
+            encerrar_sessoes_refresh(current_user.id, payload['sid'])
+        else:
+            token_revocation.revogar(payload)
+    db.session.commit()
+    return jsonify({"message": "Sessão encerrada"}), 200
+
+
+@auth_bp.route('/logout-all', methods=['POST'])
+@jwt_required()
+def logout_all():
+    """Revoga todos os tokens do usuário (inclusive o atual) incrementando a versão de token."""
+    token_versions.revogar_todos(current_user.id)
+    encerrar_sessoes_refresh(current_user.id)
+    db.session.commit()
+    token_versions.invalidar()
+    return jsonify({"message": "Sessões encerradas"}), 200
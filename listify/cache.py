@@ -0,0 +1,232 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
+
+logger = logging.getLogger("listify")
+
+# Marcador interno para distinguir "não está no cache" de "cacheado como inexistente"
+_AUSENTE = object()
+
+
+class MemoryBackend:
+    """LRU em processo com TTL por entrada e limite de tamanho."""
+
+    name = 'memory'
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _AUSENTE)
+            if entry is _AUSENTE:
+                return _AUSENTE
+            expira_em, value = entry
+            if expira_em < time.monotonic():
+                del self._data[key]
+                return _AUSENTE
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_many(self, keys) -> None:
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SharedBackend:
+    """
+    Backend compartilhado entre workers sobre um cliente no estilo Redis
+    (get, set(..., ex=ttl), delete(*chaves)). Valores são serializados em JSON.
+    Qualquer objeto com essa interface serve, inclusive um fake local em testes.
+
+    Falha aberto: se o cliente levantar erro (ex.: Redis fora do ar), a leitura vira
+    miss (a rota vai ao banco), a escrita é descartada e o cliente deixa de ser chamado
+    por `pausa` segundos, para não pagar um timeout de conexão a cada requisição.
+    Invalidações perdidas nesse intervalo expiram pelo TTL.
+    """
+
+    name = 'shared'
+
+    def __init__(self, client, prefix: str = 'listify:', pausa: float = 5.0):
+        self.client = client
+        self.prefix = prefix
+        self.pausa = pausa
+        self._pausado_ate = 0.0
+
+    def _chamar(self, metodo: str, *args, **kwargs) -> Any:
+        """Chama o cliente; em erro (ou durante a pausa) devolve _AUSENTE."""
+        if time.monotonic() < self._pausado_ate:
+            return _AUSENTE
+        try:
+            return getattr(self.client, metodo)(*args, **kwargs)
+        except Exception as exc:
+            self._pausado_ate = time.monotonic() + self.pausa
+            logger.warning("Cache compartilhado indisponível (%s: %s); usando o banco por %ss", metodo, exc, self.pausa)
+            return _AUSENTE
+
+    def get(self, key: str) -> Any:
+        raw = self._chamar('get', self.prefix + key)
+        if raw is None or raw is _AUSENTE:
+            return _AUSENTE
+        return json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        self._chamar('set', self.prefix + key, json.dumps(value), ex=ttl)
+
+    def delete(self, key: str) -> None:
+        self._chamar('delete', self.prefix + key)
+
+    def delete_many(self, keys) -> None:
+        # Um único DEL com várias chaves (um round trip)
+        chaves = [self.prefix + key for key in keys]
+        if chaves:
+            self._chamar('delete', *chaves)
+
+    def clear(self) -> None:
+        # Não há como limpar só o nosso prefixo de forma barata; entradas expiram pelo TTL
+        pass
+
+
+class ProductCache:
+    """
+    Cache read-through das buscas de produto por código de barras.
+    Guarda tanto acertos (produto serializado) quanto 404s (None, com TTL próprio)
+    e é invalidado quando um produto é cadastrado.
+
+    A importação invalida as chaves só no backend do processo que importou. Com o backend
+    em memória, cada processo confere a versão do catálogo (versao_catalogo) a cada
+    PRODUCT_CACHE_CATALOG_CHECK segundos e se esvazia quando ela muda, então uma
+    importação pela CLI ou por outro worker chega aos demais nesse intervalo.
+    """
+
+    def __init__(self, app=None):
+        self.backend = None
+        self.ttl = 300
+        self.negative_ttl = 30
+        self.hits = 0
+        self.misses = 0
+        self.intervalo_catalogo = 5
+        self._versao_catalogo = None
+        self._conferir_em = 0.0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config.get('PRODUCT_CACHE_TTL', 300)
+        self.negative_ttl = app.config.get('PRODUCT_CACHE_NEGATIVE_TTL', 30)
+        self.backend = self._criar_backend(app)
+        self.hits = 0
+        self.misses = 0
+        self.intervalo_catalogo = app.config.get('PRODUCT_CACHE_CATALOG_CHECK', 5)
+        self._versao_catalogo = None
+        self._conferir_em = 0.0
+        app.extensions['product_cache'] = self
+
+    @staticmethod
+    def _criar_backend(app):
+        tipo = (app.config.get('PRODUCT_CACHE_BACKEND') or 'memory').lower()
+        if tipo == 'none':
+            return None
+        if tipo == 'redis':
+            client = app.config.get('PRODUCT_CACHE_CLIENT')
+            if client is None:
+                try:
+                    import redis
+                except ImportError:
+                    logger.warning("PRODUCT_CACHE_BACKEND=redis, mas o pacote 'redis' não está instalado; usando cache em memória")
+                    return MemoryBackend(app.config.get('PRODUCT_CACHE_MAXSIZE', 10000))
+                client = redis.Redis.from_url(app.config.get('REDIS_URL') or 'redis://localhost:6379/0')
+            return SharedBackend(client)
+        return MemoryBackend(app.config.get('PRODUCT_CACHE_MAXSIZE', 10000))
+
+    @staticmethod
+    def _key(codigo_barras: str) -> str:
+        return 'produto:barcode:' + codigo_barras
+
+    def _conferir_catalogo(self) -> None:
+        """Backend em memória: esvazia o cache se o catálogo mudou em outro processo (requer app context)."""
+        if not isinstance(self.backend, MemoryBackend) or time.monotonic() < self._conferir_em:
+            return
+        from listify.services import ler_versao_catalogo
+        versao = ler_versao_catalogo()
+        with self._lock:
+            if self._versao_catalogo is not None and versao != self._versao_catalogo:
+                self.backend.clear()
+            self._versao_catalogo = versao
+            self._conferir_em = time.monotonic() + self.intervalo_catalogo
+
+    def lookup(self, codigo_barras: str) -> Tuple[bool, Optional[dict]]:
+        """Retorna (encontrado, valor) e contabiliza acerto/falha; valor None é um 404 cacheado."""
+        if self.backend is None:
+            return False, None
+        self._conferir_catalogo()
+        value = self.backend.get(self._key(codigo_barras))
+        with self._lock:
+            if value is _AUSENTE:
+                self.misses += 1
+                return False, None
+            self.hits += 1
+        return True, value
+
+    def store(self, codigo_barras: str, value: Optional[dict]) -> None:
+        if self.backend is not None:
+            self.backend.set(self._key(codigo_barras), value, self.ttl if value is not None else self.negative_ttl)
+
+    def get_or_load(self, codigo_barras: str, loader: Callable[[str], Optional[dict]]) -> Optional[dict]:
+        """Retorna o produto serializado (ou None se inexistente), consultando o loader só em miss."""
+        encontrado, value = self.lookup(codigo_barras)
+        if encontrado:
+            return value
+        value = loader(codigo_barras)
+        self.store(codigo_barras, value)
+        return value
+
+    def invalidate(self, codigo_barras: str) -> None:
+        if self.backend is not None:
+            self.backend.delete(self._key(codigo_barras))
+
+    def invalidate_many(self, codigos_barras) -> None:
+        if self.backend is not None:
+            self.backend.delete_many([self._key(c) for c in codigos_barras])
+
+    def clear(self) -> None:
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        data = {
+            "backend": self.backend.name if self.backend is not None else 'none',
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+        if isinstance(self.backend, MemoryBackend):
+            data["size"] = len(self.backend)
+            data["maxsize"] = self.backend.maxsize
+        return data
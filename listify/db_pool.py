@@ -0,0 +1,140 @@
+import logging
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import NullPool, QueuePool
+
+logger = logging.getLogger("listify")
+
+# callbacks (segundos_de_espera, timeout) chamados a cada checkout do TimedQueuePool, ex.: métricas
+wait_observers = []
+
+
+class PoolStats:
+    """Contadores de checkout do pool (por processo)."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._lock = threading.Lock()
+
+    def registrar(self, espera: float, timeout: bool = False) -> None:
+        with self._lock:
+            if timeout:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_total += espera
+            self.wait_max = max(self.wait_max, espera)
+        for observer in wait_observers:
+            observer(espera, timeout)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool que mede o tempo de espera por uma conexão livre."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.registrar(time.perf_counter() - inicio, timeout=True)
+            raise
+        self.stats.registrar(time.perf_counter() - inicio)
+        return conn
+
+
+def _is_postgres(uri: str) -> bool:
+    return (uri or '').startswith(('postgresql', 'postgres'))
+
+
+def build_engine_options(config) -> dict:
+    """
+    Monta SQLALCHEMY_ENGINE_OPTIONS a partir das variáveis DB_* do Config.
+    Um SQLALCHEMY_ENGINE_OPTIONS explícito tem precedência; fora do PostgreSQL
+    os padrões do SQLAlchemy são mantidos.
+    """
+    if config.get('SQLALCHEMY_ENGINE_OPTIONS'):
+        return config['SQLALCHEMY_ENGINE_OPTIONS']
+    if not _is_postgres(config.get('SQLALCHEMY_DATABASE_URI')):
+        return {}
+
+    options = {"pool_pre_ping": config.get('DB_POOL_PRE_PING', True)}
+    connect_args = {"connect_timeout": config.get('DB_CONNECT_TIMEOUT', 10)}
+    statement_timeout = config.get('DB_STATEMENT_TIMEOUT_MS', 0)
+
+    if config.get('DB_POOL_MODE', 'queue') == 'pgbouncer':
+        # PgBouncer em transaction pooling já faz o pool; cada checkout abre/fecha no PgBouncer.
+        options["poolclass"] = NullPool
+        if statement_timeout:
+            # O PgBouncer recusa parâmetros de inicialização como 'options'
+            logger.warning("DB_STATEMENT_TIMEOUT_MS ignorado em DB_POOL_MODE=pgbouncer; "
+                           "configure statement_timeout no role do banco (ALTER ROLE ... SET statement_timeout)")
+    else:
+        options.update({
+            "poolclass": TimedQueuePool,
+            "pool_size": config.get('DB_POOL_SIZE', 5),
+            "max_overflow": config.get('DB_MAX_OVERFLOW', 10),
+            "pool_timeout": config.get('DB_POOL_TIMEOUT', 30),
+            "pool_recycle": config.get('DB_POOL_RECYCLE', 1800),
+        })
+        if statement_timeout:
+            connect_args["options"] = f"-c statement_timeout={statement_timeout}"
+    options["connect_args"] = connect_args
+    return options
+
+
+def build_async_engine_options(config) -> dict:
+    """Equivalente de build_engine_options para o engine assíncrono (asyncpg) do modo ASGI."""
+    if config.get('ASYNC_ENGINE_OPTIONS'):
+        return config['ASYNC_ENGINE_OPTIONS']
+    if not _is_postgres(config.get('SQLALCHEMY_DATABASE_URI')):
+        return {}
+    options = {"pool_pre_ping": config.get('DB_POOL_PRE_PING', True)}
+    connect_args = {"timeout": config.get('DB_CONNECT_TIMEOUT', 10)}
+    if config.get('DB_POOL_MODE', 'queue') == 'pgbouncer':
+        options["poolclass"] = NullPool
+        # asyncpg usa prepared statements nomeados, incompatíveis com transaction pooling
+        connect_args["statement_cache_size"] = 0
+        connect_args["prepared_statement_cache_size"] = 0
+    else:
+        options.update({
+            "pool_size": config.get('DB_POOL_SIZE', 5),
+            "max_overflow": config.get('DB_MAX_OVERFLOW', 10),
+            "pool_timeout": config.get('DB_POOL_TIMEOUT', 30),
+            "pool_recycle": config.get('DB_POOL_RECYCLE', 1800),
+        })
+        if config.get('DB_STATEMENT_TIMEOUT_MS', 0):
+            connect_args["server_settings"] = {"statement_timeout": str(config['DB_STATEMENT_TIMEOUT_MS'])}
+    options["connect_args"] = connect_args
+    return options
+
+
+def pool_status(engine) -> dict:
+    """Métricas do pool do engine para dimensionamento (por processo)."""
+    pool = engine.pool
+    data = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        data.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+        })
+    stats = getattr(pool, 'stats', None)
+    if stats is not None:
+        data.update({
+            "checkouts_total": stats.checkouts,
+            "timeouts_total": stats.timeouts,
+            "wait_seconds_total": round(stats.wait_total, 6),
+            "wait_seconds_max": round(stats.wait_max, 6),
+        })
+    return data
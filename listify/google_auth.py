@@ -0,0 +1,206 @@
+import logging
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+import jwt
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger("listify")
+
+GOOGLE_ISSUERS = ['accounts.google.com', 'https://accounts.google.com']
+
+
+class TokenGoogleInvalido(Exception):
+    """ID token do Google inválido, expirado ou de outra audiência."""
+
+
+class GoogleIndisponivel(Exception):
+    """Não foi possível falar com o Google (erro de rede ou circuito aberto)."""
+
+
+class CircuitBreaker:
+    """
+    Abre após `falhas_max` falhas consecutivas e recusa chamadas por `reset_timeout`
+    segundos; depois deixa passar uma tentativa (meio-aberto) para testar a recuperação.
+    """
+
+    def __init__(self, falhas_max: int = 5, reset_timeout: float = 30.0):
+        self.falhas_max = falhas_max
+        self.reset_timeout = reset_timeout
+        self.falhas = 0
+        self.aberto_ate = 0.0
+        self._lock = threading.Lock()
+
+    def permite(self) -> bool:
+        with self._lock:
+            if self.falhas < self.falhas_max:
+                return True
+            if time.monotonic() >= self.aberto_ate:
+                # meio-aberto: libera uma tentativa e reabre o prazo para as demais
+                self.aberto_ate = time.monotonic() + self.reset_timeout
+                return True
+            return False
+
+    def sucesso(self) -> None:
+        with self._lock:
+            self.falhas = 0
+
+    def falha(self) -> None:
+        with self._lock:
+            self.falhas += 1
+            if self.falhas >= self.falhas_max:
+                self.aberto_ate = time.monotonic() + self.reset_timeout
+
+
+def _max_age(cache_control: Optional[str], padrao: int) -> int:
+    match = re.search(r'max-age=(\d+)', cache_control or '')
+    return int(match.group(1)) if match else padrao
+
+
+class GoogleTokenVerifier:
+    """
+    Verifica ID tokens do Google localmente (assinatura RS256, iss, exp e aud) contra
+    as chaves JWKS em cache. O cache respeita o max-age do Cache-Control e é renovado
+    em segundo plano ao entrar na janela final de validade. Chamadas remotas (JWKS ou
+    o modo 'tokeninfo') usam uma requests.Session com pool de conexões e circuit breaker.
+    """
+
+    def __init__(self, app=None):
+        self.session = None
+        self.breaker = CircuitBreaker()
+        self._keys: Dict[str, object] = {}
+        self._expira_em = 0.0
+        self._renovar_em = 0.0
+        self._ultimo_refresh_forcado = float('-inf')
+        self._renovando = False
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.mode = app.config.get('GOOGLE_VERIFY_MODE', 'local')
+        self.client_ids: List[str] = [
+            c.strip() for c in (app.config.get('GOOGLE_CLIENT_IDS') or '').split(',') if c.strip()
+        ]
+        self.jwks_url = app.config.get('GOOGLE_JWKS_URL', 'https://www.googleapis.com/oauth2/v3/certs')
+        self.tokeninfo_url = app.config.get('GOOGLE_TOKENINFO_URL', 'https://oauth2.googleapis.com/tokeninfo')
+        self.timeout = app.config.get('GOOGLE_HTTP_TIMEOUT', 3.0)
+        self.breaker = CircuitBreaker(
+            app.config.get('GOOGLE_BREAKER_FAILURES', 5), app.config.get('GOOGLE_BREAKER_RESET', 30.0)
+        )
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=2, pool_maxsize=10))
+        self._keys = {}
+        self._expira_em = self._renovar_em = 0.0
+        self._ultimo_refresh_forcado = float('-inf')
+        if not self.client_ids:
+            logger.warning("GOOGLE_CLIENT_IDS não configurado: a audiência (aud) dos tokens do Google não é verificada")
+        app.extensions['google_verifier'] = self
+
+    # --- chamadas remotas ---
+    def _get(self, url: str, **kwargs) -> requests.Response:
+        if not self.breaker.permite():
+            raise GoogleIndisponivel("Circuito aberto para o Google")
+        try:
+            resp = self.session.get(url, timeout=self.timeout, **kwargs)
+        except requests.RequestException as exc:
+            self.breaker.falha()
+            raise GoogleIndisponivel(str(exc))
+        if resp.status_code >= 500:
+            self.breaker.falha()
+            raise GoogleIndisponivel(f"Google respondeu {resp.status_code}")
+        self.breaker.sucesso()
+        return resp
+
+    def _buscar_chaves(self) -> None:
+        resp = self._get(self.jwks_url)
+        if resp.status_code != 200:
+            raise GoogleIndisponivel(f"JWKS respondeu {resp.status_code}")
+        keys = {}
+        for jwk in resp.json().get('keys', []):
+            try:
+                keys[jwk['kid']] = jwt.PyJWK(jwk).key
+            except (KeyError, jwt.PyJWTError):
+                continue
+        max_age = _max_age(resp.headers.get('Cache-Control'), 3600)
+        agora = time.monotonic()
+        with self._lock:
+            self._keys = keys
+            self._expira_em = agora + max_age
+            # renova em segundo plano nos últimos 10% da validade
+            self._renovar_em = agora + max_age * 0.9
+
+    def _renovar_em_segundo_plano(self) -> None:
+        try:
+            self._buscar_chaves()
+        except GoogleIndisponivel:
+            logger.warning("Falha ao renovar JWKS do Google em segundo plano")
+        finally:
+            with self._lock:
+                self._renovando = False
+
+    def _chave(self, kid: str):
+        agora = time.monotonic()
+        with self._lock:
+            expirado = agora >= self._expira_em
+            disparar = not expirado and agora >= self._renovar_em and not self._renovando
+            if disparar:
+                self._renovando = True
+        if expirado:
+            self._buscar_chaves()
+        elif disparar:
+            threading.Thread(target=self._renovar_em_segundo_plano, daemon=True).start()
+
+        chave = self._keys.get(kid)
+        if chave is not None:
+            return chave
+        # kid desconhecido: o Google pode ter rotacionado as chaves. Checar e marcar sob
+        # o lock garante um único refresh forçado por minuto, mesmo com threads concorrentes.
+        with self._lock:
+            forcar = agora - self._ultimo_refresh_forcado > 60
+            if forcar:
+                self._ultimo_refresh_forcado = agora
+        if forcar:
+            self._buscar_chaves()
+            chave = self._keys.get(kid)
+        return chave
+
+    # --- verificação ---
+    def _verificar_local(self, id_token: str) -> dict:
+        try:
+            header = jwt.get_unverified_header(id_token)
+        except jwt.PyJWTError:
+            raise TokenGoogleInvalido("Token malformado")
+        chave = self._chave(header.get('kid', ''))
+        if chave is None:
+            raise TokenGoogleInvalido("Chave de assinatura desconhecida")
+        try:
+            return jwt.decode(
+                id_token,
+                key=chave,
+                algorithms=['RS256'],
+                audience=self.client_ids or None,
+                issuer=GOOGLE_ISSUERS,
+                options={"verify_aud": bool(self.client_ids)},
+                leeway=30,
+            )
+        except jwt.PyJWTError as exc:
+            raise TokenGoogleInvalido(str(exc))
+
+    def _verificar_tokeninfo(self, id_token: str) -> dict:
+        resp = self._get(self.tokeninfo_url, params={'id_token': id_token})
+        if resp.status_code != 200:
+            raise TokenGoogleInvalido("tokeninfo recusou o token")
+        info = resp.json()
+        if self.client_ids and info.get('aud') not in self.client_ids:
+            raise TokenGoogleInvalido("Audiência inválida")
+        return info
+
+    def verify(self, id_token: str) -> dict:
+        """Retorna as claims do ID token (email, email_verified, name, ...)."""
+        if self.mode == 'tokeninfo':
+            return self._verificar_tokeninfo(id_token)
+        return self._verificar_local(id_token)
@@ -0,0 +1,119 @@
+import hmac
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+
+import bcrypt as _bcrypt
+
+
+class HashingSobrecarregado(Exception):
+    """Fila de hashing cheia (ou espera esgotada): a requisição deve ser recusada com 429."""
+
+
+def _hash_worker(senha: str, rounds: int) -> str:
+    return _bcrypt.hashpw(senha.encode('utf-8'), _bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+
+def _verify_worker(hash_senha: str, senha: str) -> bool:
+    try:
+        calculado = _bcrypt.hashpw(senha.encode('utf-8'), hash_senha.encode('utf-8'))
+    except ValueError:
+        return False
+    return hmac.compare_digest(calculado, hash_senha.encode('utf-8'))
+
+
+class PasswordHasher:
+    """
+    Hash/verificação bcrypt (RNF03) com custo configurável (BCRYPT_LOG_ROUNDS).
+
+    Com BCRYPT_POOL_WORKERS > 0 o trabalho roda num ProcessPoolExecutor limitado,
+    criado sob demanda em cada processo (após o fork do gunicorn). BCRYPT_POOL_WORKERS
+    é o total do host: cada processo web cria ceil(BCRYPT_POOL_WORKERS / WEB_CONCURRENCY)
+    processos de hashing. Em qualquer modo, no máximo BCRYPT_POOL_MAX_PENDING operações
+    ficam em andamento por processo; acima disso HashingSobrecarregado é levantada
+    (mapeada para 429).
+
+    O pool só libera o worker web com workers que atendem várias requisições ao mesmo
+    tempo (gunicorn gthread ou ASGI): num worker sync a requisição continua bloqueada
+    em future.result() e o pool só acrescenta o custo de IPC.
+    """
+
+    def __init__(self, app=None):
+        self.rounds = 12
+        self.workers = 0
+        self.timeout = 10.0
+        self._slots = threading.BoundedSemaphore(32)
+        self._pool = None
+        self._pool_pid = None
+        self._lock = threading.Lock()
+        # callbacks (operacao, segundos) chamados após cada hash/verificação, ex.: métricas
+        self.observers = []
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.rounds = app.config.get('BCRYPT_LOG_ROUNDS', 12)
+        total = app.config.get('BCRYPT_POOL_WORKERS', 0)
+        processos_web = max(1, app.config.get('WEB_CONCURRENCY', 1))
+        self.workers = -(-total // processos_web) if total > 0 else 0
+        self.timeout = app.config.get('BCRYPT_POOL_TIMEOUT', 10.0)
+        self._slots = threading.BoundedSemaphore(app.config.get('BCRYPT_POOL_MAX_PENDING', 32))
+        app.extensions['password_hasher'] = self
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def _run(self, operacao, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingSobrecarregado()
+        inicio = time.perf_counter()
+        try:
+            if self.workers <= 0:
+                try:
+                    return fn(*args)
+                finally:
+                    self._slots.release()
+            try:
+                future = self._executor().submit(fn, *args)
+            except BaseException:
+                self._slots.release()
+                raise
+            # O slot volta quando o hash termina de fato, não quando a requisição desiste:
+            # um future que estourou o timeout segue ocupando um processo do pool.
+            future.add_done_callback(lambda _: self._slots.release())
+            try:
+                return future.result(timeout=self.timeout)
+            except FuturesTimeoutError:
+                future.cancel()
+                raise HashingSobrecarregado()
+        finally:
+            for observer in self.observers:
+                observer(operacao, time.perf_counter() - inicio)
+
+    def hash(self, senha: str) -> str:
+        return self._run('hash', _hash_worker, senha, self.rounds)
+
+    def verify(self, hash_senha: str, senha: str) -> bool:
+        return self._run('verify', _verify_worker, hash_senha, senha)
+
+    def needs_rehash(self, hash_senha: str) -> bool:
+        """True quando o hash foi gerado com custo diferente de BCRYPT_LOG_ROUNDS."""
+        try:
+            return int(hash_senha.split('$')[2]) != self.rounds
+        except (AttributeError, IndexError, ValueError):
+            return True
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
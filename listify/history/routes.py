@@ -1,58 +1,163 @@
-from flask import jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from listify.models import Compra, ItemDaCompra, Produto
+import csv
+import io
+from flask import Response, current_app, jsonify, request, stream_with_context
+from flask_jwt_extended import current_user, jwt_required
+from listify import db
+from listify.models import Compra, ItemDaCompra, Produto, Usuario
 from . import history_bp
-from listify.services import comparar_compras
+from listify.services import comparar_compras, comparar_varias_compras
+from listify.pagination import paginacao_ativa, ler_parametros_paginacao, paginar_keyset
+from listify.http_cache import CACHE_REVALIDAR, calcular_etag, ler_versao, responder_condicional
+from listify.serializers import (
+    COMPRA_COLUNAS, ITEM_COMPRA_COLUNAS, serialize_compra, serialize_item_compra_linha,
+)
 
 
-def _serialize_produto(prod: Produto):
-    return {
-        "id": prod.id,
-        "codigo_barras": prod.codigo_barras,
-        "nome": prod.nome,
-        "marca": prod.marca,
-    }
+def _itens_da_compra(compra_id: int):
+    """Itens com o produto num único SELECT de colunas (item ⟕ produto), sem objetos ORM."""
+    linhas = db.session.query(*ITEM_COMPRA_COLUNAS)\
+        .outerjoin(Produto, Produto.id == ItemDaCompra.produto_id)\
+        .filter(ItemDaCompra.compra_id == compra_id)\
+        .order_by(ItemDaCompra.id)
+    return [serialize_item_compra_linha(l) for l in linhas]
 
 
-def _serialize_item(item: ItemDaCompra):
-    return {
-        "id": item.id,
-        "quantidade": item.quantidade,
-        "preco_pago": float(item.preco_pago),
-        "produto": _serialize_produto(item.produto) if item.produto else None,
-    }
+@history_bp.route('', methods=['GET'])
+@jwt_required()
+def listar_historico():
+    """
+    Lista compras finalizadas, paginadas por cursor (data_compra, id). '?paginate=false' devolve tudo.
+    Responde 304 quando o If-None-Match confere com a versão atual do histórico do usuário.
+    """
+    user_id = current_user.id
+    etag = calcular_etag('history', user_id, ler_versao(user_id, Usuario.versao_historico), args=request.args)
+    return responder_condicional(etag, lambda: _listar_historico(user_id))
 
 
-def _serialize_compra(compra: Compra, include_itens: bool = False):
-    data = {
-        "id": compra.id,
-        "data_compra": compra.data_compra.isoformat() if compra.data_compra else None,
-        "valor_total": float(compra.valor_total),
-        "finalizada": bool(compra.finalizada),
-    }
-    if include_itens:
-        itens = ItemDaCompra.query.filter_by(compra_id=compra.id).all()
-        data["itens"] = [_serialize_item(i) for i in itens]
-    return data
+def _listar_historico(user_id: int):
+    # Só as colunas da resposta: linhas leves em vez de objetos ORM
+    query = db.session.query(*COMPRA_COLUNAS)\
+        .filter(Compra.usuario_id == user_id, Compra.finalizada.is_(True))
+    if not paginacao_ativa():
+        compras = query.order_by(Compra.data_compra.desc()).all()
+        return jsonify([serialize_compra(c) for c in compras]), 200
 
+    try:
+        limit, cursor = ler_parametros_paginacao()
+    except ValueError as err:
+        return jsonify({"error": str(err)}), 400
+    compras, next_cursor = paginar_keyset(query, Compra.data_compra, Compra.id, limit, cursor)
+    return jsonify({
+        "itens": [serialize_compra(c) for c in compras],
+        "next_cursor": next_cursor,
+    }), 200
 
-@history_bp.route('', methods=['GET'])
+
+EXPORT_CSV_COLUNAS = [
+    "compra_id", "data_compra", "valor_total", "item_id", "quantidade", "preco_pago",
+    "produto_id", "codigo_barras", "nome", "marca",
+]
+
+
+def _linhas_exportacao(user_id: int, lote: int = 1000):
+    """
+    Uma única consulta compra ⋈ item ⋈ produto, percorrida com cursor no servidor
+    (yield_per) para que a memória não cresça com o tamanho do histórico.
+    """
+    return db.session.query(
+        Compra.id, Compra.data_compra, Compra.valor_total,
+        ItemDaCompra.id, ItemDaCompra.quantidade, ItemDaCompra.preco_pago,
+        Produto.id, Produto.codigo_barras, Produto.nome, Produto.marca,
+    )\
+        .outerjoin(ItemDaCompra, ItemDaCompra.compra_id == Compra.id)\
+        .outerjoin(Produto, Produto.id == ItemDaCompra.produto_id)\
+        .filter(Compra.usuario_id == user_id, Compra.finalizada.is_(True))\
+        .order_by(Compra.data_compra.desc(), Compra.id.desc(), ItemDaCompra.id)\
+        .yield_per(lote)
+
+
+def _gerar_ndjson(user_id: int):
+    """Uma linha JSON por compra, com seus itens; as linhas chegam agrupadas por compra."""
+    dumps = current_app.json.dumps
+    atual = None
+    for (compra_id, data_compra, valor_total, item_id, quantidade, preco_pago,
+         produto_id, codigo_barras, nome, marca) in _linhas_exportacao(user_id):
+        if atual is None or atual["id"] != compra_id:
+            if atual is not None:
+                yield dumps(atual) + "\n"
+            atual = {
+                "id": compra_id,
+                "data_compra": data_compra,
+                "valor_total": valor_total,
+                "itens": [],
+            }
+        if item_id is not None:
+            atual["itens"].append({
+                "id": item_id,
+                "quantidade": quantidade,
+                "preco_pago": preco_pago,
+                "produto": {
+                    "id": produto_id,
+                    "codigo_barras": codigo_barras,
+                    "nome": nome,
+                    "marca": marca,
+                } if produto_id is not None else None,
+            })
+    if atual is not None:
+        yield dumps(atual) + "\n"
+
+
+def _gerar_csv(user_id: int, linhas_por_bloco: int = 500):
+    """Uma linha CSV por item, enviada em blocos."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_CSV_COLUNAS)
+    for n, (compra_id, data_compra, valor_total, item_id, quantidade, preco_pago,
+            produto_id, codigo_barras, nome, marca) in enumerate(_linhas_exportacao(user_id), start=1):
+        writer.writerow([
+            compra_id, data_compra.isoformat() if data_compra else '', valor_total,
+            item_id, quantidade, preco_pago, produto_id, codigo_barras, nome, marca,
+        ])
+        if n % linhas_por_bloco == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+@history_bp.route('/export', methods=['GET'])
 @jwt_required()
-def listar_historico():
-    user_id = int(get_jwt_identity())
-    compras = Compra.query\
-        .filter_by(usuario_id=user_id)\
-        .filter(Compra.finalizada.is_(True))\
-        .order_by(Compra.data_compra.desc())\
-        .all()
-    return jsonify([_serialize_compra(c, include_itens=False) for c in compras]), 200
+def exportar_historico():
+    """Exporta todo o histórico do usuário em streaming: '?format=ndjson' (padrão) ou '?format=csv'."""
+    user_id = current_user.id
+    formato = request.args.get('format', 'ndjson').lower()
+    if formato == 'csv':
+        gerador, mimetype = _gerar_csv, 'text/csv'
+    elif formato == 'ndjson':
+        gerador, mimetype = _gerar_ndjson, 'application/x-ndjson'
+    else:
+        return jsonify({"error": "Parâmetro 'format' deve ser 'ndjson' ou 'csv'"}), 400
+
+    # A consulta é criada dentro do gerador, para usar a sessão do contexto do streaming
+    # (que é encerrada ao final da resposta) e não a da view, já removida.
+    corpo = stream_with_context(gerador(user_id))
+    return Response(corpo, mimetype=mimetype, headers={
+        "Content-Disposition": f"attachment; filename=historico.{formato}",
+    })
 
 
 @history_bp.route('/<int:compra_id>', methods=['GET'])
 @jwt_required()
 def detalhar_compra(compra_id: int):
-    user_id = int(get_jwt_identity())
-    compra = Compra.query.get(compra_id)
+    """
+    Compra finalizada com seus itens. A compra e a versão do histórico do dono vêm numa
+    só linha; com If-None-Match conferindo, responde 304 sem consultar os itens. Sem
+    max-age: itens ainda podem mudar depois de finalizar (a versão do histórico muda junto).
+    """
+    user_id = current_user.id
+    compra = db.session.query(*COMPRA_COLUNAS, Compra.usuario_id, Usuario.versao_historico)\
+        .join(Usuario, Usuario.id == Compra.usuario_id)\
+        .filter(Compra.id == compra_id).first()
     if not compra:
         return jsonify({"error": "Compra não encontrada"}), 404
     if compra.usuario_id != user_id:
@@ -60,14 +165,19 @@ def detalhar_compra(compra_id: int):
     if not compra.finalizada:
         return jsonify({"error": "Compra não está finalizada"}), 400
 
-    return jsonify(_serialize_compra(compra, include_itens=True)), 200
+    etag = calcular_etag('compra', compra.id, compra.versao_historico)
+    return responder_condicional(
+        etag,
+        lambda: (jsonify(serialize_compra(compra, itens=_itens_da_compra(compra.id))), 200),
+        CACHE_REVALIDAR,
+    )
 
 
 @history_bp.route('/compare', methods=['GET'])
 @jwt_required()
 def comparar():
     """RF10: Compara duas compras finalizadas do usuário logado."""
-    user_id = int(get_jwt_identity())
+    user_id = current_user.id
     a = request.args.get('a')
     b = request.args.get('b')
     if not a or not b:
@@ -90,4 +200,46 @@ def comparar():
         return jsonify({"error": "Apenas compras finalizadas podem ser comparadas"}), 400
 
     relatorio = comparar_compras(compra_a, compra_b)
-    return jsonify(relatorio), 200
\ No newline at end of file
+    return jsonify(relatorio), 200
+
+
+@history_bp.route('/trend', methods=['GET'])
+@jwt_required()
+def tendencia_precos():
+    """
+    Matriz de preços entre N compras finalizadas do usuário, em ordem cronológica.
+    Use '?ids=1,2,3' para compras específicas ou '?last=N' para as N mais recentes (padrão 10).
+    """
+    user_id = current_user.id
+    maximo = current_app.config.get('HISTORY_TREND_MAX', 50)
+    ids_raw = request.args.get('ids')
+    try:
+        if ids_raw:
+            ids = list(dict.fromkeys(int(i) for i in ids_raw.split(',') if i.strip()))
+        else:
+            last = int(request.args.get('last', 10))
+    except ValueError:
+        return jsonify({"error": "Parâmetros 'ids' e 'last' devem ser inteiros"}), 400
+
+    if ids_raw:
+        if len(ids) < 2 or len(ids) > maximo:
+            return jsonify({"error": f"Informe entre 2 e {maximo} compras em 'ids'"}), 400
+        compras = Compra.query.filter(Compra.id.in_(ids)).all()
+        if len(compras) != len(ids):
+            return jsonify({"error": "Compra não encontrada"}), 404
+        if any(c.usuario_id != user_id for c in compras):
+            return jsonify({"error": "Acesso negado às compras informadas"}), 403
+        if not all(c.finalizada for c in compras):
+            return jsonify({"error": "Apenas compras finalizadas podem ser comparadas"}), 400
+    else:
+        if last < 1 or last > maximo:
+            return jsonify({"error": f"Parâmetro 'last' deve estar entre 1 e {maximo}"}), 400
+        compras = Compra.query\
+            .filter_by(usuario_id=user_id)\
+            .filter(Compra.finalizada.is_(True))\
+            .order_by(Compra.data_compra.desc(), Compra.id.desc())\
+            .limit(last)\
+            .all()
+
+    compras.sort(key=lambda c: (c.data_compra, c.id))
+    return jsonify(comparar_varias_compras(compras)), 200
\ No newline at end of file
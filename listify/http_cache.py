@@ -0,0 +1,76 @@
+"""
+GET condicional (ETag fraco + If-None-Match) para as leituras que os clientes
+consultam em polling.
+
+As ETags vêm de contadores de versão por usuário (usuario.versao_listas e
+usuario.versao_historico), incrementados na mesma transação de cada escrita que
+altera as respostas correspondentes. Assim a checagem custa uma leitura por chave
+primária e o 304 sai sem montar (nem consultar) o payload.
+"""
+import hashlib
+from typing import Callable, Mapping
+
+from flask import current_app, make_response, request
+from sqlalchemy import update
+from werkzeug.http import parse_etags
+
+from listify import db
+from listify.models import Compra, Usuario
+
+CACHE_REVALIDAR = 'private, no-cache'
+
+
+def calcular_etag(*partes, args: Mapping[str, str] = None) -> str:
+    """Tag opaca (sem aspas) das partes e da query string normalizada (limit, cursor etc.)."""
+    texto = ':'.join(str(p) for p in partes)
+    if args:
+        texto += '?' + '&'.join(f'{k}={v}' for k, v in sorted(args.items()))
+    return hashlib.blake2b(texto.encode('utf-8'), digest_size=10).hexdigest()
+
+
+def etag_confere(if_none_match: str, etag: str) -> bool:
+    """If-None-Match compara ETags de forma fraca (RFC 9110 §13.1.2)."""
+    return bool(if_none_match) and parse_etags(if_none_match).contains_weak(etag)
+
+
+# --- contadores de versão ---
+def ler_versao(user_id: int, coluna) -> int:
+    return db.session.query(coluna).filter(Usuario.id == user_id).scalar() or 0
+
+
+def incrementar_versao(user_id: int, coluna) -> int:
+    """
+    Invalida as ETags do usuário e retorna a nova versão (usada também para marcar as
+    linhas alteradas no sync de listas); chame antes do commit da escrita.
+    """
+    return db.session.execute(
+        update(Usuario).where(Usuario.id == user_id).values({coluna.key: coluna + 1}).returning(coluna),
+        execution_options={"synchronize_session": False},
+    ).scalar_one()
+
+
+def incrementar_versao_historico_das_compras(compra_ids) -> None:
+    """Versão do histórico dos donos das compras informadas (ex.: reconciliação de totais)."""
+    donos = db.session.query(Compra.usuario_id).filter(Compra.id.in_(compra_ids)).distinct().scalar_subquery()
+    db.session.execute(
+        update(Usuario).where(Usuario.id.in_(donos))
+        .values(versao_historico=Usuario.versao_historico + 1),
+        execution_options={"synchronize_session": False},
+    )
+
+
+# --- resposta ---
+def responder_condicional(etag: str, gerar: Callable, cache_control: str = CACHE_REVALIDAR):
+    """
+    304 se o If-None-Match do cliente conferir com `etag`; senão chama `gerar()`
+    (o retorno usual de uma view). Respostas 200 recebem ETag e Cache-Control.
+    """
+    if etag_confere(request.headers.get('If-None-Match'), etag):
+        resposta = current_app.response_class(status=304)
+    else:
+        resposta = make_response(gerar())
+        if resposta.status_code != 200:
+            return resposta
+    resposta.set_etag(etag, weak=True)
+    resposta.headers['Cache-Control'] = cache_control
+    return resposta
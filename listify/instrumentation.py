@@ -0,0 +1,46 @@
+from contextlib import contextmanager
+from typing import List
+from sqlalchemy import event
+from listify import db
+
+
+class ContadorConsultas:
+    """Acumula os comandos SQL executados enquanto está registrado no engine."""
+
+    def __init__(self):
+        self.statements: List[str] = []
+
+    @property
+    def total(self) -> int:
+        return len(self.statements)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+@contextmanager
+def contar_consultas(engine=None):
+    """
+    Conta os comandos SQL emitidos no bloco (`c.total`, `c.statements`). Nos testes,
+    prefira `assert_max_consultas`, que falha listando os comandos executados:
+
+        with assert_max_consultas(3):
+            client.get('/lists', headers=h)
+    """
+    engine = engine or db.engine
+    contador = ContadorConsultas()
+    event.listen(engine, 'before_cursor_execute', contador._before_cursor_execute)
+    try:
+        yield contador
+    finally:
+        event.remove(engine, 'before_cursor_execute', contador._before_cursor_execute)
+
+
+@contextmanager
+def assert_max_consultas(maximo: int, engine=None):
+    """Falha com AssertionError se o bloco emitir mais de `maximo` comandos SQL (pega regressões N+1)."""
+    with contar_consultas(engine) as contador:
+        yield contador
+    if contador.total > maximo:
+        detalhes = "\n".join(f"  {i + 1}. {s}" for i, s in enumerate(contador.statements))
+        raise AssertionError(f"Esperado no máximo {maximo} consultas SQL, executadas {contador.total}:\n{detalhes}")
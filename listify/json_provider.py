@@ -0,0 +1,69 @@
+import datetime
+import decimal
+import logging
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende do ambiente
+    orjson = None
+
+logger = logging.getLogger("listify")
+
+
+class ListifyJSONProvider(DefaultJSONProvider):
+    """
+    Provider padrão (json da stdlib) com os tipos do banco: Decimal vira número e
+    date/datetime vira ISO 8601 (mesmo formato de isoformat()), para que os
+    serializadores possam devolver os valores como vêm das colunas.
+    """
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, decimal.Decimal):
+            return float(o)
+        if isinstance(o, datetime.date):
+            return o.isoformat()
+        return DefaultJSONProvider.default(o)
+
+
+def _orjson_default(o):
+    if isinstance(o, decimal.Decimal):
+        return float(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(ListifyJSONProvider):
+    """
+    Provider com orjson: serializa datetime nativamente e Decimal via default, gerando
+    bytes direto na resposta. Chaves ordenadas e não-string aceitas, como no provider
+    padrão; chamadas com opções da stdlib (indent etc.) usam o provider padrão.
+    """
+
+    option = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=_orjson_default, option=self.option).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        corpo = orjson.dumps(obj, default=_orjson_default, option=self.option | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(corpo, mimetype=self.mimetype)
+
+
+def criar_json_provider(app):
+    """JSON_PROVIDER=orjson (padrão, se instalado) ou 'default' (stdlib)."""
+    tipo = (app.config.get('JSON_PROVIDER') or 'orjson').lower()
+    if tipo == 'orjson':
+        if orjson is not None:
+            return OrjsonProvider(app)
+        logger.warning("JSON_PROVIDER=orjson, mas o pacote 'orjson' não está instalado; usando json da stdlib")
+    return ListifyJSONProvider(app)
@@ -2,4 +2,4 @@ from flask import Blueprint
 
 lists_bp = Blueprint('lists', __name__)
 
-from . import routes
\ No newline at end of file
+from . import routes, commands
\ No newline at end of file
@@ -0,0 +1,11 @@
+import click
+from flask import current_app
+from . import lists_bp
+from listify.lists.sync import expurgar_remocoes
+
+
+@lists_bp.cli.command('prune-tombstones')
+def prune_tombstones():
+    """Remove registros de exclusão do sync mais antigos que SYNC_TOMBSTONE_RETENTION_DAYS."""
+    dias = current_app.config.get('SYNC_TOMBSTONE_RETENTION_DAYS', 30)
+    click.echo(f'{expurgar_remocoes(dias)} registro(s) de exclusão removido(s).')
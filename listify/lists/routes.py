@@ -1,30 +1,55 @@
-from flask import jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import current_app, jsonify, request
+from flask_jwt_extended import current_user, jwt_required
+import datetime
+from sqlalchemy import delete, insert, update
 from listify import db
-from listify.models import ListaDeCompras, ItemDaLista
+from listify.models import ListaDeCompras, ItemDaLista, Usuario
 from . import lists_bp
 from marshmallow import ValidationError
-from listify.schemas import ListaCreateSchema, ItemDaListaCreateSchema, ItemDaListaUpdateSchema
+from listify.schemas import (
+    ListaCreateSchema, ItemDaListaCreateSchema, ItemDaListaUpdateSchema, ItemDaListaLoteUpdateSchema,
+)
+from listify.pagination import paginacao_ativa, ler_parametros_paginacao, paginar_keyset
+from listify.http_cache import calcular_etag, incrementar_versao, ler_versao, responder_condicional
+from listify.lists.sync import (
+    TokenExpirado, coletar_alteracoes, decodificar_token, registrar_remocao, registrar_remocoes_itens,
+)
+from listify.serializers import (
+    ITEM_LISTA_COLUNAS, LISTA_COLUNAS, agrupar_itens_lista, serialize_item_lista, serialize_lista,
+)
 
 
-def _serialize_item(item: ItemDaLista):
-    return {
-        "id": item.id,
-        "descricao_item": item.descricao_item,
-        "concluido": bool(item.concluido),
-    }
+def _serializar_listas(listas, lote: int = 500):
+    """Itens de todas as listas em consultas de colunas por lote de ids (sem N+1 nem objetos ORM)."""
+    ids = [l.id for l in listas]
+    itens = {}
+    for i in range(0, len(ids), lote):
+        itens.update(agrupar_itens_lista(
+            db.session.query(*ITEM_LISTA_COLUNAS)
+            .filter(ItemDaLista.lista_id.in_(ids[i:i + lote]))
+            .order_by(ItemDaLista.id)
+        ))
+    return [serialize_lista(l, itens.get(l.id, [])) for l in listas]
 
 
-def _serialize_lista(lista: ListaDeCompras, include_itens: bool = True):
-    data = {
-        "id": lista.id,
-        "nome": lista.nome,
-        "data_criacao": lista.data_criacao.isoformat() if lista.data_criacao else None,
-    }
-    if include_itens:
-        # lazy=True, então podemos acessar lista.itens
-        data["itens"] = [_serialize_item(i) for i in lista.itens]
-    return data
+def _aplicar_alias_descricao(dados_raw):
+    if isinstance(dados_raw, dict):
+        # aceita alias 'descricao' para conveniência
+        if 'descricao_item' not in dados_raw and 'descricao' in dados_raw:
+            dados_raw['descricao_item'] = dados_raw['descricao']
+        # remover o alias para evitar erro de 'Unknown field' do Marshmallow
+        dados_raw.pop('descricao', None)
+    return dados_raw
+
+
+def _dono_da_lista(lista_id: int):
+    """(resposta de erro, None) se a lista não existe ou é de outro usuário; (None, usuario_id) se ok."""
+    dono = db.session.query(ListaDeCompras.usuario_id).filter(ListaDeCompras.id == lista_id).scalar()
+    if dono is None:
+        return (jsonify({"error": "Lista não encontrada"}), 404), None
+    if dono != current_user.id:
+        return (jsonify({"error": "Acesso negado à lista"}), 403), None
+    return None, dono
 
 
 @lists_bp.route('', methods=['POST'])
@@ -36,25 +61,67 @@ def criar_lista():
         return jsonify({"error": "validation_error", "details": err.messages}), 400
     nome = dados['nome']
 
-    user_id = int(get_jwt_identity())
-    lista = ListaDeCompras(nome=nome, usuario_id=user_id)
+    user_id = current_user.id
+    versao = incrementar_versao(user_id, Usuario.versao_listas)
+    lista = ListaDeCompras(nome=nome, usuario_id=user_id, versao=versao)
     db.session.add(lista)
     db.session.commit()
-    return jsonify(_serialize_lista(lista)), 201
+    return jsonify(serialize_lista(lista, itens=[])), 201
 
 
 @lists_bp.route('', methods=['GET'])
 @jwt_required()
 def listar_listas():
-    user_id = int(get_jwt_identity())
-    listas = ListaDeCompras.query.filter_by(usuario_id=user_id).order_by(ListaDeCompras.data_criacao.desc()).all()
-    return jsonify([_serialize_lista(l) for l in listas]), 200
+    """
+    Lista as listas do usuário, paginadas por cursor (data_criacao, id). '?paginate=false' devolve tudo.
+    Responde 304 quando o If-None-Match confere com a versão atual das listas do usuário.
+    """
+    user_id = current_user.id
+    etag = calcular_etag('lists', user_id, ler_versao(user_id, Usuario.versao_listas), args=request.args)
+    return responder_condicional(etag, lambda: _listar_listas(user_id))
+
+
+def _listar_listas(user_id: int):
+    query = db.session.query(*LISTA_COLUNAS).filter(ListaDeCompras.usuario_id == user_id)
+    if not paginacao_ativa():
+        listas = query.order_by(ListaDeCompras.data_criacao.desc()).all()
+        return jsonify(_serializar_listas(listas)), 200
+
+    try:
+        limit, cursor = ler_parametros_paginacao()
+    except ValueError as err:
+        return jsonify({"error": str(err)}), 400
+    listas, next_cursor = paginar_keyset(query, ListaDeCompras.data_criacao, ListaDeCompras.id, limit, cursor)
+    return jsonify({"itens": _serializar_listas(listas), "next_cursor": next_cursor}), 200
+
+
+@lists_bp.route('/sync', methods=['GET'])
+@jwt_required()
+def sincronizar_listas():
+    """
+    Sync incremental: listas e itens criados/alterados e ids excluídos desde '?since=<token>'.
+    Sem 'since', devolve o estado completo. Guarde o 'token' da resposta para o próximo sync.
+    """
+    user_id = current_user.id
+    since = request.args.get('since')
+    desde = None
+    if since:
+        try:
+            desde = decodificar_token(since, user_id, current_app.config.get('SYNC_TOMBSTONE_RETENTION_DAYS', 30))
+        except ValueError as err:
+            return jsonify({"error": str(err)}), 400
+        except TokenExpirado:
+            return jsonify({
+                "error": "sync_token_expired",
+                "message": "Token de sync expirado; refaça o sync completo (sem 'since')",
+            }), 410
+    return jsonify(coletar_alteracoes(user_id, desde)), 200
 
 
 @lists_bp.route('/<int:lista_id>/items', methods=['POST'])
 @jwt_required()
 def adicionar_item(lista_id: int):
-    user_id = int(get_jwt_identity())
+    user_id = current_user.id
     lista = ListaDeCompras.query.get(lista_id)
     if not lista:
         return jsonify({"error": "Lista não encontrada"}), 404
@@ -62,27 +129,127 @@ def adicionar_item(lista_id: int):
         return jsonify({"error": "Acesso negado à lista"}), 403
 
     try:
-        dados_raw = request.get_json() or {}
-        # aceita alias 'descricao' para conveniência
-        if 'descricao_item' not in dados_raw and 'descricao' in dados_raw:
-            dados_raw['descricao_item'] = dados_raw['descricao']
-        # remover o alias para evitar erro de 'Unknown field' do Marshmallow
-        dados_raw.pop('descricao', None)
-        dados = ItemDaListaCreateSchema().load(dados_raw)
+        dados = ItemDaListaCreateSchema().load(_aplicar_alias_descricao(request.get_json() or {}))
     except ValidationError as err:
         return jsonify({"error": "validation_error", "details": err.messages}), 400
     descricao = dados['descricao_item']
 
-    item = ItemDaLista(lista_id=lista.id, descricao_item=descricao, concluido=False)
+    versao = incrementar_versao(user_id, Usuario.versao_listas)
+    item = ItemDaLista(lista_id=lista.id, descricao_item=descricao, concluido=False, versao=versao)
     db.session.add(item)
     db.session.commit()
-    return jsonify(_serialize_item(item)), 201
+    return jsonify(serialize_item_lista(item)), 201
+
+
+@lists_bp.route('/<int:lista_id>/items/batch', methods=['POST'])
+@jwt_required()
+def adicionar_itens_lote(lista_id: int):
+    """
+    Adiciona vários itens à lista ('{"itens": [{"descricao_item": ...}, ...]}') num único
+    INSERT. Tudo ou nada: qualquer item inválido rejeita o lote, com erros por posição.
+    """
+    erro, user_id = _dono_da_lista(lista_id)
+    if erro:
+        return erro
+
+    corpo = request.get_json(silent=True)
+    dados_raw = corpo.get('itens') if isinstance(corpo, dict) else None
+    if not isinstance(dados_raw, list) or not dados_raw:
+        return jsonify({"error": "Campo 'itens' deve ser uma lista não vazia"}), 400
+    limite = current_app.config.get('LISTS_BATCH_MAX_ITEMS', 500)
+    if len(dados_raw) > limite:
+        return jsonify({"error": f"Lote excede o limite de {limite} itens"}), 400
+    try:
+        itens = ItemDaListaCreateSchema(many=True).load([_aplicar_alias_descricao(d) for d in dados_raw])
+    except ValidationError as err:
+        return jsonify({"error": "validation_error", "details": err.messages}), 400
+
+    versao = incrementar_versao(user_id, Usuario.versao_listas)
+    agora = datetime.datetime.utcnow()
+    linhas = [
+        {"lista_id": lista_id, "descricao_item": d['descricao_item'], "concluido": False,
+         "versao": versao, "data_atualizacao": agora}
+        for d in itens
+    ]
+    item_ids = list(db.session.scalars(
+        insert(ItemDaLista).returning(ItemDaLista.id, sort_by_parameter_order=True), linhas
+    ))
+    db.session.commit()
+    return jsonify({
+        "lista_id": lista_id,
+        "itens": [
+            {"id": item_id, "descricao_item": linha["descricao_item"], "concluido": False}
+            for item_id, linha in zip(item_ids, linhas)
+        ],
+    }), 201
+
+
+@lists_bp.route('/items/batch', methods=['PATCH'])
+@jwt_required()
+def atualizar_itens_lote():
+    """
+    Define 'concluido' em vários itens ('{"ids": [...], "concluido": true}'). Uma consulta
+    confere existência e dono de todos os ids; um único UPDATE ... WHERE id IN aplica.
+    """
+    user_id = current_user.id
+    try:
+        dados = ItemDaListaLoteUpdateSchema().load(request.get_json(silent=True) or {})
+    except ValidationError as err:
+        return jsonify({"error": "validation_error", "details": err.messages}), 400
+    ids = list(dict.fromkeys(dados['ids']))
+    limite = current_app.config.get('LISTS_BATCH_MAX_ITEMS', 500)
+    if len(ids) > limite:
+        return jsonify({"error": f"Lote excede o limite de {limite} itens"}), 400
+
+    donos = dict(
+        db.session.query(ItemDaLista.id, ListaDeCompras.usuario_id)
+        .join(ListaDeCompras, ListaDeCompras.id == ItemDaLista.lista_id)
+        .filter(ItemDaLista.id.in_(ids))
+    )
+    faltando = [i for i in ids if i not in donos]
+    if faltando:
+        return jsonify({"error": "Item não encontrado", "ids": faltando}), 404
+    if any(dono != user_id for dono in donos.values()):
+        return jsonify({"error": "Acesso negado à lista"}), 403
+
+    versao = incrementar_versao(user_id, Usuario.versao_listas)
+    db.session.execute(
+        update(ItemDaLista).where(ItemDaLista.id.in_(ids))
+        .values(concluido=dados['concluido'], versao=versao, data_atualizacao=datetime.datetime.utcnow()),
+        execution_options={"synchronize_session": False},
+    )
+    db.session.commit()
+    return jsonify({"ids": ids, "concluido": dados['concluido'], "atualizados": len(ids)}), 200
+
+
+@lists_bp.route('/<int:lista_id>/items/completed', methods=['DELETE'])
+@jwt_required()
+def excluir_itens_concluidos(lista_id: int):
+    """Exclui todos os itens concluídos da lista num único DELETE (com tombstones para o sync)."""
+    erro, user_id = _dono_da_lista(lista_id)
+    if erro:
+        return erro
+
+    versao = incrementar_versao(user_id, Usuario.versao_listas)
+    item_ids = list(db.session.scalars(
+        delete(ItemDaLista)
+        .where(ItemDaLista.lista_id == lista_id, ItemDaLista.concluido.is_(True))
+        .returning(ItemDaLista.id),
+        execution_options={"synchronize_session": False},
+    ))
+    if not item_ids:
+        # Nada a excluir: descarta o incremento de versão (ETag e sync continuam válidos)
+        db.session.rollback()
+    else:
+        registrar_remocoes_itens(user_id, lista_id, item_ids, versao)
+        db.session.commit()
+    return jsonify({"message": "Itens concluídos excluídos", "ids": sorted(item_ids), "excluidos": len(item_ids)}), 200
 
 
 @lists_bp.route('/items/<int:item_id>', methods=['PUT'])
 @jwt_required()
 def concluir_item(item_id: int):
-    user_id = int(get_jwt_identity())
+    user_id = current_user.id
     item = ItemDaLista.query.get(item_id)
     if not item:
         return jsonify({"error": "Item não encontrado"}), 404
@@ -94,15 +261,16 @@ def concluir_item(item_id: int):
         return jsonify({"error": "Acesso negado à lista"}), 403
 
     item.concluido = True
+    item.versao = incrementar_versao(user_id, Usuario.versao_listas)
     db.session.commit()
-    return jsonify(_serialize_item(item)), 200
+    return jsonify(serialize_item_lista(item)), 200
 
 
 @lists_bp.route('/items/<int:item_id>', methods=['PATCH'])
 @jwt_required()
 def atualizar_item(item_id: int):
     """Atualiza propriedades do ItemDaLista. Atualmente suporta 'concluido' booleano."""
-    user_id = int(get_jwt_identity())
+    user_id = current_user.id
     item = ItemDaLista.query.get(item_id)
     if not item:
         return jsonify({"error": "Item não encontrado"}), 404
@@ -119,15 +287,16 @@ def atualizar_item(item_id: int):
         return jsonify({"error": "validation_error", "details": err.messages}), 400
 
     item.concluido = bool(dados.get('concluido'))
+    item.versao = incrementar_versao(user_id, Usuario.versao_listas)
     db.session.commit()
-    return jsonify(_serialize_item(item)), 200
+    return jsonify(serialize_item_lista(item)), 200
 
 
 @lists_bp.route('/items/<int:item_id>', methods=['DELETE'])
 @jwt_required()
 def excluir_item(item_id: int):
     """Exclui um item específico da lista do usuário logado."""
-    user_id = int(get_jwt_identity())
+    user_id = current_user.id
     item = ItemDaLista.query.get(item_id)
     if not item:
         return jsonify({"error": "Item não encontrado"}), 404
@@ -138,6 +307,8 @@ def excluir_item(item_id: int):
     if lista.usuario_id != user_id:
         return jsonify({"error": "Acesso negado à lista"}), 403
 
+    versao = incrementar_versao(user_id, Usuario.versao_listas)
+    registrar_remocao(user_id, 'item', item.id, lista.id, versao)
     db.session.delete(item)
     db.session.commit()
     return jsonify({"message": "Item excluído"}), 200
@@ -146,14 +317,17 @@ def excluir_item(item_id: int):
 @lists_bp.route('/<int:lista_id>', methods=['DELETE'])
 @jwt_required()
 def excluir_lista(lista_id: int):
-    user_id = int(get_jwt_identity())
+    user_id = current_user.id
     lista = ListaDeCompras.query.get(lista_id)
     if not lista:
         return jsonify({"error": "Lista não encontrada"}), 404
     if lista.usuario_id != user_id:
         return jsonify({"error": "Acesso negado à lista"}), 403
 
-    # Remover itens explicitamente para evitar FK issues
+    # Remover itens explicitamente para evitar FK issues.
+    # O tombstone da lista basta para o sync: o cliente descarta os itens junto.
+    versao = incrementar_versao(user_id, Usuario.versao_listas)
+    registrar_remocao(user_id, 'lista', lista.id, lista.id, versao)
     ItemDaLista.query.filter_by(lista_id=lista.id).delete()
     db.session.delete(lista)
     db.session.commit()
@@ -0,0 +1,110 @@
+"""
+Sync incremental das listas (GET /lists/sync).
+
+Cada escrita em listas/itens incrementa usuario.versao_listas e grava o novo valor
+na coluna `versao` das linhas alteradas (ou num tombstone em remocao_lista, nas
+exclusões). O token devolvido ao cliente carrega a versão lida no início do sync; o
+próximo sync busca só as linhas com versao maior, pelos índices (usuario_id, versao)
+e (lista_id, versao), então o custo acompanha o volume de mudanças.
+"""
+import base64
+import binascii
+import datetime
+import json
+import time
+from typing import Optional
+
+from sqlalchemy import insert
+
+from listify import db
+from listify.models import ItemDaLista, ListaDeCompras, RemocaoLista, Usuario
+from listify.serializers import ITEM_LISTA_COLUNAS, LISTA_COLUNAS, serialize_item_lista
+
+
+class TokenExpirado(Exception):
+    pass
+
+
+def codificar_token(user_id: int, versao: int) -> str:
+    raw = json.dumps([user_id, versao, int(time.time())]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decodificar_token(token: str, user_id: int, retencao_dias: int) -> int:
+    """
+    Versão contida no token. ValueError se inválido ou de outro usuário; TokenExpirado se
+    mais antigo que a retenção dos tombstones (exclusões anteriores já podem ter sido expurgadas).
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        dono, versao, emitido_em = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        dono, versao, emitido_em = int(dono), int(versao), int(emitido_em)
+    except (binascii.Error, ValueError, TypeError, UnicodeError):
+        raise ValueError("Parâmetro 'since' inválido")
+    if dono != user_id or versao < 0:
+        raise ValueError("Parâmetro 'since' inválido")
+    if time.time() - emitido_em > retencao_dias * 86400:
+        raise TokenExpirado()
+    return versao
+
+
+def _serializar_item(linha) -> dict:
+    data = serialize_item_lista(linha)
+    data["lista_id"] = linha.lista_id
+    return data
+
+
+def coletar_alteracoes(user_id: int, desde: Optional[int]) -> dict:
+    """
+    Listas e itens criados/alterados e exclusões com versao > desde. Sem `desde`,
+    devolve o estado completo (sem tombstones) e o token para os próximos syncs.
+    """
+    # A versão é lida antes das linhas: uma escrita concorrente pode aparecer agora e
+    # de novo no próximo sync (aplicação idempotente no cliente), mas nunca se perde.
+    versao = db.session.query(Usuario.versao_listas).filter(Usuario.id == user_id).scalar() or 0
+
+    listas = db.session.query(*LISTA_COLUNAS).filter(ListaDeCompras.usuario_id == user_id)
+    itens = db.session.query(*ITEM_LISTA_COLUNAS)\
+        .join(ListaDeCompras, ListaDeCompras.id == ItemDaLista.lista_id)\
+        .filter(ListaDeCompras.usuario_id == user_id)
+    removidos = {"listas": [], "itens": []}
+    if desde is not None:
+        listas = listas.filter(ListaDeCompras.versao > desde)
+        itens = itens.filter(ItemDaLista.versao > desde)
+        remocoes = db.session.query(RemocaoLista.tipo, RemocaoLista.objeto_id)\
+            .filter(RemocaoLista.usuario_id == user_id, RemocaoLista.versao > desde)\
+            .order_by(RemocaoLista.versao)
+        for tipo, objeto_id in remocoes:
+            removidos["listas" if tipo == 'lista' else "itens"].append(objeto_id)
+
+    return {
+        "listas": [
+            {"id": l.id, "nome": l.nome, "data_criacao": l.data_criacao}
+            for l in listas.order_by(ListaDeCompras.id)
+        ],
+        "itens": [_serializar_item(i) for i in itens.order_by(ItemDaLista.id)],
+        "removidos": removidos,
+        "completo": desde is None,
+        "token": codificar_token(user_id, versao),
+    }
+
+
+def registrar_remocao(user_id: int, tipo: str, objeto_id: int, lista_id: int, versao: int) -> None:
+    db.session.add(RemocaoLista(usuario_id=user_id, tipo=tipo, objeto_id=objeto_id, lista_id=lista_id, versao=versao))
+
+
+def registrar_remocoes_itens(user_id: int, lista_id: int, item_ids, versao: int) -> None:
+    """Tombstones de vários itens da mesma lista num único INSERT (executemany)."""
+    if item_ids:
+        db.session.execute(insert(RemocaoLista), [
+            {"usuario_id": user_id, "tipo": 'item', "objeto_id": item_id, "lista_id": lista_id, "versao": versao}
+            for item_id in item_ids
+        ])
+
+
+def expurgar_remocoes(retencao_dias: int) -> int:
+    """Apaga tombstones mais antigos que a retenção; tokens dessa idade já respondem 410."""
+    limite = datetime.datetime.utcnow() - datetime.timedelta(days=retencao_dias)
+    apagados = RemocaoLista.query.filter(RemocaoLista.data_remocao < limite).delete(synchronize_session=False)
+    db.session.commit()
+    return apagados
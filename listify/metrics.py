@@ -0,0 +1,184 @@
+"""
+Métricas no formato Prometheus (GET /metrics).
+
+Com vários workers do gunicorn, defina PROMETHEUS_MULTIPROC_DIR (um diretório vazio,
+limpo a cada deploy) antes de iniciar o servidor: cada processo grava seus valores
+nesse diretório e o /metrics de qualquer worker agrega todos. O gunicorn.conf.py da
+raiz marca os workers encerrados para que seus gauges deixem de ser somados.
+
+A rota exige `Authorization: Bearer <METRICS_TOKEN>` (o bearer_token do Prometheus) ou o
+X-Admin-Token; sem nenhum dos dois configurados, responde 403.
+"""
+import hmac
+import os
+import time
+
+from flask import Response, current_app, g, has_request_context, jsonify, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest,
+)
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from listify import db_pool
+
+REQUEST_LATENCY = Histogram(
+    'listify_http_request_duration_seconds', 'Latência das requisições HTTP',
+    ['blueprint', 'route', 'method', 'status'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    'listify_http_requests_in_progress', 'Requisições HTTP em andamento',
+    ['blueprint', 'route', 'method'], multiprocess_mode='livesum',
+)
+DB_QUERIES = Histogram(
+    'listify_db_queries_per_request', 'Comandos SQL executados por requisição',
+    ['blueprint', 'route'], buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+DB_TIME = Histogram(
+    'listify_db_query_seconds_per_request', 'Tempo total em SQL por requisição',
+    ['blueprint', 'route'], buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+BCRYPT_TIME = Histogram(
+    'listify_bcrypt_duration_seconds', 'Duração de hash/verificação bcrypt (inclui espera no pool)',
+    ['operation'], buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.0, 5.0),
+)
+DB_POOL_WAIT = Histogram(
+    'listify_db_pool_wait_seconds', 'Espera por uma conexão do pool',
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+DB_POOL_TIMEOUTS = Counter('listify_db_pool_timeouts', 'Checkouts do pool que esgotaram DB_POOL_TIMEOUT')
+DB_POOL_CHECKED_OUT = Gauge(
+    'listify_db_pool_checked_out', 'Conexões do pool em uso', multiprocess_mode='livesum',
+)
+
+
+def _antes_sql(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        conn.info.setdefault('listify_sql_inicio', []).append(time.perf_counter())
+
+
+def _depois_sql(conn, cursor, statement, parameters, context, executemany):
+    inicios = conn.info.get('listify_sql_inicio')
+    if not inicios:
+        return
+    inicio = inicios.pop()
+    if has_request_context() and 'listify_sql_total' in g:
+        g.listify_sql_total += 1
+        g.listify_sql_tempo += time.perf_counter() - inicio
+
+
+def _erro_sql(contexto):
+    # after_cursor_execute não dispara quando o comando falha
+    if contexto.connection is not None:
+        inicios = contexto.connection.info.get('listify_sql_inicio')
+        if inicios:
+            inicios.pop()
+
+
+def _observar_espera_pool(espera, timeout):
+    if timeout:
+        DB_POOL_TIMEOUTS.inc()
+    else:
+        DB_POOL_WAIT.observe(espera)
+
+
+def _observar_bcrypt(operacao, segundos):
+    BCRYPT_TIME.labels(operacao).observe(segundos)
+
+
+def _rotulos():
+    rota = request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+    return request.blueprint or '', rota
+
+
+class Metrics:
+    """Instrumenta requisições, SQL, bcrypt e o pool de conexões e expõe GET /metrics."""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if not app.config.get('METRICS_ENABLED', True):
+            return
+        if not event.contains(Engine, 'before_cursor_execute', _antes_sql):
+            event.listen(Engine, 'before_cursor_execute', _antes_sql)
+            event.listen(Engine, 'after_cursor_execute', _depois_sql)
+            event.listen(Engine, 'handle_error', _erro_sql)
+        if _observar_espera_pool not in db_pool.wait_observers:
+            db_pool.wait_observers.append(_observar_espera_pool)
+        hasher = app.extensions.get('password_hasher')
+        if hasher is not None and _observar_bcrypt not in hasher.observers:
+            hasher.observers.append(_observar_bcrypt)
+
+        app.before_request(self._inicio)
+        app.after_request(self._registrar)
+        app.teardown_request(self._fim)
+        app.add_url_rule('/metrics', 'metrics', self.expor)
+        app.extensions['metrics'] = self
+
+    @staticmethod
+    def _inicio():
+        if request.endpoint == 'metrics':
+            return
+        g.listify_metrics_gauge = REQUESTS_IN_PROGRESS.labels(*_rotulos(), request.method)
+        g.listify_metrics_gauge.inc()
+        g.listify_sql_total = 0
+        g.listify_sql_tempo = 0.0
+        g.listify_metrics_inicio = time.perf_counter()
+
+    @staticmethod
+    def _registrar(response):
+        inicio = g.pop('listify_metrics_inicio', None)
+        if inicio is None:
+            return response
+        blueprint, rota = _rotulos()
+        REQUEST_LATENCY.labels(blueprint, rota, request.method, str(response.status_code))\
+            .observe(time.perf_counter() - inicio)
+        DB_QUERIES.labels(blueprint, rota).observe(g.pop('listify_sql_total', 0))
+        DB_TIME.labels(blueprint, rota).observe(g.pop('listify_sql_tempo', 0.0))
+        pool = current_app.extensions['sqlalchemy'].engine.pool
+        if isinstance(pool, QueuePool):
+            DB_POOL_CHECKED_OUT.set(pool.checkedout())
+        return response
+
+    @staticmethod
+    def _fim(exc):
+        gauge = g.pop('listify_metrics_gauge', None)
+        if gauge is not None:
+            gauge.dec()
+
+    @staticmethod
+    def iniciar_externa(blueprint: str, rota: str, metodo: str) -> float:
+        """Início de uma requisição atendida fora do Flask (handlers async do modo ASGI)."""
+        REQUESTS_IN_PROGRESS.labels(blueprint, rota, metodo).inc()
+        return time.perf_counter()
+
+    @staticmethod
+    def registrar_externa(blueprint: str, rota: str, metodo: str, status: int, inicio: float) -> None:
+        REQUESTS_IN_PROGRESS.labels(blueprint, rota, metodo).dec()
+        REQUEST_LATENCY.labels(blueprint, rota, metodo, str(status)).observe(time.perf_counter() - inicio)
+
+    @staticmethod
+    def _autorizado() -> bool:
+        def confere(recebido, esperado):
+            return bool(esperado) and hmac.compare_digest(recebido.encode(), esperado.encode())
+
+        esquema, _, token = request.headers.get('Authorization', '').partition(' ')
+        if esquema.lower() == 'bearer' and confere(token, current_app.config.get('METRICS_TOKEN')):
+            return True
+        return confere(request.headers.get('X-Admin-Token', ''), current_app.config.get('ADMIN_TOKEN'))
+
+    @staticmethod
+    def expor():
+        if not Metrics._autorizado():
+            return jsonify({"error": "forbidden", "message": "Acesso negado"}), 403
+        if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = REGISTRY
+        return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
@@ -1,4 +1,4 @@
-from listify import db, bcrypt
+from listify import db, password_hasher
 import datetime
 
 # Modelo de Usuário [cite: 131]
@@ -9,6 +9,13 @@ class Usuario(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False) # RN02 [cite: 85]
     hash_senha = db.Column(db.String(128), nullable=False)
     data_cadastro = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+    # Contadores de versão para as ETags de /lists e /history (listify.http_cache)
+    versao_listas = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    versao_historico = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Versão dos tokens (claim 'tv'): incrementar revoga os tokens já emitidos (listify.tokens)
+    versao_token = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Quando a versão foi incrementada pela última vez: só revogações recentes ficam em cache
+    token_revogado_em = db.Column(db.DateTime, nullable=True, index=True)
 
     # Relacionamentos
     compras = db.relationship('Compra', backref='comprador', lazy=True)
@@ -16,10 +23,14 @@ class Usuario(db.Model):
 
     # Método para hashear a senha (RNF03) [cite: 76]
     def set_password(self, senha):
-        self.hash_senha = bcrypt.generate_password_hash(senha).decode('utf-8')
+        self.hash_senha = password_hasher.hash(senha)
 
     def check_password(self, senha):
-        return bcrypt.check_password_hash(self.hash_senha, senha)
+        return password_hasher.verify(self.hash_senha, senha)
+
+    def senha_precisa_rehash(self):
+        # Hash gerado com custo diferente do BCRYPT_LOG_ROUNDS atual
+        return password_hasher.needs_rehash(self.hash_senha)
 
 # Modelo de Produto [cite: 132]
 class Produto(db.Model):
@@ -29,6 +40,8 @@ class Produto(db.Model):
     nome = db.Column(db.String(200), nullable=False)
     marca = db.Column(db.String(100))
     data_criacao = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+    # Busca por nome/marca: índices GIN de expressão (tsvector e pg_trgm) só no PostgreSQL,
+    # criados pela migração f3a9c1d2b7e4 (ver listify/search.py)
 
 # Modelo de Compra [cite: 133]
 class Compra(db.Model):
@@ -41,14 +54,19 @@ class Compra(db.Model):
 
     itens = db.relationship('ItemDaCompra', backref='compra_associada', lazy=True)
 
+    # Histórico: WHERE usuario_id = ? AND finalizada ORDER BY data_compra DESC, id DESC (keyset)
+    __table_args__ = (
+        db.Index('ix_compra_usuario_finalizada_data', usuario_id, finalizada, data_compra.desc(), id.desc()),
+    )
+
 # Modelo de ItemDaCompra [cite: 134]
 class ItemDaCompra(db.Model):
     __tablename__ = 'item_da_compra'
     id = db.Column(db.Integer, primary_key=True)
     preco_pago = db.Column(db.Numeric(10, 2), nullable=False)
     quantidade = db.Column(db.Integer, nullable=False, default=1)
-    compra_id = db.Column(db.Integer, db.ForeignKey('compra.id'), nullable=False)
-    produto_id = db.Column(db.Integer, db.ForeignKey('produto.id'), nullable=False)
+    compra_id = db.Column(db.Integer, db.ForeignKey('compra.id'), nullable=False, index=True)
+    produto_id = db.Column(db.Integer, db.ForeignKey('produto.id'), nullable=False, index=True)
 
     # Relacionamento para acessar os dados do produto facilmente
     produto = db.relationship('Produto')
@@ -60,13 +78,99 @@ class ListaDeCompras(db.Model):
     nome = db.Column(db.String(100), nullable=False)
     data_criacao = db.Column(db.DateTime, default=datetime.datetime.utcnow)
     usuario_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), nullable=False)
+    # Valor de usuario.versao_listas na última escrita (sync incremental, /lists/sync)
+    versao = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    data_atualizacao = db.Column(db.DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
 
     itens = db.relationship('ItemDaLista', backref='lista_associada', lazy=True)
 
+    # Listas do usuário: WHERE usuario_id = ? ORDER BY data_criacao DESC, id DESC (keyset)
+    # Sync: WHERE usuario_id = ? AND versao > ?
+    __table_args__ = (
+        db.Index('ix_lista_de_compras_usuario_data', usuario_id, data_criacao.desc(), id.desc()),
+        db.Index('ix_lista_de_compras_usuario_versao', usuario_id, versao),
+    )
+
 # Modelo de ItemDaLista [cite: 136]
 class ItemDaLista(db.Model):
     __tablename__ = 'item_da_lista'
     id = db.Column(db.Integer, primary_key=True)
     descricao_item = db.Column(db.String(300), nullable=False)
     concluido = db.Column(db.Boolean, default=False)
-    lista_id = db.Column(db.Integer, db.ForeignKey('lista_de_compras.id'), nullable=False)
\ No newline at end of file
+    lista_id = db.Column(db.Integer, db.ForeignKey('lista_de_compras.id'), nullable=False, index=True)
+    versao = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    data_atualizacao = db.Column(db.DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+    # Sync: WHERE lista_id IN (listas do usuário) AND versao > ?
+    __table_args__ = (
+        db.Index('ix_item_da_lista_lista_versao', lista_id, versao),
+    )
+
+# Registro de exclusão (tombstone) de lista ou item, para o sync incremental de /lists/sync
+class RemocaoLista(db.Model):
+    __tablename__ = 'remocao_lista'
+    id = db.Column(db.Integer, primary_key=True)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), nullable=False)
+    tipo = db.Column(db.String(10), nullable=False)  # 'lista' ou 'item'
+    objeto_id = db.Column(db.Integer, nullable=False)
+    lista_id = db.Column(db.Integer, nullable=False)
+    versao = db.Column(db.Integer, nullable=False)
+    data_remocao = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_remocao_lista_usuario_versao', usuario_id, versao),
+        db.Index('ix_remocao_lista_data_remocao', data_remocao),
+    )
+
+# Token (jti) revogado antes de expirar (logout, rotação do refresh token); ver listify.tokens
+class TokenRevogado(db.Model):
+    __tablename__ = 'token_revogado'
+    # id crescente: sincronização incremental do filtro de Bloom de cada processo
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), nullable=False, unique=True)
+    # Expurgo dos tokens que já expiraram (flask auth prune-revoked-tokens)
+    expira_em = db.Column(db.DateTime, nullable=False, index=True)
+
+# Versão do catálogo (linha única): incrementada quando produtos existentes mudam no lugar
+# (importação), para que índices e caches de outros processos percebam a alteração
+class VersaoCatalogo(db.Model):
+    __tablename__ = 'versao_catalogo'
+    id = db.Column(db.Integer, primary_key=True)
+    versao = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+# Sessão de refresh token (claim 'sid'): a rotação troca jti_atual, sem passar pela lista de revogação
+class SessaoRefresh(db.Model):
+    __tablename__ = 'sessao_refresh'
+    id = db.Column(db.String(36), primary_key=True)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), nullable=False, index=True)
+    jti_atual = db.Column(db.String(36), nullable=False)
+    # Expurgo das sessões cujo último refresh expirou (flask auth prune-revoked-tokens)
+    expira_em = db.Column(db.DateTime, nullable=False, index=True)
+
+# Rollup diário de preços pagos por produto e usuário, mantido por finalizar_compra
+class PrecoProdutoDiario(db.Model):
+    __tablename__ = 'preco_produto_diario'
+    produto_id = db.Column(db.Integer, db.ForeignKey('produto.id'), primary_key=True)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), primary_key=True)
+    dia = db.Column(db.Date, primary_key=True)
+    preco_min = db.Column(db.Numeric(10, 2), nullable=False)
+    preco_max = db.Column(db.Numeric(10, 2), nullable=False)
+    valor_total = db.Column(db.Numeric(14, 2), nullable=False)  # soma de preco_pago * quantidade
+    quantidade = db.Column(db.Integer, nullable=False)
+
+# Resposta registrada de um lote de itens, para replays idempotentes (Idempotency-Key)
+class IdempotenciaLote(db.Model):
+    __tablename__ = 'idempotencia_lote'
+    id = db.Column(db.Integer, primary_key=True)
+    chave = db.Column(db.String(100), nullable=False)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), nullable=False)
+    compra_id = db.Column(db.Integer, db.ForeignKey('compra.id'), nullable=False)
+    status_code = db.Column(db.Integer, nullable=False)
+    resposta = db.Column(db.JSON, nullable=False)
+    data_criacao = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+
+    # Expurgo por idade (flask purchase prune-idempotency-keys)
+    __table_args__ = (
+        db.UniqueConstraint('usuario_id', 'chave'),
+        db.Index('ix_idempotencia_lote_data_criacao', data_criacao),
+    )
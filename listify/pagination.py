@@ -0,0 +1,89 @@
+import base64
+import binascii
+import datetime
+import json
+from typing import Optional, Tuple
+from flask import current_app, request
+from sqlalchemy import tuple_
+
+
+def paginacao_ativa() -> bool:
+    """Paginação por cursor é o padrão; '?paginate=false' mantém a resposta antiga (lista completa)."""
+    return request.args.get('paginate', 'true').lower() not in ('false', '0', 'no')
+
+
+def codificar_cursor(data: datetime.datetime, id_: int) -> str:
+    raw = json.dumps([data.isoformat() if data else None, id_]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(cursor: str) -> Tuple[datetime.datetime, int]:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        data, id_ = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.datetime.fromisoformat(data), int(id_)
+    except (binascii.Error, ValueError, TypeError, UnicodeError):
+        raise ValueError("Parâmetro 'cursor' inválido")
+
+
+def codificar_cursor_offset(offset: int) -> str:
+    """Cursor de posição, para listagens ordenadas por relevância (sem chave estável para keyset)."""
+    return base64.urlsafe_b64encode(json.dumps({"offset": offset}).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor_offset(cursor: str) -> int:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        offset = int(json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))["offset"])
+    except (binascii.Error, ValueError, TypeError, KeyError, UnicodeError):
+        raise ValueError("Parâmetro 'cursor' inválido")
+    if offset < 0:
+        raise ValueError("Parâmetro 'cursor' inválido")
+    return offset
+
+
+def parse_parametros_paginacao(args, padrao: int, maximo: int) -> Tuple[int, Optional[Tuple[datetime.datetime, int]]]:
+    """Valida 'limit' (limitado a `maximo`) e 'cursor' de um mapeamento de query string; ValueError se inválidos."""
+    try:
+        limit = int(args.get('limit', padrao))
+    except ValueError:
+        raise ValueError("Parâmetro 'limit' deve ser inteiro")
+    if limit < 1:
+        raise ValueError("Parâmetro 'limit' deve ser >= 1")
+    cursor = args.get('cursor')
+    return min(limit, maximo), (decodificar_cursor(cursor) if cursor else None)
+
+
+def ler_parametros_paginacao() -> Tuple[int, Optional[Tuple[datetime.datetime, int]]]:
+    """Lê 'limit' (limitado por PAGINATION_MAX_SIZE) e 'cursor' da requisição atual; ValueError se inválidos."""
+    return parse_parametros_paginacao(
+        request.args,
+        current_app.config.get('PAGINATION_DEFAULT_SIZE', 50),
+        current_app.config.get('PAGINATION_MAX_SIZE', 200),
+    )
+
+
+def aplicar_keyset(stmt, coluna_data, coluna_id, limit: int, cursor=None):
+    """Aplica filtro do cursor, ordenação (coluna_data DESC, coluna_id DESC) e limit+1 a um Query ou Select."""
+    if cursor:
+        stmt = stmt.where(tuple_(coluna_data, coluna_id) < tuple_(*cursor))
+    return stmt.order_by(coluna_data.desc(), coluna_id.desc()).limit(limit + 1)
+
+
+def proxima_pagina(linhas, coluna_data, coluna_id, limit: int):
+    """Corta a linha extra buscada por aplicar_keyset e retorna (linhas, next_cursor)."""
+    next_cursor = None
+    if len(linhas) > limit:
+        linhas = linhas[:limit]
+        ultima = linhas[-1]
+        next_cursor = codificar_cursor(getattr(ultima, coluna_data.key), getattr(ultima, coluna_id.key))
+    return linhas, next_cursor
+
+
+def paginar_keyset(query, coluna_data, coluna_id, limit: int, cursor=None):
+    """
+    Paginação keyset sobre (coluna_data DESC, coluna_id DESC).
+    Retorna (linhas, next_cursor); next_cursor é None na última página.
+    """
+    linhas = aplicar_keyset(query, coluna_data, coluna_id, limit, cursor).all()
+    return proxima_pagina(linhas, coluna_data, coluna_id, limit)
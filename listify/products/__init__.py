@@ -4,4 +4,4 @@ from flask import Blueprint
 products_bp = Blueprint('products', __name__)
 
 # Importa as rotas para registrar no blueprint
-from . import routes
\ No newline at end of file
+from . import routes, commands
\ No newline at end of file
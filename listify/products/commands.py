@@ -0,0 +1,51 @@
+import os
+
+import click
+from flask import current_app
+from . import products_bp
+from .importer import FORMATOS, detectar_formato, importar_produtos, ler_registros
+from listify.services import reconstruir_rollup_precos
+
+
+@products_bp.cli.command('rebuild-prices')
+def rebuild_prices():
+    """Reconstrói o rollup preco_produto_diario a partir das compras finalizadas."""
+    linhas = reconstruir_rollup_precos()
+    click.echo(f'Rollup de preços reconstruído: {linhas} linha(s).')
+
+
+@products_bp.cli.command('import')
+@click.argument('arquivo', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'formato', type=click.Choice(FORMATOS), default=None,
+              help='Formato do arquivo (padrão: pela extensão).')
+@click.option('--chunk-size', type=click.IntRange(min=1), default=None,
+              help='Linhas por lote/transação (padrão: PRODUCT_IMPORT_CHUNK_SIZE).')
+@click.option('--rejected', 'caminho_rejeitados', type=click.Path(dir_okay=False), default=None,
+              help='Arquivo NDJSON com as linhas rejeitadas (padrão: ARQUIVO.rejected.ndjson).')
+def import_products(arquivo, formato, chunk_size, caminho_rejeitados):
+    """Importa/atualiza o catálogo a partir de um CSV ou NDJSON (codigo_barras, nome, marca)."""
+    try:
+        formato = detectar_formato(arquivo, formato)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+    caminho_rejeitados = caminho_rejeitados or f'{arquivo}.rejected.ndjson'
+    tamanho_lote = chunk_size or current_app.config.get('PRODUCT_IMPORT_CHUNK_SIZE', 5000)
+
+    def progresso(resumo):
+        click.echo(
+            f"lote {resumo['lotes']}: {resumo['linhas']} linha(s), {resumo['inseridos']} inserido(s), "
+            f"{resumo['atualizados']} atualizado(s), {resumo['rejeitados']} rejeitado(s) "
+            f"[{resumo['segundos']}s]", err=True,
+        )
+
+    with open(arquivo, encoding='utf-8-sig', newline='') as entrada, \
+            open(caminho_rejeitados, 'w', encoding='utf-8') as rejeitados:
+        resumo = importar_produtos(ler_registros(entrada, formato), tamanho_lote, rejeitados, progresso)
+    if not resumo['rejeitados']:
+        os.remove(caminho_rejeitados)
+    click.echo(
+        f"Importação concluída: {resumo['inseridos']} inserido(s), {resumo['atualizados']} atualizado(s), "
+        f"{resumo['inalterados']} inalterado(s), {resumo['rejeitados']} rejeitado(s) em {resumo['segundos']}s."
+    )
+    if resumo['rejeitados']:
+        click.echo(f'Linhas rejeitadas em {caminho_rejeitados}')
@@ -0,0 +1,208 @@
+"""
+Importação em lote do catálogo de produtos (CSV ou NDJSON), usada pelo comando
+`flask products import` e por POST /admin/products/import.
+
+O arquivo é lido em streaming e processado em lotes de tamanho fixo: cada lote é
+validado com ProductSchema (um load(many=True)), deduplicado por código de barras
+(vale a última ocorrência) e mesclado no catálogo numa transação própria. No
+PostgreSQL o lote entra por COPY numa tabela temporária (ON COMMIT DROP) e é
+mesclado com um único INSERT ... SELECT ... ON CONFLICT (codigo_barras) DO UPDATE;
+nos demais bancos, com um INSERT ... ON CONFLICT em executemany. A memória fica
+limitada ao tamanho do lote, qualquer que seja o arquivo.
+
+Linhas rejeitadas vão para um arquivo NDJSON ({"linha", "registro", "erros"}).
+"""
+import csv
+import io
+import json
+import time
+from typing import Callable, IO, Iterable, Iterator, Optional, Tuple
+
+from marshmallow import EXCLUDE, ValidationError
+from sqlalchemy import text
+
+from listify import db, product_cache
+from listify.models import Produto
+from listify.schemas import ProductSchema
+from listify.search import invalidar_indice
+from listify.services import dialect_insert, incrementar_versao_catalogo
+
+FORMATOS = ('csv', 'ndjson')
+
+_MESCLAR_STAGING = text("""
+    INSERT INTO produto (codigo_barras, nome, marca, data_criacao)
+    SELECT codigo_barras, nome, marca, timezone('utc', now()) FROM produto_import
+    ON CONFLICT (codigo_barras) DO UPDATE SET nome = EXCLUDED.nome, marca = EXCLUDED.marca
+    WHERE (produto.nome, produto.marca) IS DISTINCT FROM (EXCLUDED.nome, EXCLUDED.marca)
+    RETURNING (xmax = 0) AS inserido
+""")
+
+
+def detectar_formato(nome_arquivo: Optional[str], formato: Optional[str] = None) -> str:
+    """Formato explícito ou pela extensão (.csv, .ndjson/.jsonl); ValueError se indefinido."""
+    if formato:
+        formato = formato.lower()
+    elif nome_arquivo and nome_arquivo.lower().endswith('.csv'):
+        formato = 'csv'
+    elif nome_arquivo and nome_arquivo.lower().endswith(('.ndjson', '.jsonl')):
+        formato = 'ndjson'
+    if formato not in FORMATOS:
+        raise ValueError("Formato deve ser 'csv' ou 'ndjson'")
+    return formato
+
+
+def ler_registros(arquivo: IO[str], formato: str) -> Iterator[Tuple[int, object]]:
+    """(número da linha, registro) em streaming. Linhas NDJSON inválidas viram texto (rejeitadas na validação)."""
+    if formato == 'csv':
+        for numero, linha in enumerate(csv.DictReader(arquivo), start=2):
+            yield numero, {
+                chave.strip(): (valor.strip() if isinstance(valor, str) else valor)
+                for chave, valor in linha.items() if chave
+            }
+        return
+    for numero, linha in enumerate(arquivo, start=1):
+        if not linha.strip():
+            continue
+        try:
+            yield numero, json.loads(linha)
+        except ValueError:
+            yield numero, linha.rstrip('\r\n')
+
+
+def _em_lotes(registros: Iterable, tamanho: int):
+    lote = []
+    for registro in registros:
+        lote.append(registro)
+        if len(lote) >= tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def _validar(lote, rejeitados: Optional[IO[str]]):
+    """
+    (produtos válidos deduplicados por código, última ocorrência vence; rejeitados; duplicados).
+    """
+    numeros = [numero for numero, _ in lote]
+    dados = []
+    for _, registro in lote:
+        if isinstance(registro, dict) and registro.get('marca') == '':
+            registro['marca'] = None
+        dados.append(registro)
+    erros = {}
+    try:
+        validos = ProductSchema(many=True, unknown=EXCLUDE).load(dados)
+    except ValidationError as err:
+        erros = err.messages if isinstance(err.messages, dict) else {i: err.messages for i in range(len(dados))}
+        validos = err.valid_data
+
+    por_codigo = {}
+    aceitos = 0
+    for idx, registro in enumerate(validos):
+        if idx in erros:
+            continue
+        aceitos += 1
+        por_codigo[registro['codigo_barras']] = {
+            "codigo_barras": registro['codigo_barras'], "nome": registro['nome'], "marca": registro.get('marca'),
+        }
+    if rejeitados is not None:
+        for idx in sorted(erros):
+            rejeitados.write(json.dumps(
+                {"linha": numeros[idx], "registro": dados[idx], "erros": erros[idx]}, ensure_ascii=False, default=str
+            ) + '\n')
+    return list(por_codigo.values()), len(erros), aceitos - len(por_codigo)
+
+
+def _mesclar_postgres(produtos) -> Tuple[int, int]:
+    conn = db.session.connection()
+    conn.exec_driver_sql(
+        "CREATE TEMP TABLE produto_import "
+        "(codigo_barras varchar(100), nome varchar(200), marca varchar(100)) ON COMMIT DROP"
+    )
+    cursor = conn.connection.driver_connection.cursor()
+    if hasattr(cursor, 'copy_expert'):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for p in produtos:
+            # Em CSV, campo vazio sem aspas é NULL (marca ausente)
+            writer.writerow([p['codigo_barras'], p['nome'], p['marca']])
+        buffer.seek(0)
+        cursor.copy_expert("COPY produto_import (codigo_barras, nome, marca) FROM STDIN WITH (FORMAT csv)", buffer)
+    else:  # driver sem COPY (ex.: psycopg 3 via outra API): executemany na staging
+        conn.execute(text("INSERT INTO produto_import VALUES (:codigo_barras, :nome, :marca)"), produtos)
+    resultado = [linha.inserido for linha in conn.execute(_MESCLAR_STAGING)]
+    inseridos = sum(1 for r in resultado if r)
+    return inseridos, len(resultado) - inseridos
+
+
+def _mesclar_generico(produtos) -> Tuple[int, int]:
+    codigos = [p['codigo_barras'] for p in produtos]
+    existentes = {
+        codigo: (nome, marca)
+        for codigo, nome, marca in db.session.query(Produto.codigo_barras, Produto.nome, Produto.marca)
+        .filter(Produto.codigo_barras.in_(codigos))
+    }
+    alterados = [
+        p for p in produtos
+        if p['codigo_barras'] not in existentes or existentes[p['codigo_barras']] != (p['nome'], p['marca'])
+    ]
+    if alterados:
+        stmt = dialect_insert(Produto)
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=['codigo_barras'],
+            set_={"nome": stmt.excluded.nome, "marca": stmt.excluded.marca},
+        ), alterados)
+    inseridos = sum(1 for p in alterados if p['codigo_barras'] not in existentes)
+    return inseridos, len(alterados) - inseridos
+
+
+def importar_em_lotes(registros: Iterable[Tuple[int, object]], tamanho_lote: int = 5000,
+                      rejeitados: Optional[IO[str]] = None) -> Iterator[dict]:
+    """
+    Importa os registros (de ler_registros) em lotes, com commit por lote, produzindo o
+    resumo acumulado após cada lote: {"linhas", "inseridos", "atualizados", "inalterados",
+    "duplicados" (repetidos no mesmo lote), "rejeitados", "lotes", "segundos"}.
+    """
+    mesclar = _mesclar_postgres if db.engine.dialect.name == 'postgresql' else _mesclar_generico
+    resumo = {"linhas": 0, "inseridos": 0, "atualizados": 0, "inalterados": 0, "duplicados": 0,
+              "rejeitados": 0, "lotes": 0, "segundos": 0.0}
+    inicio = time.perf_counter()
+    try:
+        for lote in _em_lotes(registros, tamanho_lote):
+            produtos, n_rejeitados, n_duplicados = _validar(lote, rejeitados)
+            inseridos = atualizados = 0
+            if produtos:
+                try:
+                    inseridos, atualizados = mesclar(produtos)
+                    if inseridos or atualizados:
+                        incrementar_versao_catalogo()
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    raise
+                product_cache.invalidate_many(p['codigo_barras'] for p in produtos)
+            resumo["linhas"] += len(lote)
+            resumo["inseridos"] += inseridos
+            resumo["atualizados"] += atualizados
+            resumo["inalterados"] += len(produtos) - inseridos - atualizados
+            resumo["duplicados"] += n_duplicados
+            resumo["rejeitados"] += n_rejeitados
+            resumo["lotes"] += 1
+            resumo["segundos"] = round(time.perf_counter() - inicio, 2)
+            yield dict(resumo)
+    finally:
+        # Lotes já confirmados ficam no catálogo mesmo se um lote posterior falhar
+        invalidar_indice()
+
+
+def importar_produtos(registros: Iterable[Tuple[int, object]], tamanho_lote: int = 5000,
+                      rejeitados: Optional[IO[str]] = None,
+                      progresso: Optional[Callable[[dict], None]] = None) -> dict:
+    """Consome importar_em_lotes e retorna o resumo final; `progresso` recebe o parcial de cada lote."""
+    resumo = {"linhas": 0, "inseridos": 0, "atualizados": 0, "inalterados": 0, "duplicados": 0,
+              "rejeitados": 0, "lotes": 0, "segundos": 0.0}
+    for resumo in importar_em_lotes(registros, tamanho_lote, rejeitados):
+        if progresso is not None:
+            progresso(resumo)
+    return resumo
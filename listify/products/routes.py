@@ -1,29 +1,77 @@
-from flask import jsonify, request
-from flask_jwt_extended import jwt_required
-from listify import db
+from flask import current_app, jsonify, request
+from flask_jwt_extended import current_user, jwt_required
+from listify import db, product_cache
 from listify.models import Produto
+from listify.admin.routes import admin_required
 from . import products_bp
 from marshmallow import ValidationError
 from listify.schemas import ProductSchema
+from listify.services import historico_precos_produto, inserir_se_ausente
+from listify.serializers import PRODUTO_COLUNAS, serialize_produto
+from listify.http_cache import CACHE_REVALIDAR, calcular_etag, responder_condicional
+from listify.search import buscar_produtos, registrar_produto, termos
+from listify.pagination import codificar_cursor_offset, decodificar_cursor_offset
 
 
-def serialize_produto(prod: Produto):
-    return {
-        "id": prod.id,
-        "codigo_barras": prod.codigo_barras,
-        "nome": prod.nome,
-        "marca": prod.marca,
-    }
+def _carregar_por_codigo_barras(codigo_barras: str):
+    prod = Produto.query.filter_by(codigo_barras=codigo_barras).first()
+    return serialize_produto(prod) if prod else None
 
 
 @products_bp.route('/barcode/<string:codigo_barras>', methods=['GET'])
 @jwt_required()
 def buscar_por_codigo_barras(codigo_barras):
-    """RF04: Busca produto pelo código de barras."""
-    prod = Produto.query.filter_by(codigo_barras=codigo_barras).first()
-    if not prod:
+    """
+    RF04: Busca produto pelo código de barras (read-through cache, inclusive para 404).
+    A ETag deriva dos campos do produto já em cache; If-None-Match conferindo responde 304.
+    """
+    data = product_cache.get_or_load(codigo_barras, _carregar_por_codigo_barras)
+    if data is None:
         return jsonify({"error": "Produto não encontrado"}), 404
-    return jsonify(serialize_produto(prod)), 200
+    etag = calcular_etag('produto', data['id'], data['codigo_barras'], data['nome'], data['marca'])
+    # Sem max-age: a importação do catálogo atualiza nome/marca de produtos existentes
+    return responder_condicional(etag, lambda: (jsonify(data), 200), CACHE_REVALIDAR)
+
+
+@products_bp.route('/search', methods=['GET'])
+@jwt_required()
+def buscar_produtos_por_nome():
+    """
+    Busca por nome/marca com prefixo e tolerância a erros de digitação, em ordem de
+    relevância ('score'). Paginada: '?q=...&limit=20', depois '&cursor={next_cursor}'
+    (até PRODUCT_SEARCH_MAX_RESULTS resultados).
+    """
+    q = (request.args.get('q') or '').strip()
+    minimo = current_app.config.get('PRODUCT_SEARCH_MIN_LENGTH', 2)
+    if len(q) < minimo or not termos(q):
+        return jsonify({"error": f"Parâmetro 'q' deve ter ao menos {minimo} caracteres"}), 400
+    try:
+        limit = int(request.args.get('limit', current_app.config.get('PAGINATION_DEFAULT_SIZE', 50)))
+    except ValueError:
+        return jsonify({"error": "Parâmetro 'limit' deve ser inteiro"}), 400
+    if limit < 1:
+        return jsonify({"error": "Parâmetro 'limit' deve ser >= 1"}), 400
+    cursor = request.args.get('cursor')
+    try:
+        offset = decodificar_cursor_offset(cursor) if cursor else 0
+    except ValueError as err:
+        return jsonify({"error": str(err)}), 400
+
+    maximo = current_app.config.get('PRODUCT_SEARCH_MAX_RESULTS', 1000)
+    limit = min(limit, current_app.config.get('PAGINATION_MAX_SIZE', 200), maximo - offset)
+    if limit <= 0:
+        return jsonify({"itens": [], "next_cursor": None}), 200
+    itens, ha_mais = buscar_produtos(q, limit, offset)
+    proximo = offset + len(itens)
+    next_cursor = codificar_cursor_offset(proximo) if ha_mais and proximo < maximo else None
+    return jsonify({"itens": itens, "next_cursor": next_cursor}), 200
+
+
+@products_bp.route('/cache/stats', methods=['GET'])
+@admin_required
+def estatisticas_cache():
+    """Contadores de acerto/falha do cache de produtos (por processo)."""
+    return jsonify(product_cache.stats()), 200
 
 
 @products_bp.route('', methods=['POST'])
@@ -38,11 +86,29 @@ def cadastrar_produto():
     nome = dados['nome']
     marca = dados.get('marca')
 
-    if Produto.query.filter_by(codigo_barras=codigo_barras).first():
+    # RN01: unicidade garantida pela constraint (ON CONFLICT), sem SELECT prévio
+    prod = inserir_se_ausente(Produto, {
+        "codigo_barras": codigo_barras, "nome": nome, "marca": marca,
+    }, 'codigo_barras', *PRODUTO_COLUNAS)
+    if prod is None:
+        db.session.rollback()
         return jsonify({"error": "RN01: código de barras já cadastrado"}), 409
-
-    prod = Produto(codigo_barras=codigo_barras, nome=nome, marca=marca)
-    db.session.add(prod)
     db.session.commit()
+    # Remove um eventual 404 cacheado para este código
+    product_cache.invalidate(codigo_barras)
+    registrar_produto(prod)
+
+    return jsonify(serialize_produto(prod)), 201
 
-    return jsonify(serialize_produto(prod)), 201
\ No newline at end of file
+
+@products_bp.route('/<int:produto_id>/prices', methods=['GET'])
+@jwt_required()
+def historico_precos(produto_id: int):
+    """Histórico de preços do produto: série diária do usuário e agregados globais (via rollup)."""
+    user_id = current_user.id
+    prod = Produto.query.get(produto_id)
+    if not prod:
+        return jsonify({"error": "Produto não encontrado"}), 404
+    data = historico_precos_produto(prod.id, user_id)
+    data["produto"] = serialize_produto(prod)
+    return jsonify(data), 200
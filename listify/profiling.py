@@ -0,0 +1,234 @@
+"""
+Profiling opcional de requisições (PROFILING_ENABLED).
+
+Uma requisição é perfilada quando sorteada (PROFILING_SAMPLE_RATE) ou quando traz o
+header `X-Profile` com o ADMIN_TOKEN. O resultado (perfil de CPU + todos os comandos
+SQL com tempos) é gravado num ring buffer em disco (PROFILING_DIR, no máximo
+PROFILING_MAX_ENTRIES arquivos) e consultado em /admin/profiles.
+"""
+import cProfile
+import hmac
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger("listify")
+
+_ID_VALIDO = frozenset('0123456789abcdef')
+
+
+class ProfileStore:
+    """Ring buffer de perfis em disco: um JSON por requisição (+ .prof do cProfile)."""
+
+    def __init__(self, directory: str, max_entries: int = 200):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _arquivos(self) -> List[str]:
+        # nomes começam com o timestamp em ms: ordem alfabética = ordem cronológica
+        return sorted(f for f in os.listdir(self.directory) if f.endswith('.json'))
+
+    def _caminho(self, profile_id: str, extensao: str) -> Optional[str]:
+        if not profile_id or not set(profile_id) <= _ID_VALIDO:
+            return None
+        for nome in self._arquivos():
+            if nome.endswith(f'-{profile_id}.json'):
+                return os.path.join(self.directory, nome[:-len('.json')] + extensao)
+        return None
+
+    def save(self, entry: dict, profiler: Optional[cProfile.Profile] = None) -> None:
+        base = os.path.join(self.directory, f"{int(time.time() * 1000):015d}-{entry['id']}")
+        if profiler is not None:
+            profiler.dump_stats(base + '.prof')
+        tmp = base + '.json.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp, base + '.json')
+        self._podar()
+
+    def _podar(self) -> None:
+        with self._lock:
+            arquivos = self._arquivos()
+            for nome in arquivos[:max(len(arquivos) - self.max_entries, 0)]:
+                base = os.path.join(self.directory, nome[:-len('.json')])
+                for extensao in ('.json', '.prof'):
+                    try:
+                        os.remove(base + extensao)
+                    except FileNotFoundError:
+                        pass
+
+    def list(self) -> List[dict]:
+        """Resumo dos perfis guardados, do mais recente para o mais antigo."""
+        resumos = []
+        for nome in reversed(self._arquivos()):
+            try:
+                with open(os.path.join(self.directory, nome), encoding='utf-8') as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                continue  # podado por outro worker durante a leitura
+            resumos.append({k: v for k, v in entry.items() if k not in ('sql', 'profile')})
+        return resumos
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        caminho = self._caminho(profile_id, '.json')
+        if caminho is None:
+            return None
+        try:
+            with open(caminho, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def raw_path(self, profile_id: str) -> Optional[str]:
+        caminho = self._caminho(profile_id, '.prof')
+        return caminho if caminho and os.path.exists(caminho) else None
+
+
+def _antes_sql(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'listify_profile' in g:
+        conn.info.setdefault('listify_profile_inicio', []).append(time.perf_counter())
+
+
+def _depois_sql(conn, cursor, statement, parameters, context, executemany):
+    inicios = conn.info.get('listify_profile_inicio')
+    if not inicios:
+        return
+    inicio = inicios.pop()
+    if has_request_context() and 'listify_profile' in g:
+        # parâmetros não são gravados (podem conter senhas/hashes e dados pessoais)
+        g.listify_profile['sql'].append({
+            "statement": statement,
+            "ms": round((time.perf_counter() - inicio) * 1000, 3),
+            "executemany": executemany,
+        })
+
+
+def _erro_sql(contexto):
+    if contexto.connection is not None:
+        inicios = contexto.connection.info.get('listify_profile_inicio')
+        if inicios:
+            inicios.pop()
+
+
+class RequestProfiler:
+    """Perfila requisições sorteadas ou autorizadas e guarda o resultado no ProfileStore."""
+
+    def __init__(self, app=None):
+        self.store = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.store = None
+        if not app.config.get('PROFILING_ENABLED', False):
+            return
+        self.sample_rate = app.config.get('PROFILING_SAMPLE_RATE', 0.0)
+        self.token = app.config.get('ADMIN_TOKEN')
+        self.top = app.config.get('PROFILING_TOP_FUNCTIONS', 40)
+        self.engine = (app.config.get('PROFILING_ENGINE') or 'cprofile').lower()
+        if self.engine == 'pyinstrument':
+            try:
+                import pyinstrument  # noqa: F401
+            except ImportError:
+                logger.warning("PROFILING_ENGINE=pyinstrument, mas o pacote não está instalado; usando cProfile")
+                self.engine = 'cprofile'
+        directory = app.config.get('PROFILING_DIR') or os.path.join(tempfile.gettempdir(), 'listify-profiles')
+        self.store = ProfileStore(directory, app.config.get('PROFILING_MAX_ENTRIES', 200))
+
+        if not event.contains(Engine, 'before_cursor_execute', _antes_sql):
+            event.listen(Engine, 'before_cursor_execute', _antes_sql)
+            event.listen(Engine, 'after_cursor_execute', _depois_sql)
+            event.listen(Engine, 'handle_error', _erro_sql)
+        app.before_request(self._iniciar)
+        app.after_request(self._finalizar)
+        app.teardown_request(self._descartar)
+        app.extensions['profiler'] = self
+
+    def _autorizado(self, header: Optional[str]) -> bool:
+        return bool(header and self.token and hmac.compare_digest(header.encode(), self.token.encode()))
+
+    def sortear(self, header: Optional[str]) -> bool:
+        """Decide se a requisição (com este header X-Profile) deve ser perfilada."""
+        return self._autorizado(header) or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    def _iniciar(self):
+        if request.blueprint == 'admin':
+            return
+        # listify.profile: requisição já sorteada pelo modo ASGI e repassada ao Flask
+        if not (request.environ.get('listify.profile') or self.sortear(request.headers.get('X-Profile'))):
+            return
+        if self.engine == 'pyinstrument':
+            from pyinstrument import Profiler
+            profiler = Profiler(async_mode='disabled')
+        else:
+            profiler = cProfile.Profile()
+        try:
+            if self.engine == 'pyinstrument':
+                profiler.start()
+            else:
+                profiler.enable()
+        except (RuntimeError, ValueError):
+            # outro profiler já ativo (ex.: requisição concorrente em Python >= 3.12); grava só o SQL
+            profiler = None
+        g.listify_profile = {"sql": [], "inicio": time.perf_counter(), "profiler": profiler}
+
+    def _parar(self, profiler):
+        if profiler is None:
+            return None
+        if self.engine == 'pyinstrument':
+            profiler.stop()
+            return profiler.output_text(unicode=True, color=False)
+        profiler.disable()
+        saida = io.StringIO()
+        pstats.Stats(profiler, stream=saida).sort_stats('cumulative').print_stats(self.top)
+        return saida.getvalue()
+
+    def _finalizar(self, response):
+        dados = g.pop('listify_profile', None)
+        if dados is None:
+            return response
+        duracao = time.perf_counter() - dados['inicio']
+        profiler = dados['profiler']
+        texto = self._parar(profiler)
+        entry = {
+            "id": uuid.uuid4().hex[:16],
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "method": request.method,
+            "path": request.path,
+            "endpoint": request.endpoint,
+            "status": response.status_code,
+            "duration_ms": round(duracao * 1000, 3),
+            "sql_count": len(dados['sql']),
+            "sql_ms": round(sum(q['ms'] for q in dados['sql']), 3),
+            "engine": self.engine if profiler is not None else None,
+            "sql": dados['sql'],
+            "profile": texto,
+        }
+        try:
+            self.store.save(entry, profiler if self.engine == 'cprofile' else None)
+        except OSError:
+            logger.exception("Falha ao gravar perfil da requisição")
+            return response
+        response.headers['X-Profile-Id'] = entry['id']
+        return response
+
+    def _descartar(self, exc):
+        # requisição abortada antes do after_request: garante que o profiler pare
+        dados = g.pop('listify_profile', None)
+        if dados and dados['profiler'] is not None:
+            self._parar(dados['profiler'])
@@ -2,4 +2,4 @@ from flask import Blueprint
 
 purchase_bp = Blueprint('purchase', __name__)
 
-from . import routes
\ No newline at end of file
+from . import routes, commands
@@ -0,0 +1,26 @@
+import click
+from flask import current_app
+from . import purchase_bp
+from listify.services import expurgar_idempotencia, reconciliar_totais
+
+
+@purchase_bp.cli.command('reconcile')
+@click.option('--fix', is_flag=True, help='Corrige valor_total das compras divergentes e recalcula o rollup de preços dos dias afetados.')
+def reconcile(fix: bool):
+    """Confere valor_total das compras com a soma dos itens (em lote)."""
+    divergentes = reconciliar_totais(corrigir=fix)
+    for d in divergentes:
+        click.echo(f"compra {d['compra_id']}: valor_total={d['valor_total']} soma_itens={d['soma_itens']}")
+    if not divergentes:
+        click.echo('Nenhuma divergência encontrada.')
+    elif fix:
+        click.echo(f'{len(divergentes)} compra(s) corrigida(s).')
+    else:
+        click.echo(f'{len(divergentes)} compra(s) divergente(s). Use --fix para corrigir.')
+
+
+@purchase_bp.cli.command('prune-idempotency-keys')
+def prune_idempotency_keys():
+    """Remove respostas de Idempotency-Key mais antigas que IDEMPOTENCY_RETENTION_HOURS."""
+    horas = current_app.config.get('IDEMPOTENCY_RETENTION_HOURS', 24)
+    click.echo(f'{expurgar_idempotencia(horas)} chave(s) de idempotência removida(s).')
@@ -1,35 +1,56 @@
-from flask import jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import current_app, jsonify, request
+from flask_jwt_extended import current_user, jwt_required
 from decimal import Decimal
+from sqlalchemy import func, insert, or_, update
+from sqlalchemy.exc import IntegrityError
 from listify import db
-from listify.models import Compra, ItemDaCompra, Produto, Usuario
+from listify.models import Compra, ItemDaCompra, Produto, Usuario, IdempotenciaLote
 from . import purchase_bp
 from marshmallow import ValidationError
-from listify.schemas import ItemDaCompraCreateSchema
+from listify.schemas import ItemDaCompraCreateSchema, ItemDaCompraLoteSchema
+from listify.services import atualizar_rollup_precos, recalcular_rollup_precos
+from listify.http_cache import incrementar_versao
 
 
-def _recalcular_total(compra: Compra) -> Decimal:
-    total = Decimal('0.00')
-    # Recarrega itens para garantir consistência
-    itens = ItemDaCompra.query.filter_by(compra_id=compra.id).all()
-    for item in itens:
-        # item.preco_pago é Decimal; quantidade é int -> Decimal
-        total += (item.preco_pago * item.quantidade)
-    compra.valor_total = total
-    db.session.commit()
-    return total
+def _aplicar_delta_total(compra_id: int, delta: Decimal) -> Decimal:
+    """
+    Atualiza valor_total de forma incremental e atômica
+    (valor_total = valor_total + delta), sem recarregar os itens da compra.
+    Deve ser chamada na mesma transação da inserção/remoção do item.
+    """
+    stmt = (
+        update(Compra)
+        .where(Compra.id == compra_id)
+        .values(valor_total=Compra.valor_total + delta)
+        .returning(Compra.valor_total)
+    )
+    return db.session.execute(stmt).scalar_one()
+
+
+def _itens_alterados_apos_finalizar(compra: Compra, produto_ids) -> None:
+    """
+    Itens alterados numa compra já finalizada mudam /history (nova versão/ETag do
+    histórico) e o rollup de preços dos produtos afetados, na mesma transação.
+    """
+    if compra.finalizada:
+        incrementar_versao(compra.usuario_id, Usuario.versao_historico)
+        recalcular_rollup_precos(compra.usuario_id, compra.data_compra, produto_ids)
+
+
+def _resumo_itens(compra_id: int):
+    """Retorna (quantidade de itens, soma de preco_pago * quantidade) em uma única consulta."""
+    count, total = db.session.query(
+        func.count(ItemDaCompra.id),
+        func.coalesce(func.sum(ItemDaCompra.preco_pago * ItemDaCompra.quantidade), 0),
+    ).filter(ItemDaCompra.compra_id == compra_id).one()
+    return count, Decimal(str(total)).quantize(Decimal('0.01'))
 
 
 @purchase_bp.route('/start', methods=['POST'])
 @jwt_required()
 def iniciar_compra():
-    """RF03: Inicia uma compra associada ao usuário autenticado."""
-    user_id = int(get_jwt_identity())
-    usuario = Usuario.query.get(user_id)
-    if not usuario:
-        return jsonify({"error": "Usuário não encontrado"}), 404
-
-    compra = Compra(usuario_id=usuario.id, valor_total=Decimal('0.00'))
+    """RF03: Inicia uma compra associada ao usuário autenticado (id vindo do token)."""
+    compra = Compra(usuario_id=current_user.id, valor_total=Decimal('0.00'))
     db.session.add(compra)
     db.session.commit()
 
@@ -39,8 +60,8 @@ def iniciar_compra():
 @purchase_bp.route('/<int:compra_id>/add', methods=['POST'])
 @jwt_required()
 def adicionar_item(compra_id: int):
-    """RF06: Adiciona item à compra e recalcula valor_total."""
-    user_id = int(get_jwt_identity())
+    """RF06: Adiciona item à compra e atualiza valor_total incrementalmente."""
+    user_id = current_user.id
     compra = Compra.query.get(compra_id)
     if not compra:
         return jsonify({"error": "Compra não encontrada"}), 404
@@ -70,20 +91,142 @@ def adicionar_item(compra_id: int):
 
     item = ItemDaCompra(produto_id=produto.id, compra_id=compra.id, preco_pago=preco_val, quantidade=quantidade)
     db.session.add(item)
-    db.session.commit()
+    db.session.flush()
 
-    novo_total = _recalcular_total(compra)
+    # Item e total na mesma transação: um único commit
+    novo_total = _aplicar_delta_total(compra.id, preco_val * quantidade)
+    _itens_alterados_apos_finalizar(compra, [produto.id])
+    db.session.commit()
     return jsonify({
         "item_id": item.id,
         "valor_total": float(novo_total)
     }), 201
 
 
+def _resposta_idempotente(user_id: int, chave: str, compra_id: int):
+    registro = IdempotenciaLote.query.filter_by(usuario_id=user_id, chave=chave).first()
+    if not registro:
+        return None
+    if registro.compra_id != compra_id:
+        # Chave reaproveitada em outra compra: não é um replay, e a resposta guardada é de outra compra
+        return jsonify({"error": "Idempotency-Key já utilizada em outra compra"}), 422
+    return jsonify(registro.resposta), registro.status_code
+
+
+@purchase_bp.route('/<int:compra_id>/add/batch', methods=['POST'])
+@jwt_required()
+def adicionar_itens_lote(compra_id: int):
+    """
+    RF06 (lote): Adiciona vários itens à compra em uma única requisição.
+    Cada item referencia o produto por 'produto_id' ou 'codigo_barras'. Itens inválidos
+    são rejeitados individualmente (relatório em 'rejeitados') sem impedir os demais.
+    O header 'Idempotency-Key' torna replays seguros: a resposta original é devolvida
+    (422 se a chave já foi usada em outra compra). As chaves ficam guardadas por
+    IDEMPOTENCY_RETENTION_HOURS (flask purchase prune-idempotency-keys).
+    """
+    user_id = current_user.id
+    chave = (request.headers.get('Idempotency-Key') or '').strip() or None
+    if chave and len(chave) > 100:
+        return jsonify({"error": "Idempotency-Key deve ter no máximo 100 caracteres"}), 400
+    if chave:
+        replay = _resposta_idempotente(user_id, chave, compra_id)
+        if replay:
+            return replay
+
+    compra = Compra.query.get(compra_id)
+    if not compra:
+        return jsonify({"error": "Compra não encontrada"}), 404
+    if compra.usuario_id != user_id:
+        return jsonify({"error": "Acesso negado à compra"}), 403
+
+    corpo = request.get_json(silent=True)
+    dados_raw = corpo.get('itens') if isinstance(corpo, dict) else None
+    if not isinstance(dados_raw, list) or not dados_raw:
+        return jsonify({"error": "Campo 'itens' deve ser uma lista não vazia"}), 400
+    limite = current_app.config.get('PURCHASE_BATCH_MAX_ITEMS', 500)
+    if len(dados_raw) > limite:
+        return jsonify({"error": f"Lote excede o limite de {limite} itens"}), 400
+
+    # Validação vetorizada: um único load(many=True); erros vêm indexados pela posição
+    rejeitados = {}
+    try:
+        itens = ItemDaCompraLoteSchema(many=True).load(dados_raw)
+    except ValidationError as err:
+        rejeitados.update(err.messages)
+        itens = err.valid_data
+
+    for idx, dados in enumerate(itens):
+        if idx not in rejeitados and 'produto_id' not in dados and 'codigo_barras' not in dados:
+            rejeitados[idx] = {"_schema": ["Informe 'produto_id' ou 'codigo_barras'"]}
+
+    # Resolve todos os produtos do lote com uma única consulta IN
+    candidatos = [(idx, d) for idx, d in enumerate(itens) if idx not in rejeitados]
+    ids = {d['produto_id'] for _, d in candidatos if 'produto_id' in d}
+    codigos = {d['codigo_barras'] for _, d in candidatos if 'produto_id' not in d}
+    por_id, por_codigo = {}, {}
+    if ids or codigos:
+        for prod in Produto.query.filter(or_(Produto.id.in_(ids), Produto.codigo_barras.in_(codigos))):
+            por_id[prod.id] = prod
+            por_codigo[prod.codigo_barras] = prod
+
+    linhas = []
+    delta = Decimal('0.00')
+    for idx, dados in candidatos:
+        if 'produto_id' in dados:
+            produto = por_id.get(dados['produto_id'])
+        else:
+            produto = por_codigo.get(dados['codigo_barras'])
+        if not produto:
+            rejeitados[idx] = {"produto": ["Produto não encontrado"]}
+            continue
+        preco_val = Decimal(str(dados['preco_pago'])).quantize(Decimal('0.01'))
+        quantidade = int(dados.get('quantidade', 1))
+        linhas.append({
+            "compra_id": compra.id,
+            "produto_id": produto.id,
+            "preco_pago": preco_val,
+            "quantidade": quantidade,
+        })
+        delta += preco_val * quantidade
+
+    relatorio_rejeitados = [{"indice": idx, "erros": rejeitados[idx]} for idx in sorted(rejeitados)]
+    if not linhas:
+        return jsonify({"error": "validation_error", "rejeitados": relatorio_rejeitados}), 400
+
+    # Inserção em lote (executemany) e total atualizado na mesma transação
+    item_ids = list(db.session.scalars(
+        insert(ItemDaCompra).returning(ItemDaCompra.id, sort_by_parameter_order=True), linhas
+    ))
+    novo_total = _aplicar_delta_total(compra.id, delta)
+    _itens_alterados_apos_finalizar(compra, [linha["produto_id"] for linha in linhas])
+    resposta = {
+        "compra_id": compra.id,
+        "item_ids": item_ids,
+        "inseridos": len(item_ids),
+        "rejeitados": relatorio_rejeitados,
+        "valor_total": float(novo_total),
+    }
+    if chave:
+        db.session.add(IdempotenciaLote(
+            chave=chave, usuario_id=user_id, compra_id=compra.id, status_code=201, resposta=resposta
+        ))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Replay concorrente com a mesma chave venceu a corrida: devolve a resposta dele
+        db.session.rollback()
+        replay = _resposta_idempotente(user_id, chave, compra_id) if chave else None
+        if replay:
+            return replay
+        raise
+    return jsonify(resposta), 201
+
+
 @purchase_bp.route('/item/<int:item_id>', methods=['DELETE'])
 @jwt_required()
 def remover_item(item_id: int):
-    """RF06: Remove item da compra e recalcula valor_total."""
-    user_id = int(get_jwt_identity())
+    """RF06: Remove item da compra e atualiza valor_total incrementalmente."""
+    user_id = current_user.id
     item = ItemDaCompra.query.get(item_id)
     if not item:
         return jsonify({"error": "Item não encontrado"}), 404
@@ -94,10 +237,14 @@ def remover_item(item_id: int):
     if compra.usuario_id != user_id:
         return jsonify({"error": "Acesso negado à compra"}), 403
 
+    delta = -(item.preco_pago * item.quantidade)
+    produto_id = item.produto_id
     db.session.delete(item)
-    db.session.commit()
+    db.session.flush()
 
-    novo_total = _recalcular_total(compra)
+    novo_total = _aplicar_delta_total(compra.id, delta)
+    _itens_alterados_apos_finalizar(compra, [produto_id])
+    db.session.commit()
     return jsonify({"valor_total": float(novo_total)}), 200
 
 
@@ -105,20 +252,25 @@ def remover_item(item_id: int):
 @jwt_required()
 def finalizar_compra(compra_id: int):
     """RF08/RN05: Finaliza a compra se houver ao menos um item."""
-    user_id = int(get_jwt_identity())
+    user_id = current_user.id
     compra = Compra.query.get(compra_id)
     if not compra:
         return jsonify({"error": "Compra não encontrada"}), 404
     if compra.usuario_id != user_id:
         return jsonify({"error": "Acesso negado à compra"}), 403
 
-    # Verifica RN05: pelo menos um item na compra
-    itens_count = ItemDaCompra.query.filter_by(compra_id=compra.id).count()
+    # Verifica RN05: pelo menos um item na compra (contagem e soma numa só consulta)
+    itens_count, total = _resumo_itens(compra.id)
     if itens_count == 0:
         return jsonify({"error": "RN05: compra deve ter ao menos um item"}), 400
 
-    # Marca como finalizada e recalcula total
+    # Marca como finalizada e grava o total conferido com a soma dos itens.
+    # O rollup de preços só é alimentado na primeira finalização, na mesma transação.
+    # (alterações posteriores nos itens recalculam o rollup dos produtos afetados).
+    if not compra.finalizada:
+        atualizar_rollup_precos(compra)
     compra.finalizada = True
-    total = _recalcular_total(compra)
+    compra.valor_total = total
+    incrementar_versao(compra.usuario_id, Usuario.versao_historico)
     db.session.commit()
     return jsonify({"message": "Compra finalizada", "valor_total": float(total), "compra_id": compra.id}), 200
\ No newline at end of file
@@ -15,9 +15,10 @@ class GoogleLoginSchema(Schema):
 
 # --- Product Schemas ---
 class ProductSchema(Schema):
-    codigo_barras = fields.Str(required=True, validate=validate.Length(min=1))
-    nome = fields.Str(required=True, validate=validate.Length(min=1))
-    marca = fields.Str(allow_none=True)
+    # Limites iguais aos tamanhos das colunas de produto
+    codigo_barras = fields.Str(required=True, validate=validate.Length(min=1, max=100))
+    nome = fields.Str(required=True, validate=validate.Length(min=1, max=200))
+    marca = fields.Str(allow_none=True, validate=validate.Length(max=100))
 
 # --- List Schemas ---
 class ListaCreateSchema(Schema):
@@ -30,8 +31,18 @@ class ItemDaListaUpdateSchema(Schema):
     # Atualiza o estado de conclusão do item
     concluido = fields.Boolean(required=True)
 
+class ItemDaListaLoteUpdateSchema(Schema):
+    # Marca/desmarca vários itens de uma vez
+    ids = fields.List(fields.Int(strict=True), required=True, validate=validate.Length(min=1))
+    concluido = fields.Boolean(required=True)
+
 # --- Purchase Schemas ---
 class ItemDaCompraCreateSchema(Schema):
     produto_id = fields.Int(required=True, strict=True)
     preco_pago = fields.Decimal(required=True, places=2)
-    quantidade = fields.Int(required=False, load_default=1, validate=validate.Range(min=1))
\ No newline at end of file
+    quantidade = fields.Int(required=False, load_default=1, validate=validate.Range(min=1))
+
+class ItemDaCompraLoteSchema(ItemDaCompraCreateSchema):
+    # No lote, o produto pode ser referenciado pelo id ou pelo código de barras
+    produto_id = fields.Int(required=False, strict=True)
+    codigo_barras = fields.Str(required=False, validate=validate.Length(min=1))
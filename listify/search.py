@@ -0,0 +1,207 @@
+"""
+Busca de produtos por nome/marca (GET /products/search).
+
+- PostgreSQL: full-text (tsvector 'simple' com prefixo, `termo:*`) + similaridade por
+  trigramas (pg_trgm, operador `<%` de word_similarity) sobre índices GIN de expressão
+  criados pela migração f3a9c1d2b7e4. A ordenação soma ts_rank e word_similarity.
+- Demais bancos (SQLite nos testes): índice de n-gramas em memória, por app
+  (app.extensions), construído na primeira busca e atualizado no cadastro de produtos.
+
+As expressões das consultas precisam ser idênticas às dos índices (DDL_POSTGRES)
+para que o planner os use.
+"""
+import math
+import re
+import threading
+import unicodedata
+from array import array
+from collections import Counter, defaultdict
+from typing import List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import func, literal, literal_column, or_
+
+from listify import db
+from listify.models import Produto, VersaoCatalogo
+from listify.serializers import PRODUTO_COLUNAS, serialize_produto
+
+TSVECTOR_SQL = "to_tsvector('simple', coalesce(nome, '') || ' ' || coalesce(marca, ''))"
+
+# Mesmo DDL da migração (para bancos criados com create_all, ex.: benchmarks)
+DDL_POSTGRES = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_produto_busca_tsv ON produto USING gin ({TSVECTOR_SQL})",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_produto_nome_trgm ON produto USING gin (lower(nome) gin_trgm_ops)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_produto_marca_trgm ON produto USING gin (lower(marca) gin_trgm_ops)",
+]
+
+
+def termos(q: str) -> List[str]:
+    return re.findall(r'\w+', q.lower())
+
+
+def _normalizar(texto: Optional[str]) -> str:
+    """Minúsculas e sem acentos (só no índice em memória)."""
+    decomposto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in decomposto if not unicodedata.combining(c)).lower()
+
+
+def _trigramas(palavras) -> set:
+    """Trigramas no estilo do pg_trgm: cada palavra com dois espaços antes e um depois."""
+    grams = set()
+    for palavra in palavras:
+        p = f'  {palavra} '
+        grams.update(p[i:i + 3] for i in range(len(p) - 2))
+    return grams
+
+
+class IndiceNgramas:
+    """
+    Índice invertido trigrama -> ids (array de inteiros, compacto). A busca conta os
+    trigramas da consulta presentes em cada produto; a pontuação é a fração coberta,
+    com bônus quando todos os termos são prefixo de alguma palavra do produto.
+    """
+
+    LIMIAR = 0.5
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._grams = None
+        self._docs = {}
+        self._assinatura = None
+
+    def _indexar(self, prod_id: int, nome: str, marca: Optional[str]) -> None:
+        palavras = tuple(re.findall(r'\w+', _normalizar(f'{nome} {marca or ""}')))
+        self._docs[prod_id] = palavras
+        for g in _trigramas(palavras):
+            self._grams[g].append(prod_id)
+
+    def _construir(self, assinatura) -> None:
+        self._grams = defaultdict(lambda: array('i'))
+        self._docs = {}
+        consulta = db.session.query(Produto.id, Produto.nome, Produto.marca).order_by(Produto.id)
+        for prod_id, nome, marca in consulta.yield_per(10000):
+            self._indexar(prod_id, nome, marca)
+        self._assinatura = assinatura
+
+    @staticmethod
+    def _ler_assinatura() -> tuple:
+        # count/max(id) detectam inserções feitas por outro processo ou direto no banco; a
+        # versão do catálogo, produtos alterados no lugar (ex.: importação em outro processo)
+        versao = db.session.query(VersaoCatalogo.versao).filter(VersaoCatalogo.id == 1).scalar_subquery()
+        return tuple(db.session.query(func.count(Produto.id), func.max(Produto.id), versao).one())
+
+    def garantir_atualizado(self) -> None:
+        assinatura = self._ler_assinatura()
+        with self._lock:
+            if self._grams is None or assinatura != self._assinatura:
+                self._construir(assinatura)
+
+    def adicionar(self, prod_id: int, nome: str, marca: Optional[str]) -> None:
+        with self._lock:
+            if self._grams is None or prod_id in self._docs:
+                return
+            self._indexar(prod_id, nome, marca)
+            total, maximo, versao = self._assinatura
+            self._assinatura = (total + 1, max(maximo or 0, prod_id), versao)
+
+    def invalidar(self) -> None:
+        with self._lock:
+            self._grams = None
+
+    def buscar(self, q: str, limite: int) -> List[Tuple[int, float]]:
+        """Até `limite` (id, score) em ordem de relevância."""
+        palavras_q = re.findall(r'\w+', _normalizar(q))
+        grams_q = _trigramas(palavras_q)
+        if not grams_q:
+            return []
+        with self._lock:
+            if self._grams is None:
+                # invalidar() (ex.: importação em outra thread) entre garantir_atualizado() e a busca
+                self._construir(self._ler_assinatura())
+            contagem = Counter()
+            for g in grams_q:
+                contagem.update(self._grams.get(g, ()))
+            minimo = math.ceil(len(grams_q) * self.LIMIAR)
+            resultado = []
+            for prod_id, n in contagem.items():
+                if n < minimo:
+                    continue
+                score = n / len(grams_q)
+                palavras = self._docs[prod_id]
+                if all(any(p.startswith(t) for p in palavras) for t in palavras_q):
+                    score += 0.5
+                resultado.append((prod_id, score))
+        resultado.sort(key=lambda r: (-r[1], r[0]))
+        return resultado[:limite]
+
+
+def backend() -> str:
+    """PRODUCT_SEARCH_BACKEND: 'auto' (postgres no PostgreSQL, ngram nos demais), 'postgres' ou 'ngram'."""
+    escolhido = current_app.config.get('PRODUCT_SEARCH_BACKEND', 'auto')
+    if escolhido == 'auto':
+        return 'postgres' if db.engine.dialect.name == 'postgresql' else 'ngram'
+    return escolhido
+
+
+def _indice() -> IndiceNgramas:
+    # Um índice por app (cada app aponta para um banco)
+    return current_app.extensions.setdefault('product_search_ngram', IndiceNgramas())
+
+
+def buscar_produtos(q: str, limit: int, offset: int = 0) -> Tuple[List[dict], bool]:
+    """Produtos serializados com 'score', em ordem de relevância; retorna (página, há_mais)."""
+    if backend() == 'postgres':
+        linhas = _buscar_postgres(q, limit + 1, offset)
+    else:
+        linhas = _buscar_ngram(q, limit + 1, offset)
+    itens = []
+    for linha, score in linhas[:limit]:
+        data = serialize_produto(linha)
+        data["score"] = round(float(score), 4)
+        itens.append(data)
+    return itens, len(linhas) > limit
+
+
+def consulta_postgres(q: str, limite: int, offset: int = 0):
+    """Query ranqueada do backend postgres (exposta para EXPLAIN nos benchmarks)."""
+    tsv = literal_column(TSVECTOR_SQL)
+    tsq = func.to_tsquery(literal_column("'simple'"), ' & '.join(f'{t}:*' for t in termos(q)))
+    texto = literal(q.lower())
+    nome, marca = func.lower(Produto.nome), func.lower(Produto.marca)
+    score = func.ts_rank(tsv, tsq) + func.greatest(
+        func.word_similarity(texto, nome), func.coalesce(func.word_similarity(texto, marca), 0)
+    )
+    return db.session.query(*PRODUTO_COLUNAS, score.label('score'))\
+        .filter(or_(tsv.op('@@')(tsq), texto.op('<%')(nome), texto.op('<%')(marca)))\
+        .order_by(score.desc(), Produto.id)\
+        .offset(offset).limit(limite)
+
+
+def _buscar_postgres(q: str, limite: int, offset: int):
+    return [(linha, linha.score) for linha in consulta_postgres(q, limite, offset)]
+
+
+def _buscar_ngram(q: str, limite: int, offset: int):
+    indice = _indice()
+    indice.garantir_atualizado()
+    pagina = indice.buscar(q, offset + limite)[offset:]
+    if not pagina:
+        return []
+    produtos = {
+        linha.id: linha
+        for linha in db.session.query(*PRODUTO_COLUNAS).filter(Produto.id.in_([i for i, _ in pagina]))
+    }
+    return [(produtos[i], score) for i, score in pagina if i in produtos]
+
+
+def registrar_produto(prod: Produto) -> None:
+    """Chamado após o cadastro de um produto (mantém o índice em memória atualizado)."""
+    if backend() != 'postgres':
+        _indice().adicionar(prod.id, prod.nome, prod.marca)
+
+
+def invalidar_indice() -> None:
+    """Força a reconstrução do índice em memória (ex.: após importação em lote)."""
+    if backend() != 'postgres':
+        _indice().invalidar()
@@ -0,0 +1,102 @@
+"""
+Serializadores das respostas da API, compartilhados por todos os blueprints e pelo
+modo ASGI.
+
+Os valores saem como vêm do banco (Decimal, datetime): a conversão para JSON fica no
+provider (listify.json_provider), numa passada só. As variantes `*_linha` recebem
+linhas de consultas que selecionam só as colunas necessárias (sem construir objetos
+ORM); as constantes `*_COLUNAS` definem essas colunas.
+"""
+from typing import Dict, Iterable, List
+
+from listify.models import Compra, ItemDaCompra, ItemDaLista, ListaDeCompras, Produto
+
+PRODUTO_COLUNAS = (Produto.id, Produto.codigo_barras, Produto.nome, Produto.marca)
+COMPRA_COLUNAS = (Compra.id, Compra.data_compra, Compra.valor_total, Compra.finalizada)
+LISTA_COLUNAS = (ListaDeCompras.id, ListaDeCompras.nome, ListaDeCompras.data_criacao)
+ITEM_LISTA_COLUNAS = (ItemDaLista.lista_id, ItemDaLista.id, ItemDaLista.descricao_item, ItemDaLista.concluido)
+ITEM_COMPRA_COLUNAS = (ItemDaCompra.id, ItemDaCompra.quantidade, ItemDaCompra.preco_pago) + tuple(
+    c.label('produto_' + c.key) for c in PRODUTO_COLUNAS
+)
+
+
+# --- Produto ---
+def serialize_produto(prod: Produto) -> dict:
+    return {
+        "id": prod.id,
+        "codigo_barras": prod.codigo_barras,
+        "nome": prod.nome,
+        "marca": prod.marca,
+    }
+
+
+# --- Compra ---
+def serialize_item_compra(item: ItemDaCompra) -> dict:
+    return {
+        "id": item.id,
+        "quantidade": item.quantidade,
+        "preco_pago": item.preco_pago,
+        "produto": serialize_produto(item.produto) if item.produto else None,
+    }
+
+
+def serialize_item_compra_linha(linha) -> dict:
+    """Linha de ITEM_COMPRA_COLUNAS (item ⟕ produto)."""
+    return {
+        "id": linha.id,
+        "quantidade": linha.quantidade,
+        "preco_pago": linha.preco_pago,
+        "produto": {
+            "id": linha.produto_id,
+            "codigo_barras": linha.produto_codigo_barras,
+            "nome": linha.produto_nome,
+            "marca": linha.produto_marca,
+        } if linha.produto_id is not None else None,
+    }
+
+
+def serialize_compra(compra: Compra, itens: Iterable = None) -> dict:
+    """Compra (ORM ou linha de COMPRA_COLUNAS); `itens` já serializados, se informados."""
+    data = {
+        "id": compra.id,
+        "data_compra": compra.data_compra,
+        "valor_total": compra.valor_total,
+        "finalizada": bool(compra.finalizada),
+    }
+    if itens is not None:
+        data["itens"] = list(itens)
+    return data
+
+
+# --- Listas ---
+def serialize_item_lista(item: ItemDaLista) -> dict:
+    """Item da lista (ORM ou linha de ITEM_LISTA_COLUNAS)."""
+    return {
+        "id": item.id,
+        "descricao_item": item.descricao_item,
+        "concluido": bool(item.concluido),
+    }
+
+
+def serialize_lista(lista: ListaDeCompras, itens: Iterable = None) -> dict:
+    """
+    Lista (ORM ou linha de LISTA_COLUNAS). Sem `itens`, usa lista.itens do ORM
+    (carregue com selectinload em coleções para evitar N+1).
+    """
+    data = {
+        "id": lista.id,
+        "nome": lista.nome,
+        "data_criacao": lista.data_criacao,
+    }
+    if itens is None:
+        itens = [serialize_item_lista(i) for i in lista.itens]
+    data["itens"] = list(itens)
+    return data
+
+
+def agrupar_itens_lista(linhas) -> Dict[int, List[dict]]:
+    """Agrupa linhas de ITEM_LISTA_COLUNAS por lista_id, já serializadas."""
+    por_lista: Dict[int, List[dict]] = {}
+    for linha in linhas:
+        por_lista.setdefault(linha.lista_id, []).append(serialize_item_lista(linha))
+    return por_lista
@@ -1,25 +1,45 @@
+import datetime
 from decimal import Decimal
-from typing import Dict, List, Tuple
-from listify.models import Compra, ItemDaCompra, Produto
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import Date, case, cast, delete, func, literal, select, update
+from listify import db
+from listify.models import Compra, IdempotenciaLote, ItemDaCompra, Produto, PrecoProdutoDiario, VersaoCatalogo
+from listify.http_cache import incrementar_versao_historico_das_compras
 
 
-def _aggregate_items(items: List[ItemDaCompra]) -> Dict[int, Tuple[Decimal, int, Produto]]:
+def _aggregate_by_compra(compra_ids: List[int]):
     """
-    Aggregates items by produto_id returning a map:
-    produto_id -> (total_value, total_qty, produto)
-    where total_value is sum(preco_pago * quantidade) and total_qty is sum(quantidade).
+    Aggregates items of all given purchases in a single GROUP BY query (products joined in).
+    Returns (agg, produtos) where agg maps compra_id -> {produto_id: (total_value, total_qty)}
+    and produtos maps produto_id -> serialized product.
+    total_value is sum(preco_pago * quantidade) and total_qty is sum(quantidade).
     """
-    acc: Dict[int, Tuple[Decimal, int, Produto]] = {}
-    for it in items:
-        pid = it.produto_id
-        value = (it.preco_pago * it.quantidade)
-        qty = it.quantidade
-        if pid in acc:
-            prev_value, prev_qty, prod = acc[pid]
-            acc[pid] = (prev_value + value, prev_qty + qty, prod)
-        else:
-            acc[pid] = (value, qty, it.produto)
-    return acc
+    rows = (
+        db.session.query(
+            ItemDaCompra.compra_id,
+            Produto.id,
+            Produto.codigo_barras,
+            Produto.nome,
+            Produto.marca,
+            func.sum(ItemDaCompra.preco_pago * ItemDaCompra.quantidade),
+            func.sum(ItemDaCompra.quantidade),
+        )
+        .join(Produto, Produto.id == ItemDaCompra.produto_id)
+        .filter(ItemDaCompra.compra_id.in_(compra_ids))
+        .group_by(ItemDaCompra.compra_id, Produto.id, Produto.codigo_barras, Produto.nome, Produto.marca)
+        .all()
+    )
+    agg: Dict[int, Dict[int, Tuple[Decimal, int]]] = {cid: {} for cid in compra_ids}
+    produtos: Dict[int, dict] = {}
+    for compra_id, pid, codigo_barras, nome, marca, total_value, total_qty in rows:
+        agg[compra_id][pid] = (Decimal(str(total_value)), int(total_qty))
+        produtos[pid] = {
+            "id": pid,
+            "codigo_barras": codigo_barras,
+            "nome": nome,
+            "marca": marca,
+        }
+    return agg, produtos
 
 
 def _avg_price(value: Decimal, qty: int) -> Decimal:
@@ -34,29 +54,18 @@ def comparar_compras(compra_a: Compra, compra_b: Compra):
     Compares two purchases on common products.
     Returns a dict with summary and per-product comparison (prices and deltas).
     """
-    itens_a = ItemDaCompra.query.filter_by(compra_id=compra_a.id).all()
-    itens_b = ItemDaCompra.query.filter_by(compra_id=compra_b.id).all()
-
-    agg_a = _aggregate_items(itens_a)
-    agg_b = _aggregate_items(itens_b)
+    agg, produtos = _aggregate_by_compra([compra_a.id, compra_b.id])
+    agg_a = agg[compra_a.id]
+    agg_b = agg[compra_b.id]
 
     common_ids = sorted(set(agg_a.keys()) & set(agg_b.keys()))
     only_in_a = sorted(set(agg_a.keys()) - set(agg_b.keys()))
     only_in_b = sorted(set(agg_b.keys()) - set(agg_a.keys()))
 
-    def _serialize_prod(prod: Produto):
-        return {
-            "id": prod.id,
-            "codigo_barras": prod.codigo_barras,
-            "nome": prod.nome,
-            "marca": prod.marca,
-        }
-
     items_report = []
     for pid in common_ids:
-        total_val_a, total_qty_a, prod_a = agg_a[pid]
-        total_val_b, total_qty_b, prod_b = agg_b[pid]
-        # prod_a and prod_b should be same product record
+        total_val_a, total_qty_a = agg_a[pid]
+        total_val_b, total_qty_b = agg_b[pid]
         preco_a = _avg_price(total_val_a, total_qty_a)
         preco_b = _avg_price(total_val_b, total_qty_b)
         delta = (preco_b - preco_a).quantize(Decimal('0.01'))
@@ -65,7 +74,7 @@ def comparar_compras(compra_a: Compra, compra_b: Compra):
             percent = float(((preco_b - preco_a) / preco_a * 100).quantize(Decimal('0.01')))
 
         items_report.append({
-            "produto": _serialize_prod(prod_a or prod_b),
+            "produto": produtos[pid],
             "preco_a": float(preco_a),
             "preco_b": float(preco_b),
             "delta": float(delta),
@@ -81,4 +90,338 @@ def comparar_compras(compra_a: Compra, compra_b: Compra):
         "only_in_a": list(only_in_a),
         "only_in_b": list(only_in_b),
         "items": items_report,
-    }
\ No newline at end of file
+    }
+
+def comparar_varias_compras(compras: List[Compra]):
+    """
+    Price-trend matrix across N purchases, built from the same single GROUP BY query.
+    Purchases are reported in the given order; each product row has one average price
+    (or None when absent) and one quantity per purchase.
+    """
+    compra_ids = [c.id for c in compras]
+    agg, produtos = _aggregate_by_compra(compra_ids)
+
+    linhas = []
+    for pid in sorted(produtos):
+        precos: List[Decimal] = []
+        quantidades = []
+        for cid in compra_ids:
+            if pid in agg[cid]:
+                total_value, total_qty = agg[cid][pid]
+                precos.append(_avg_price(total_value, total_qty))
+                quantidades.append(total_qty)
+            else:
+                precos.append(None)
+                quantidades.append(0)
+        # percent: variation between the first and the last purchase containing the product
+        presentes = [p for p in precos if p is not None]
+        variacao = None
+        if len(presentes) >= 2 and presentes[0] > Decimal('0.00'):
+            variacao = float(((presentes[-1] - presentes[0]) / presentes[0] * 100).quantize(Decimal('0.01')))
+        linhas.append({
+            "produto": produtos[pid],
+            "precos": [float(p) if p is not None else None for p in precos],
+            "quantidades": quantidades,
+            "percent": variacao,
+        })
+
+    return {
+        "compras": [
+            {
+                "id": c.id,
+                "data_compra": c.data_compra.isoformat() if c.data_compra else None,
+                "valor_total": float(c.valor_total),
+            }
+            for c in compras
+        ],
+        "produtos": linhas,
+    }
+
+
+def reconciliar_totais(corrigir: bool = False) -> List[dict]:
+    """
+    Checks every stored Compra.valor_total against the sum of its items in bulk
+    (one grouped query). Returns the divergent purchases as
+    {"compra_id", "valor_total", "soma_itens"}; when corrigir=True, the stored
+    totals are overwritten with the item sums in a single UPDATE and, for the finalized
+    ones, the preco_produto_diario rows of their days are recomputed from the items
+    (a divergent total means the items changed behind the incremental maintenance).
+    """
+    soma = func.coalesce(func.sum(ItemDaCompra.preco_pago * ItemDaCompra.quantidade), 0)
+    somas = (
+        db.session.query(ItemDaCompra.compra_id.label('compra_id'), soma.label('soma_itens'))
+        .group_by(ItemDaCompra.compra_id)
+        .subquery()
+    )
+    soma_itens = func.coalesce(somas.c.soma_itens, 0)
+    rows = (
+        db.session.query(Compra.id, Compra.valor_total, soma_itens)
+        .outerjoin(somas, somas.c.compra_id == Compra.id)
+        .filter(Compra.valor_total != soma_itens)
+        .order_by(Compra.id)
+        .all()
+    )
+    divergentes = [
+        {
+            "compra_id": compra_id,
+            "valor_total": Decimal(str(valor_total)).quantize(Decimal('0.01')),
+            "soma_itens": Decimal(str(total)).quantize(Decimal('0.01')),
+        }
+        for compra_id, valor_total, total in rows
+    ]
+
+    if corrigir and divergentes:
+        soma_correlacionada = (
+            db.session.query(soma)
+            .filter(ItemDaCompra.compra_id == Compra.id)
+            .scalar_subquery()
+        )
+        db.session.execute(
+            update(Compra)
+            .where(Compra.id.in_([d["compra_id"] for d in divergentes]))
+            .values(valor_total=soma_correlacionada),
+            execution_options={"synchronize_session": False},
+        )
+        incrementar_versao_historico_das_compras([d["compra_id"] for d in divergentes])
+        _recalcular_rollup_das_compras([d["compra_id"] for d in divergentes])
+        db.session.commit()
+    return divergentes
+
+
+def _recalcular_rollup_das_compras(compra_ids: List[int]) -> None:
+    """
+    Recomputes the rollup rows touched by the given finalized purchases: per user and
+    day, the products of their items plus the products already in the rollup for that
+    day (an item deleted behind the app's back leaves only the latter).
+    """
+    compras = db.session.execute(
+        select(Compra.usuario_id, Compra.data_compra, ItemDaCompra.produto_id)
+        .outerjoin(ItemDaCompra, ItemDaCompra.compra_id == Compra.id)
+        .where(Compra.id.in_(compra_ids), Compra.finalizada.is_(True))
+    ).all()
+    grupos: Dict[Tuple[int, datetime.date], Tuple[datetime.datetime, set]] = {}
+    for usuario_id, data_compra, produto_id in compras:
+        _, produtos = grupos.setdefault((usuario_id, data_compra.date()), (data_compra, set()))
+        if produto_id is not None:
+            produtos.add(produto_id)
+    for (usuario_id, dia), (data_compra, produtos) in grupos.items():
+        produtos.update(db.session.scalars(
+            select(PrecoProdutoDiario.produto_id)
+            .where(PrecoProdutoDiario.usuario_id == usuario_id, PrecoProdutoDiario.dia == dia)
+        ))
+        recalcular_rollup_precos(usuario_id, data_compra, produtos)
+
+
+def expurgar_idempotencia(retencao_horas: int) -> int:
+    """Deletes stored Idempotency-Key responses older than the retention window."""
+    limite = datetime.datetime.utcnow() - datetime.timedelta(hours=retencao_horas)
+    apagados = db.session.execute(
+        delete(IdempotenciaLote).where(IdempotenciaLote.data_criacao < limite)
+    ).rowcount
+    db.session.commit()
+    return apagados
+
+
+def ler_versao_catalogo() -> int:
+    return db.session.query(VersaoCatalogo.versao).filter(VersaoCatalogo.id == 1).scalar() or 0
+
+
+def incrementar_versao_catalogo() -> None:
+    """Marks the catalog as changed (call before the commit of the write that updated products)."""
+    stmt = dialect_insert(VersaoCatalogo).values(id=1, versao=1)
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=['id'], set_={"versao": VersaoCatalogo.versao + 1},
+    ))
+
+
+def dialect_insert(model):
+    """INSERT with ON CONFLICT support for the active dialect (PostgreSQL or SQLite)."""
+    if db.engine.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model)
+
+
+def inserir_se_ausente(model, valores: dict, coluna_unica: str, *retorno):
+    """
+    INSERT ... ON CONFLICT (coluna_unica) DO NOTHING RETURNING, num único comando: a
+    unicidade fica a cargo da constraint, sem SELECT prévio nem corrida entre requisições
+    concorrentes. Retorna a linha inserida (colunas de `retorno`) ou None se o valor já existe.
+    """
+    stmt = dialect_insert(model).values(**valores)\
+        .on_conflict_do_nothing(index_elements=[coluna_unica])\
+        .returning(*retorno)
+    return db.session.execute(stmt).first()
+
+
+def _merge_rollup(stmt):
+    """Merges new rows into existing preco_produto_diario rows (min/max/sums) on conflict."""
+    excluded = stmt.excluded
+    return stmt.on_conflict_do_update(
+        index_elements=['produto_id', 'usuario_id', 'dia'],
+        set_={
+            "preco_min": case((excluded.preco_min < PrecoProdutoDiario.preco_min, excluded.preco_min),
+                              else_=PrecoProdutoDiario.preco_min),
+            "preco_max": case((excluded.preco_max > PrecoProdutoDiario.preco_max, excluded.preco_max),
+                              else_=PrecoProdutoDiario.preco_max),
+            "valor_total": PrecoProdutoDiario.valor_total + excluded.valor_total,
+            "quantidade": PrecoProdutoDiario.quantidade + excluded.quantidade,
+        },
+    )
+
+
+_ROLLUP_COLUMNS = ['produto_id', 'usuario_id', 'dia', 'preco_min', 'preco_max', 'valor_total', 'quantidade']
+
+
+def atualizar_rollup_precos(compra: Compra) -> None:
+    """
+    Incrementally folds the items of a purchase being finalized into preco_produto_diario,
+    with a single INSERT ... SELECT ... GROUP BY ... ON CONFLICT DO UPDATE statement.
+    Must run in the same transaction that marks the purchase as finalized.
+    """
+    dia = (compra.data_compra or datetime.datetime.utcnow()).date()
+    origem = (
+        select(
+            ItemDaCompra.produto_id,
+            literal(compra.usuario_id),
+            literal(dia, Date),
+            func.min(ItemDaCompra.preco_pago),
+            func.max(ItemDaCompra.preco_pago),
+            func.sum(ItemDaCompra.preco_pago * ItemDaCompra.quantidade),
+            func.sum(ItemDaCompra.quantidade),
+        )
+        .where(ItemDaCompra.compra_id == compra.id)
+        .group_by(ItemDaCompra.produto_id)
+    )
+    stmt = dialect_insert(PrecoProdutoDiario).from_select(_ROLLUP_COLUMNS, origem)
+    db.session.execute(_merge_rollup(stmt))
+
+
+def recalcular_rollup_precos(usuario_id: int, data_compra: datetime.datetime, produto_ids) -> None:
+    """
+    Recomputes the preco_produto_diario rows of one user and day for the given products
+    from the finalized purchases of that day. Used when items of an already finalized
+    purchase change: a removal can lower the max or raise the min, which a delta merge
+    cannot express. Must run in the same transaction as the item change.
+    """
+    produto_ids = list(set(produto_ids))
+    if not produto_ids:
+        return
+    dia = data_compra.date()
+    inicio = datetime.datetime.combine(dia, datetime.time.min)
+    fim = inicio + datetime.timedelta(days=1)
+    db.session.execute(
+        delete(PrecoProdutoDiario).where(
+            PrecoProdutoDiario.usuario_id == usuario_id,
+            PrecoProdutoDiario.dia == dia,
+            PrecoProdutoDiario.produto_id.in_(produto_ids),
+        )
+    )
+    origem = (
+        select(
+            ItemDaCompra.produto_id,
+            literal(usuario_id),
+            literal(dia, Date),
+            func.min(ItemDaCompra.preco_pago),
+            func.max(ItemDaCompra.preco_pago),
+            func.sum(ItemDaCompra.preco_pago * ItemDaCompra.quantidade),
+            func.sum(ItemDaCompra.quantidade),
+        )
+        .join(Compra, Compra.id == ItemDaCompra.compra_id)
+        .where(
+            Compra.usuario_id == usuario_id,
+            Compra.finalizada.is_(True),
+            Compra.data_compra >= inicio,
+            Compra.data_compra < fim,
+            ItemDaCompra.produto_id.in_(produto_ids),
+        )
+        .group_by(ItemDaCompra.produto_id)
+    )
+    db.session.execute(dialect_insert(PrecoProdutoDiario).from_select(_ROLLUP_COLUMNS, origem))
+
+
+def reconstruir_rollup_precos() -> int:
+    """Rebuilds preco_produto_diario from every finalized purchase. Returns the number of rows."""
+    if db.engine.dialect.name == 'sqlite':
+        dia = func.date(Compra.data_compra)
+    else:
+        dia = cast(Compra.data_compra, Date)
+    origem = (
+        select(
+            ItemDaCompra.produto_id,
+            Compra.usuario_id,
+            dia,
+            func.min(ItemDaCompra.preco_pago),
+            func.max(ItemDaCompra.preco_pago),
+            func.sum(ItemDaCompra.preco_pago * ItemDaCompra.quantidade),
+            func.sum(ItemDaCompra.quantidade),
+        )
+        .join(Compra, Compra.id == ItemDaCompra.compra_id)
+        .where(Compra.finalizada.is_(True))
+        .group_by(ItemDaCompra.produto_id, Compra.usuario_id, dia)
+    )
+    PrecoProdutoDiario.query.delete()
+    db.session.execute(dialect_insert(PrecoProdutoDiario).from_select(_ROLLUP_COLUMNS, origem))
+    db.session.commit()
+    return PrecoProdutoDiario.query.count()
+
+
+def _resumo_precos(preco_min, preco_max, valor_total, quantidade) -> Optional[dict]:
+    if not quantidade:
+        return None
+    return {
+        "min": float(preco_min),
+        "avg": float(_avg_price(Decimal(str(valor_total)), int(quantidade))),
+        "max": float(preco_max),
+        "quantidade": int(quantidade),
+    }
+
+
+def historico_precos_produto(produto_id: int, usuario_id: int) -> dict:
+    """
+    Price history of a product read only from the preco_produto_diario rollup:
+    the user's daily series and overall min/avg/max, plus global aggregates across users.
+    """
+    serie_rows = (
+        PrecoProdutoDiario.query
+        .filter_by(produto_id=produto_id, usuario_id=usuario_id)
+        .order_by(PrecoProdutoDiario.dia)
+        .all()
+    )
+    serie = []
+    preco_min = preco_max = None
+    valor_total = Decimal('0.00')
+    quantidade = 0
+    for row in serie_rows:
+        ponto = _resumo_precos(row.preco_min, row.preco_max, row.valor_total, row.quantidade)
+        ponto["data"] = row.dia.isoformat()
+        serie.append(ponto)
+        preco_min = row.preco_min if preco_min is None else min(preco_min, row.preco_min)
+        preco_max = row.preco_max if preco_max is None else max(preco_max, row.preco_max)
+        valor_total += row.valor_total
+        quantidade += row.quantidade
+
+    global_row = (
+        db.session.query(
+            func.min(PrecoProdutoDiario.preco_min),
+            func.max(PrecoProdutoDiario.preco_max),
+            func.sum(PrecoProdutoDiario.valor_total),
+            func.sum(PrecoProdutoDiario.quantidade),
+            func.count(func.distinct(PrecoProdutoDiario.usuario_id)),
+        )
+        .filter(PrecoProdutoDiario.produto_id == produto_id)
+        .one()
+    )
+    global_resumo = _resumo_precos(*global_row[:4])
+    if global_resumo is not None:
+        global_resumo["usuarios"] = global_row[4]
+
+    return {
+        "produto_id": produto_id,
+        "usuario": {
+            "resumo": _resumo_precos(preco_min, preco_max, valor_total, quantidade),
+            "serie": serie,
+        },
+        "global": global_resumo,
+    }
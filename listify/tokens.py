@@ -0,0 +1,450 @@
+"""
+Claims dos tokens e revogação.
+
+O access token carrega o que as rotas protegidas usam do usuário: id (`sub`), `nome`,
+`email` e a versão de token (`tv`). O `current_user` do flask_jwt_extended é montado
+direto desses claims, então @jwt_required() não consulta a tabela usuario. Access
+tokens duram pouco (JWT_ACCESS_TOKEN_EXPIRES) e são renovados com o refresh token
+(POST /auth/refresh, que também rotaciona o refresh token).
+
+Sessões de refresh: cada login abre uma linha em sessao_refresh, e o refresh token leva
+o id dela (claim `sid`). A rotação é um UPDATE condicional que troca jti_atual pelo jti
+do novo refresh; um refresh já trocado não confere mais e é recusado. O logout apaga a
+sessão. Assim a rotação não passa pela lista de revogação por jti, que fica só com os
+access tokens do logout.
+
+Revogação de todos os tokens do usuário: incrementar usuario.versao_token invalida os
+emitidos antes (POST /auth/logout-all), e usuario.token_revogado_em guarda quando. Cada
+processo guarda o mapa {usuario_id: versao_token} só dos usuários que revogaram dentro
+da maior validade de token (access ou refresh) e o recarrega a cada
+JWT_REVOCATION_CACHE_TTL segundos. Revogações mais antigas não precisam estar no mapa:
+todo token emitido antes delas já expirou.
+
+Revogação de um access token (jti) no logout, num store plugável (JWT_REVOCATION_BACKEND):
+
+- database (padrão): tabela token_revogado (jti único, índice em expira_em) com um
+  filtro de Bloom em cada processo, sincronizado a cada JWT_REVOCATION_CACHE_TTL
+  segundos. O caso comum (token não revogado) é respondido pelo filtro, sem I/O; só
+  os positivos (revogados ou falso positivo, ~1%) são confirmados no banco.
+- redis: chaves com TTL até a expiração do token, compartilhadas entre processos (um
+  EXISTS por requisição). Aceita um cliente no estilo Redis em JWT_REVOCATION_CLIENT.
+  Com o Redis fora do ar a checagem falha fechado: RevogacaoIndisponivel (503).
+- memory: dict em processo (testes e instância única).
+"""
+import datetime
+import hashlib
+import logging
+import math
+import threading
+import time
+import uuid
+from typing import TYPE_CHECKING, Dict, NamedTuple, Optional, Tuple
+
+from flask import current_app
+from flask_jwt_extended import create_access_token, create_refresh_token
+from sqlalchemy import delete, exists, select, update
+
+if TYPE_CHECKING:  # listify/__init__ importa este módulo antes de definir db/models
+    from listify.models import Usuario
+
+logger = logging.getLogger("listify")
+
+
+class UsuarioToken(NamedTuple):
+    """Usuário autenticado, como descrito pelos claims (sem consulta ao banco)."""
+    id: int
+    nome: Optional[str]
+    email: Optional[str]
+
+
+def claims_do_usuario(usuario: 'Usuario') -> dict:
+    return {"nome": usuario.nome, "email": usuario.email, "tv": usuario.versao_token or 0}
+
+
+def emitir_access_token(usuario: 'Usuario') -> str:
+    return create_access_token(identity=str(usuario.id), additional_claims=claims_do_usuario(usuario))
+
+
+def emitir_tokens(usuario: 'Usuario', sessao: Optional[Tuple[str, str]] = None) -> dict:
+    """
+    Par access + refresh. O refresh leva a versão de token (logout-all também o revoga) e
+    a sessão de refresh `(sid, jti)`: sem `sessao` abre uma nova (login); na rotação vem de
+    rotacionar_sessao_refresh. O commit é de quem chama.
+    """
+    sid, jti = sessao or abrir_sessao_refresh(usuario.id)
+    return {
+        "access_token": emitir_access_token(usuario),
+        "refresh_token": create_refresh_token(
+            identity=str(usuario.id), additional_claims={"tv": usuario.versao_token or 0, "sid": sid, "jti": jti}
+        ),
+    }
+
+
+# --- sessões de refresh ---
+def _expiracao_refresh() -> datetime.datetime:
+    validade = current_app.config.get('JWT_REFRESH_TOKEN_EXPIRES')
+    if validade is False:
+        # Refresh sem expiração: a sessão só acaba no logout
+        return datetime.datetime.max
+    if not isinstance(validade, datetime.timedelta):
+        validade = datetime.timedelta(seconds=validade)
+    return datetime.datetime.utcnow() + validade
+
+
+def abrir_sessao_refresh(user_id: int) -> Tuple[str, str]:
+    """Registra uma sessão nova; retorna (sid, jti do primeiro refresh)."""
+    from listify import db
+    from listify.models import SessaoRefresh
+    sid, jti = str(uuid.uuid4()), str(uuid.uuid4())
+    db.session.add(SessaoRefresh(id=sid, usuario_id=user_id, jti_atual=jti, expira_em=_expiracao_refresh()))
+    return sid, jti
+
+
+def rotacionar_sessao_refresh(payload: dict) -> Optional[Tuple[str, str]]:
+    """
+    Passa a sessão do refresh usado para um jti novo; None se esse refresh já foi trocado
+    ou a sessão foi encerrada. O UPDATE condicional decide trocas concorrentes do mesmo token.
+    """
+    from listify import db
+    from listify.models import SessaoRefresh
+    sid, jti = payload['sid'], str(uuid.uuid4())
+    trocou = db.session.execute(
+        update(SessaoRefresh)
+        .where(SessaoRefresh.id == sid, SessaoRefresh.jti_atual == payload['jti'])
+        .values(jti_atual=jti, expira_em=_expiracao_refresh())
+        .returning(SessaoRefresh.id),
+        execution_options={"synchronize_session": False},
+    ).first()
+    return (sid, jti) if trocou else None
+
+
+def encerrar_sessoes_refresh(user_id: int, sid: Optional[str] = None) -> None:
+    """Apaga a sessão `sid` do usuário (ou todas, sem `sid`); o commit é de quem chama."""
+    from listify import db
+    from listify.models import SessaoRefresh
+    consulta = delete(SessaoRefresh).where(SessaoRefresh.usuario_id == user_id)
+    if sid is not None:
+        consulta = consulta.where(SessaoRefresh.id == sid)
+    db.session.execute(consulta, execution_options={"synchronize_session": False})
+
+
+def expurgar_sessoes_refresh() -> int:
+    from listify import db
+    from listify.models import SessaoRefresh
+    resultado = db.session.execute(
+        delete(SessaoRefresh).where(SessaoRefresh.expira_em <= datetime.datetime.utcnow())
+    )
+    db.session.commit()
+    return resultado.rowcount
+
+
+def usuario_dos_claims(payload: dict, identity_claim: str = 'sub') -> UsuarioToken:
+    # Tokens emitidos antes dos claims de usuário não têm nome/email (None)
+    return UsuarioToken(int(payload[identity_claim]), payload.get('nome'), payload.get('email'))
+
+
+class VersoesDeToken:
+    """Cache por processo das versões de token dos usuários que já revogaram tokens."""
+
+    def __init__(self, app=None):
+        self.ttl = 30
+        self.janela: Optional[datetime.timedelta] = None
+        self._versoes: Dict[int, int] = {}
+        self._expira_em = 0.0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config.get('JWT_REVOCATION_CACHE_TTL', 30)
+        validades = [app.config.get('JWT_ACCESS_TOKEN_EXPIRES'), app.config.get('JWT_REFRESH_TOKEN_EXPIRES')]
+        # Com algum tipo de token sem expiração (False), toda revogação continua relevante
+        self.janela = None if any(v is False for v in validades) else max(
+            v if isinstance(v, datetime.timedelta) else datetime.timedelta(seconds=v) for v in validades
+        )
+        self.invalidar()
+        app.extensions['token_versions'] = self
+
+    def expirado(self) -> bool:
+        return time.monotonic() >= self._expira_em
+
+    def atualizar(self, versoes: Dict[int, int]) -> None:
+        self._versoes = versoes
+        self._expira_em = time.monotonic() + self.ttl
+
+    def invalidar(self) -> None:
+        """Força a recarga na próxima checagem (ex.: após uma revogação neste processo)."""
+        self._expira_em = 0.0
+
+    def consulta(self):
+        from listify.models import Usuario
+        # Pelo índice ix_usuario_token_revogado_em: só as revogações ainda relevantes
+        consulta = select(Usuario.id, Usuario.versao_token)
+        if self.janela is None:
+            return consulta.where(Usuario.token_revogado_em.is_not(None))
+        return consulta.where(Usuario.token_revogado_em > datetime.datetime.utcnow() - self.janela)
+
+    @staticmethod
+    def revogar_todos(user_id: int) -> int:
+        """Incrementa a versão de token do usuário (o commit é de quem chama); retorna a nova versão."""
+        from listify import db
+        from listify.models import Usuario
+        return db.session.execute(
+            update(Usuario).where(Usuario.id == user_id)
+            .values(versao_token=Usuario.versao_token + 1, token_revogado_em=datetime.datetime.utcnow())
+            .returning(Usuario.versao_token),
+            execution_options={"synchronize_session": False},
+        ).scalar_one()
+
+    def versao(self, user_id: int) -> int:
+        if self.expirado():
+            from listify import db
+            with self._lock:
+                if self.expirado():
+                    self.atualizar({uid: v for uid, v in db.session.execute(self.consulta())})
+        return self._versoes.get(user_id, 0)
+
+    def revogado(self, payload: dict, identity_claim: str = 'sub') -> bool:
+        """Token emitido com versão anterior à atual do usuário."""
+        return int(payload.get('tv', 0)) < self.versao(int(payload[identity_claim]))
+
+
+# --- revogação por jti ---
+class RevogacaoIndisponivel(Exception):
+    """Store de revogação inacessível (ex.: Redis fora do ar): a requisição é recusada com 503."""
+
+
+class FiltroDeBloom:
+    """Conjunto probabilístico: sem falsos negativos, falsos positivos a `taxa_erro` até `capacidade`."""
+
+    def __init__(self, capacidade: int, taxa_erro: float = 0.01):
+        self.capacidade = max(capacidade, 1)
+        self.m = max(64, int(-self.capacidade * math.log(taxa_erro) / math.log(2) ** 2))
+        self.k = max(1, round(self.m / self.capacidade * math.log(2)))
+        self.total = 0
+        self._bits = bytearray((self.m + 7) // 8)
+
+    def _posicoes(self, chave: str):
+        # Double hashing (Kirsch-Mitzenmacher) sobre um único digest
+        digest = hashlib.blake2b(chave.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.m for i in range(self.k)]
+
+    def adicionar(self, chave: str) -> None:
+        for p in self._posicoes(chave):
+            self._bits[p >> 3] |= 1 << (p & 7)
+        self.total += 1
+
+    def __contains__(self, chave: str) -> bool:
+        return all(self._bits[p >> 3] & (1 << (p & 7)) for p in self._posicoes(chave))
+
+
+class MemoryRevocationStore:
+    """jti -> expiração em um dict do processo."""
+
+    name = 'memory'
+
+    def __init__(self):
+        self._revogados: Dict[str, datetime.datetime] = {}
+        self._lock = threading.Lock()
+
+    def sincronizacao_pendente(self) -> bool:
+        return False
+
+    def candidato(self, jti: str) -> bool:
+        return jti in self._revogados
+
+    def revogado(self, jti: str) -> bool:
+        expira_em = self._revogados.get(jti)
+        return expira_em is not None and expira_em > datetime.datetime.utcnow()
+
+    def revogar(self, jti: str, expira_em: datetime.datetime) -> bool:
+        with self._lock:
+            if jti in self._revogados:
+                return False
+            self._revogados[jti] = expira_em
+            return True
+
+    def expurgar(self) -> int:
+        agora = datetime.datetime.utcnow()
+        with self._lock:
+            expirados = [jti for jti, expira_em in self._revogados.items() if expira_em <= agora]
+            for jti in expirados:
+                del self._revogados[jti]
+        return len(expirados)
+
+
+class SharedRevocationStore:
+    """
+    Store compartilhado sobre um cliente no estilo Redis (set(..., ex=, nx=True),
+    exists). As chaves expiram junto com o token, então não há expurgo.
+
+    Falha fechado: com o cliente com erro (Redis fora do ar) não dá para saber se o
+    token foi revogado, então revogado/revogar levantam RevogacaoIndisponivel (503)
+    em vez de aceitar um token que pode ter saído no logout.
+    """
+
+    name = 'shared'
+
+    def __init__(self, client, prefix: str = 'listify:jwt:revogado:'):
+        self.client = client
+        self.prefix = prefix
+
+    def sincronizacao_pendente(self) -> bool:
+        return False
+
+    def candidato(self, jti: str) -> bool:
+        # Sem estado local: toda checagem vai ao store
+        return True
+
+    def revogado(self, jti: str) -> bool:
+        try:
+            return bool(self.client.exists(self.prefix + jti))
+        except Exception as exc:
+            logger.error("Store de revogação indisponível (exists): %s", exc)
+            raise RevogacaoIndisponivel() from exc
+
+    def revogar(self, jti: str, expira_em: datetime.datetime) -> bool:
+        segundos = max(1, int((expira_em - datetime.datetime.utcnow()).total_seconds()) + 1)
+        try:
+            return bool(self.client.set(self.prefix + jti, '1', ex=segundos, nx=True))
+        except Exception as exc:
+            logger.error("Store de revogação indisponível (set): %s", exc)
+            raise RevogacaoIndisponivel() from exc
+
+    def expurgar(self) -> int:
+        return 0
+
+
+class DatabaseRevocationStore:
+    """Tabela token_revogado + filtro de Bloom local, sincronizado de forma incremental pelo id."""
+
+    name = 'database'
+    # Reconstrução periódica do filtro, descartando os tokens já expirados
+    RECONSTRUIR_A_CADA = 3600
+    # Ids atribuídos em transações ainda abertas podem ficar visíveis fora de ordem:
+    # a sincronização incremental relê essa janela abaixo do último id visto
+    JANELA_IDS = 1000
+
+    def __init__(self, capacidade: int = 100000, ttl: int = 30):
+        self.capacidade = capacidade
+        self.ttl = ttl
+        self._filtro: Optional[FiltroDeBloom] = None
+        self._ultimo_id = 0
+        self._sincronizar_em = 0.0
+        self._reconstruir_em = 0.0
+        self._lock = threading.Lock()
+
+    def sincronizacao_pendente(self) -> bool:
+        return time.monotonic() >= self._sincronizar_em
+
+    def candidato(self, jti: str) -> bool:
+        filtro = self._filtro
+        return filtro is None or jti in filtro
+
+    def sincronizar(self) -> None:
+        from listify import db
+        from listify.models import TokenRevogado
+        with self._lock:
+            agora = time.monotonic()
+            if agora < self._sincronizar_em:
+                return
+            reconstruir = (self._filtro is None or agora >= self._reconstruir_em
+                           or self._filtro.total > self._filtro.capacidade)
+            consulta = select(TokenRevogado.id, TokenRevogado.jti)
+            if reconstruir:
+                linhas = db.session.execute(
+                    consulta.where(TokenRevogado.expira_em > datetime.datetime.utcnow())
+                ).all()
+                filtro = FiltroDeBloom(max(self.capacidade, 2 * len(linhas)))
+                self._reconstruir_em = agora + self.RECONSTRUIR_A_CADA
+            else:
+                filtro = self._filtro
+                linhas = db.session.execute(
+                    consulta.where(TokenRevogado.id > self._ultimo_id - self.JANELA_IDS)
+                ).all()
+            for id_, jti in linhas:
+                if reconstruir or jti not in filtro:
+                    filtro.adicionar(jti)
+                self._ultimo_id = max(self._ultimo_id, id_)
+            self._filtro = filtro
+            self._sincronizar_em = agora + self.ttl
+
+    def invalidar(self) -> None:
+        """Força a reconstrução do filtro na próxima checagem."""
+        self._sincronizar_em = self._reconstruir_em = 0.0
+
+    def revogado(self, jti: str) -> bool:
+        if self.sincronizacao_pendente():
+            self.sincronizar()
+        if not self.candidato(jti):
+            return False
+        from listify import db
+        from listify.models import TokenRevogado
+        return db.session.execute(select(exists().where(TokenRevogado.jti == jti))).scalar()
+
+    def revogar(self, jti: str, expira_em: datetime.datetime) -> bool:
+        """Registra na sessão atual (o commit é de quem chama); False se já estava revogado."""
+        from listify.models import TokenRevogado
+        from listify.services import inserir_se_ausente
+        inserido = inserir_se_ausente(TokenRevogado, {"jti": jti, "expira_em": expira_em}, 'jti', TokenRevogado.id)
+        filtro = self._filtro
+        if filtro is not None:
+            filtro.adicionar(jti)
+        return inserido is not None
+
+    def expurgar(self) -> int:
+        from listify import db
+        from listify.models import TokenRevogado
+        resultado = db.session.execute(
+            delete(TokenRevogado).where(TokenRevogado.expira_em <= datetime.datetime.utcnow())
+        )
+        db.session.commit()
+        return resultado.rowcount
+
+
+class TokenRevocation:
+    """Extensão que escolhe o store de revogação por jti (JWT_REVOCATION_BACKEND)."""
+
+    def __init__(self, app=None):
+        self.store = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.store = self._criar_store(app)
+        app.extensions['token_revocation'] = self
+
+    @staticmethod
+    def _criar_store(app):
+        tipo = (app.config.get('JWT_REVOCATION_BACKEND') or 'database').lower()
+        if tipo == 'memory':
+            return MemoryRevocationStore()
+        if tipo == 'redis':
+            client = app.config.get('JWT_REVOCATION_CLIENT')
+            if client is None:
+                try:
+                    import redis
+                except ImportError:
+                    logger.warning("JWT_REVOCATION_BACKEND=redis, mas o pacote 'redis' não está instalado; usando a tabela token_revogado")
+                else:
+                    client = redis.Redis.from_url(app.config.get('REDIS_URL') or 'redis://localhost:6379/0')
+            if client is not None:
+                return SharedRevocationStore(client)
+        return DatabaseRevocationStore(
+            app.config.get('JWT_REVOCATION_BLOOM_CAPACITY', 100000),
+            app.config.get('JWT_REVOCATION_CACHE_TTL', 30),
+        )
+
+    def revogar(self, payload: dict) -> bool:
+        """Revoga o token (até sua expiração); False se já estava revogado."""
+        expira_em = datetime.datetime.utcfromtimestamp(payload['exp'])
+        return self.store.revogar(payload['jti'], expira_em)
+
+    def revogado(self, payload: dict) -> bool:
+        return self.store.revogado(payload['jti'])
+
+    def precisa_verificar(self, payload: dict) -> bool:
+        """False quando o estado local já garante que o token não foi revogado (sem I/O)."""
+        return self.store.sincronizacao_pendente() or self.store.candidato(payload['jti'])
@@ -0,0 +1,41 @@
+"""Add id to keyset pagination indexes
+
+Revision ID: 7a1f0e6b2d94
+Revises: c3e8a51f7d20
+Create Date: 2026-10-18 11:20:02.114870
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a1f0e6b2d94'
+down_revision = 'c3e8a51f7d20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # A paginação por cursor ordena por (data, id) DESC; o id entra no índice como desempate.
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_compra_usuario_finalizada_data', table_name='compra', postgresql_concurrently=True)
+        op.create_index('ix_compra_usuario_finalizada_data', 'compra',
+                        ['usuario_id', 'finalizada', sa.text('data_compra DESC'), sa.text('id DESC')],
+                        unique=False, postgresql_concurrently=True)
+        op.drop_index('ix_lista_de_compras_usuario_data', table_name='lista_de_compras', postgresql_concurrently=True)
+        op.create_index('ix_lista_de_compras_usuario_data', 'lista_de_compras',
+                        ['usuario_id', sa.text('data_criacao DESC'), sa.text('id DESC')],
+                        unique=False, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_lista_de_compras_usuario_data', table_name='lista_de_compras', postgresql_concurrently=True)
+        op.create_index('ix_lista_de_compras_usuario_data', 'lista_de_compras',
+                        ['usuario_id', sa.text('data_criacao DESC')],
+                        unique=False, postgresql_concurrently=True)
+        op.drop_index('ix_compra_usuario_finalizada_data', table_name='compra', postgresql_concurrently=True)
+        op.create_index('ix_compra_usuario_finalizada_data', 'compra',
+                        ['usuario_id', 'finalizada', sa.text('data_compra DESC')],
+                        unique=False, postgresql_concurrently=True)
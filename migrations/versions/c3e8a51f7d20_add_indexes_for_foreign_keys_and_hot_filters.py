@@ -0,0 +1,48 @@
+"""Add indexes for foreign keys and hot filter columns
+
+Revision ID: c3e8a51f7d20
+Revises: 4b7d2c91e0a3
+Create Date: 2026-10-18 10:05:13.871204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e8a51f7d20'
+down_revision = '4b7d2c91e0a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Em PostgreSQL os índices são criados com CONCURRENTLY (fora de transação)
+    # para não bloquear escritas em tabelas grandes.
+    with op.get_context().autocommit_block():
+        # listar_historico: usuario_id = ? AND finalizada ORDER BY data_compra DESC
+        op.create_index('ix_compra_usuario_finalizada_data', 'compra',
+                        ['usuario_id', 'finalizada', sa.text('data_compra DESC')],
+                        unique=False, postgresql_concurrently=True)
+        # detalhar_compra / comparar_compras / finalizar_compra: filtro por compra_id
+        op.create_index('ix_item_da_compra_compra_id', 'item_da_compra', ['compra_id'],
+                        unique=False, postgresql_concurrently=True)
+        # FK para produto (joins e verificação de FK em deleções de produto)
+        op.create_index('ix_item_da_compra_produto_id', 'item_da_compra', ['produto_id'],
+                        unique=False, postgresql_concurrently=True)
+        # listar_listas: usuario_id = ? ORDER BY data_criacao DESC
+        op.create_index('ix_lista_de_compras_usuario_data', 'lista_de_compras',
+                        ['usuario_id', sa.text('data_criacao DESC')],
+                        unique=False, postgresql_concurrently=True)
+        # itens da lista e exclusão de lista
+        op.create_index('ix_item_da_lista_lista_id', 'item_da_lista', ['lista_id'],
+                        unique=False, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_item_da_lista_lista_id', table_name='item_da_lista', postgresql_concurrently=True)
+        op.drop_index('ix_lista_de_compras_usuario_data', table_name='lista_de_compras', postgresql_concurrently=True)
+        op.drop_index('ix_item_da_compra_produto_id', table_name='item_da_compra', postgresql_concurrently=True)
+        op.drop_index('ix_item_da_compra_compra_id', table_name='item_da_compra', postgresql_concurrently=True)
+        op.drop_index('ix_compra_usuario_finalizada_data', table_name='compra', postgresql_concurrently=True)
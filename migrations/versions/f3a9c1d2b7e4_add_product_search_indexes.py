@@ -0,0 +1,41 @@
+"""Add full-text and trigram GIN indexes for product search
+
+Revision ID: f3a9c1d2b7e4
+Revises: b81f4a6c2e57
+Create Date: 2026-10-18 17:24:51.130448
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a9c1d2b7e4'
+down_revision = 'b81f4a6c2e57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Só PostgreSQL: nos demais bancos /products/search usa o índice em memória.
+    # As expressões precisam ser idênticas às de listify/search.py (TSVECTOR_SQL).
+    # CREATE EXTENSION exige permissão no banco (ou crie a extensão antes, como superusuário).
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_produto_busca_tsv ON produto "
+            "USING gin (to_tsvector('simple', coalesce(nome, '') || ' ' || coalesce(marca, '')))"
+        )
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_produto_nome_trgm ON produto USING gin (lower(nome) gin_trgm_ops)")
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_produto_marca_trgm ON produto USING gin (lower(marca) gin_trgm_ops)")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    with op.get_context().autocommit_block():
+        op.execute('DROP INDEX CONCURRENTLY IF EXISTS ix_produto_marca_trgm')
+        op.execute('DROP INDEX CONCURRENTLY IF EXISTS ix_produto_nome_trgm')
+        op.execute('DROP INDEX CONCURRENTLY IF EXISTS ix_produto_busca_tsv')
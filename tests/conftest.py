@@ -0,0 +1,49 @@
+import pytest
+
+from config import Config
+from listify import create_app, db
+
+
+class TestConfig(Config):
+    TESTING = True
+    BCRYPT_LOG_ROUNDS = 4
+    BCRYPT_POOL_WORKERS = 0
+    JWT_SECRET_KEY = 'chave-de-teste-com-32-caracteres!'
+    JWT_REVOCATION_BACKEND = 'memory'
+
+
+@pytest.fixture
+def config_extra():
+    """Sobrescreva no módulo de teste para ajustar a configuração do app."""
+    return {}
+
+
+@pytest.fixture
+def app(tmp_path, config_extra):
+    """App num SQLite em arquivo: cada thread abre sua própria conexão."""
+    class Cfg(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'listify.db'}"
+
+    for chave, valor in config_extra.items():
+        setattr(Cfg, chave, valor)
+
+    app = create_app(Cfg)
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers(client):
+    r = client.post('/auth/register', json={'nome': 'Ana', 'email': 'ana@listify.dev', 'senha': 'Senha1234'})
+    assert r.status_code == 201, r.get_json()
+    r = client.post('/auth/login', json={'email': 'ana@listify.dev', 'senha': 'Senha1234'})
+    return {'Authorization': f"Bearer {r.get_json()['access_token']}"}
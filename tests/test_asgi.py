@@ -0,0 +1,87 @@
+"""Modo ASGI: handlers async com o mesmo tratamento de erros, métricas e profiling do Flask."""
+import asyncio
+
+import pytest
+
+pytest.importorskip('aiosqlite')
+
+from listify.asgi import ListifyASGI  # noqa: E402
+
+
+def _chamar(app_asgi, path, headers):
+    mensagens = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(mensagem):
+        mensagens.append(mensagem)
+
+    scope = {
+        'type': 'http', 'method': 'GET', 'path': path, 'query_string': b'', 'root_path': '',
+        'headers': [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        'scheme': 'http', 'server': ('testserver', 80), 'http_version': '1.1',
+    }
+    asyncio.run(app_asgi(scope, receive, send))
+    corpo = b''.join(m.get('body', b'') for m in mensagens[1:])
+    return mensagens[0]['status'], corpo, dict(mensagens[0]['headers'])
+
+
+def test_erro_inesperado_responde_500_json(app, auth_headers, monkeypatch):
+    async def falhar(self, user_id, args, headers):
+        raise RuntimeError('falha no banco')
+
+    monkeypatch.setattr(ListifyASGI, 'listar_historico', falhar)
+    app_asgi = ListifyASGI(app)
+
+    status, corpo, _ = _chamar(app_asgi, '/history', auth_headers)
+
+    assert status == 500
+    assert app.json.loads(corpo) == {"error": "internal_server_error", "message": "Erro interno do servidor"}
+
+
+@pytest.fixture
+def config_extra(tmp_path):
+    return {'PROFILING_ENABLED': True, 'PROFILING_DIR': str(tmp_path / 'perfis'), 'ADMIN_TOKEN': 'segredo-admin'}
+
+
+def _amostras_latencia(rota, status):
+    from prometheus_client import REGISTRY
+    rotulos = {'blueprint': rota.split('/')[1], 'route': rota, 'method': 'GET', 'status': status}
+    return REGISTRY.get_sample_value('listify_http_request_duration_seconds_count', rotulos) or 0
+
+
+def test_handlers_async_registram_metricas(app, auth_headers):
+    app_asgi = ListifyASGI(app)
+    antes = _amostras_latencia('/history', '200')
+
+    status, _, _ = _chamar(app_asgi, '/history', auth_headers)
+
+    assert status == 200
+    assert _amostras_latencia('/history', '200') == antes + 1
+
+
+def test_cache_de_produtos_fora_do_event_loop(app, auth_headers, monkeypatch):
+    import threading
+
+    from listify import product_cache
+    threads = []
+    original = product_cache.lookup
+
+    def lookup(codigo):
+        threads.append(threading.current_thread())
+        return original(codigo)
+
+    monkeypatch.setattr(product_cache, 'lookup', lookup)
+    status, _, _ = _chamar(ListifyASGI(app), '/products/barcode/7890000000000', auth_headers)
+
+    assert status == 404
+    assert threads and threading.main_thread() not in threads
+
+
+def test_requisicao_perfilada_segue_para_o_flask(app, auth_headers):
+    headers = dict(auth_headers, **{'X-Profile': 'segredo-admin'})
+    status, _, resp_headers = _chamar(ListifyASGI(app), '/history', headers)
+
+    assert status == 200
+    assert b'x-profile-id' in resp_headers
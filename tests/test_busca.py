@@ -0,0 +1,47 @@
+"""Busca de produtos pelo índice de n-gramas em memória (SQLite)."""
+from sqlalchemy import update
+
+from listify import db
+from listify.models import Produto
+from listify.search import _indice
+from listify.services import incrementar_versao_catalogo
+
+
+def _nomes(client, headers, q):
+    r = client.get('/products/search', query_string={'q': q}, headers=headers)
+    assert r.status_code == 200
+    return [p['nome'] for p in r.get_json()['itens']]
+
+
+def _cadastrar(client, headers, codigo, nome):
+    client.post('/products', json={'codigo_barras': codigo, 'nome': nome}, headers=headers)
+
+
+def test_busca_tolera_erro_de_digitacao(client, auth_headers):
+    _cadastrar(client, auth_headers, '1', 'Chocolate ao leite')
+    _cadastrar(client, auth_headers, '2', 'Arroz integral')
+
+    assert _nomes(client, auth_headers, 'chocolat') == ['Chocolate ao leite']
+
+
+def test_invalidar_entre_atualizar_e_buscar(app, client, auth_headers):
+    _cadastrar(client, auth_headers, '1', 'Chocolate ao leite')
+    with app.test_request_context():
+        indice = _indice()
+        indice.garantir_atualizado()
+        indice.invalidar()  # ex.: importação terminando em outra thread
+
+        assert [score > 0 for _, score in indice.buscar('chocolate', 10)] == [True]
+
+
+def test_produto_alterado_no_lugar_por_outro_processo(app, client, auth_headers):
+    _cadastrar(client, auth_headers, '1', 'Chocolate ao leite')
+    assert _nomes(client, auth_headers, 'chocolate') == ['Chocolate ao leite']
+
+    # Mesmo count/max(id): só a versão do catálogo denuncia a alteração
+    with app.app_context():
+        db.session.execute(update(Produto).where(Produto.codigo_barras == '1').values(nome='Achocolatado em pó'))
+        incrementar_versao_catalogo()
+        db.session.commit()
+
+    assert _nomes(client, auth_headers, 'achocolatado') == ['Achocolatado em pó']
@@ -0,0 +1,70 @@
+"""Orçamento de comandos SQL por rota: pega regressões N+1 (ver listify/instrumentation.py)."""
+import pytest
+
+from listify import db
+from listify.instrumentation import assert_max_consultas
+
+N_PRODUTOS = 5
+
+
+def _insercoes_de_itens(n):
+    # O INSERT ... RETURNING ordenado do lote vira um comando por linha no SQLite (o dialeto
+    # não tem sentinela para insertmanyvalues); no PostgreSQL é um único comando.
+    return n if db.engine.dialect.name == 'sqlite' else 1
+
+
+@pytest.fixture
+def dados(client, auth_headers):
+    """Histórico e listas com vários itens, para que um N+1 apareça na contagem."""
+    produtos = [
+        client.post('/products', json={'codigo_barras': f'78900000000{i}', 'nome': f'Produto {i}'},
+                    headers=auth_headers).get_json()['id']
+        for i in range(N_PRODUTOS)
+    ]
+    itens = [{'produto_id': p, 'preco_pago': '3.50', 'quantidade': 2} for p in produtos]
+    compras = []
+    for _ in range(3):
+        compra_id = client.post('/purchase/start', headers=auth_headers).get_json()['compra_id']
+        assert client.post(f'/purchase/{compra_id}/add/batch', json={'itens': itens},
+                           headers=auth_headers).status_code == 201
+        assert client.post(f'/purchase/{compra_id}/finish', headers=auth_headers).status_code == 200
+        compras.append(compra_id)
+    for i in range(3):
+        lista_id = client.post('/lists', json={'nome': f'Lista {i}'}, headers=auth_headers).get_json()['id']
+        for j in range(4):
+            client.post(f'/lists/{lista_id}/items', json={'descricao': f'item {j}'}, headers=auth_headers)
+    return {'produtos': produtos, 'compras': compras}
+
+
+def test_listas(app, client, auth_headers, dados):
+    with app.app_context(), assert_max_consultas(3):
+        r = client.get('/lists', headers=auth_headers)
+    assert r.status_code == 200
+    assert sum(len(lista['itens']) for lista in r.get_json()['itens']) == 12
+
+
+def test_historico(app, client, auth_headers, dados):
+    with app.app_context(), assert_max_consultas(2):
+        r = client.get('/history', headers=auth_headers)
+    assert r.status_code == 200
+    assert len(r.get_json()['itens']) == 3
+
+
+def test_detalhe_do_historico(app, client, auth_headers, dados):
+    compra_id = dados['compras'][0]
+    with app.app_context(), assert_max_consultas(2):
+        r = client.get(f'/history/{compra_id}', headers=auth_headers)
+    assert r.status_code == 200
+    assert len(r.get_json()['itens']) == N_PRODUTOS
+
+
+@pytest.mark.parametrize('n_itens', [1, N_PRODUTOS])
+def test_adicionar_lote(app, client, auth_headers, dados, n_itens):
+    compra_id = client.post('/purchase/start', headers=auth_headers).get_json()['compra_id']
+    itens = [{'produto_id': p, 'preco_pago': '1.99'} for p in dados['produtos'][:n_itens]]
+
+    # compra + produtos (um IN) + itens + total
+    with app.app_context(), assert_max_consultas(3 + _insercoes_de_itens(n_itens)):
+        r = client.post(f'/purchase/{compra_id}/add/batch', json={'itens': itens}, headers=auth_headers)
+    assert r.status_code == 201
+    assert r.get_json()['inseridos'] == n_itens
@@ -0,0 +1,57 @@
+"""GET /history/export: histórico completo em NDJSON (uma compra por linha) ou CSV (um item por linha)."""
+import csv
+import io
+import json
+
+import pytest
+
+
+@pytest.fixture
+def compras(client, auth_headers):
+    produto = client.post('/products', json={'codigo_barras': '789', 'nome': 'Leite, "integral"'},
+                          headers=auth_headers).get_json()
+    ids = []
+    for preco in ('3.50', '4.00'):
+        compra_id = client.post('/purchase/start', headers=auth_headers).get_json()['compra_id']
+        for _ in range(2):
+            client.post(f'/purchase/{compra_id}/add', json={'produto_id': produto['id'], 'preco_pago': preco},
+                        headers=auth_headers)
+        assert client.post(f'/purchase/{compra_id}/finish', headers=auth_headers).status_code == 200
+        ids.append(compra_id)
+    client.post('/purchase/start', headers=auth_headers)  # em andamento: fora da exportação
+    return ids
+
+
+def test_exportar_ndjson(client, auth_headers, compras):
+    r = client.get('/history/export', headers=auth_headers)
+
+    assert r.status_code == 200 and r.mimetype == 'application/x-ndjson'
+    assert r.headers['Content-Disposition'] == 'attachment; filename=historico.ndjson'
+    linhas = [json.loads(l) for l in r.get_data(as_text=True).splitlines()]
+    assert [l['id'] for l in linhas] == compras[::-1]
+    assert [len(l['itens']) for l in linhas] == [2, 2]
+    assert linhas[0]['itens'][0]['produto']['nome'] == 'Leite, "integral"'
+
+
+def test_exportar_csv(client, auth_headers, compras):
+    r = client.get('/history/export?format=csv', headers=auth_headers)
+
+    assert r.status_code == 200 and r.mimetype == 'text/csv'
+    linhas = list(csv.DictReader(io.StringIO(r.get_data(as_text=True))))
+    assert len(linhas) == 4
+    assert [int(l['compra_id']) for l in linhas] == [compras[1]] * 2 + [compras[0]] * 2
+    assert {l['nome'] for l in linhas} == {'Leite, "integral"'}
+    assert [l['preco_pago'] for l in linhas] == ['4.00', '4.00', '3.50', '3.50']
+
+
+def test_exportar_so_o_historico_do_usuario(client, auth_headers, compras):
+    client.post('/auth/register', json={'nome': 'Bia', 'email': 'bia@listify.dev', 'senha': 'Senha1234'})
+    token = client.post('/auth/login', json={'email': 'bia@listify.dev', 'senha': 'Senha1234'}).get_json()
+    r = client.get('/history/export', headers={'Authorization': f"Bearer {token['access_token']}"})
+
+    assert r.status_code == 200 and r.get_data() == b''
+
+
+def test_exportar_formato_invalido(client, auth_headers):
+    r = client.get('/history/export?format=xml', headers=auth_headers)
+    assert r.status_code == 400
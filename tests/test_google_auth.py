@@ -0,0 +1,150 @@
+"""Login com Google contra um JWKS local (chaves RSA geradas no teste)."""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
+CLIENT_ID = 'cliente-teste.apps.googleusercontent.com'
+
+
+def _gerar_chave(kid):
+    privada = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = json.loads(RSAAlgorithm.to_jwk(privada.public_key()))
+    jwk.update(kid=kid, alg='RS256', use='sig')
+    return privada, jwk
+
+
+class JWKSFalso:
+    """Servidor HTTP local que publica `chaves` e conta as requisições recebidas."""
+
+    def __init__(self):
+        self.chaves = []
+        self.status = 200
+        self.requisicoes = 0
+        jwks = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                jwks.requisicoes += 1
+                corpo = json.dumps({'keys': jwks.chaves}).encode()
+                self.send_response(jwks.status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Cache-Control', 'public, max-age=3600')
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def log_message(self, *args):
+                pass
+
+        self.servidor = HTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.servidor.server_port}/oauth2/v3/certs'
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+
+    def fechar(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+
+@pytest.fixture
+def jwks():
+    servidor = JWKSFalso()
+    yield servidor
+    servidor.fechar()
+
+
+@pytest.fixture
+def config_extra(jwks):
+    return {'GOOGLE_JWKS_URL': jwks.url, 'GOOGLE_CLIENT_IDS': CLIENT_ID}
+
+
+@pytest.fixture
+def chave(jwks):
+    privada, jwk = _gerar_chave('kid-1')
+    jwks.chaves.append(jwk)
+    return privada
+
+
+def _id_token(privada, kid='kid-1', email='bia@gmail.com'):
+    agora = int(time.time())
+    claims = {
+        'iss': 'https://accounts.google.com', 'aud': CLIENT_ID, 'sub': '1234567890',
+        'email': email, 'email_verified': True, 'name': 'Bia', 'iat': agora, 'exp': agora + 300,
+    }
+    return jwt.encode(claims, privada, algorithm='RS256', headers={'kid': kid})
+
+
+def test_token_valido(client, jwks, chave):
+    r = client.post('/auth/google', json={'id_token': _id_token(chave)})
+
+    assert r.status_code == 200, r.get_json()
+    assert r.get_json()['usuario']['email'] == 'bia@gmail.com'
+    assert 'access_token' in r.get_json()
+
+    # chaves em cache: o segundo login não vai ao JWKS
+    assert client.post('/auth/google', json={'id_token': _id_token(chave)}).status_code == 200
+    assert jwks.requisicoes == 1
+
+
+def test_kid_desconhecido_forca_refresh(client, jwks, chave):
+    assert client.post('/auth/google', json={'id_token': _id_token(chave)}).status_code == 200
+
+    # o Google rotacionou as chaves depois do cache
+    nova, jwk = _gerar_chave('kid-2')
+    jwks.chaves.append(jwk)
+    r = client.post('/auth/google', json={'id_token': _id_token(nova, kid='kid-2')})
+
+    assert r.status_code == 200, r.get_json()
+    assert jwks.requisicoes == 2
+
+
+def test_refresh_forcado_limitado_a_um_por_minuto(client, jwks, chave):
+    assert client.post('/auth/google', json={'id_token': _id_token(chave)}).status_code == 200
+
+    for _ in range(3):
+        r = client.post('/auth/google', json={'id_token': _id_token(chave, kid='kid-inexistente')})
+        assert r.status_code == 401
+
+    # só o primeiro kid desconhecido buscou o JWKS de novo
+    assert jwks.requisicoes == 2
+
+
+def test_refresh_forcado_concorrente_busca_uma_vez(app, jwks, chave):
+    from listify import google_verifier
+
+    with app.app_context():
+        google_verifier.verify(_id_token(chave))
+    token = _id_token(chave, kid='kid-inexistente')
+    barreira = threading.Barrier(8)
+    status = []
+
+    def trabalhador():
+        client = app.test_client()
+        barreira.wait()
+        status.append(client.post('/auth/google', json={'id_token': token}).status_code)
+
+    threads = [threading.Thread(target=trabalhador) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert status == [401] * 8
+    assert jwks.requisicoes == 2
+
+
+@pytest.mark.parametrize('derrubar', ['erro_500', 'fora_do_ar'])
+def test_jwks_indisponivel_responde_503(client, jwks, chave, derrubar):
+    if derrubar == 'erro_500':
+        jwks.status = 503
+    else:
+        jwks.fechar()
+
+    r = client.post('/auth/google', json={'id_token': _id_token(chave)})
+
+    assert r.status_code == 503
+    assert r.get_json() == {'error': 'Falha ao validar token do Google'}
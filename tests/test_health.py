@@ -0,0 +1,20 @@
+"""Rotas de saúde: /health é público; /health/db-pool expõe o pool e exige o token de admin."""
+import pytest
+
+
+@pytest.fixture
+def config_extra():
+    return {'ADMIN_TOKEN': 'segredo-admin'}
+
+
+def test_health_publico(client):
+    assert client.get('/health').get_json() == {"status": "healthy"}
+
+
+def test_db_pool_exige_admin(client):
+    assert client.get('/health/db-pool').status_code == 403
+    assert client.get('/health/db-pool', headers={'X-Admin-Token': 'outro'}).status_code == 403
+
+    r = client.get('/health/db-pool', headers={'X-Admin-Token': 'segredo-admin'})
+    assert r.status_code == 200
+    assert 'pool_class' in r.get_json()
@@ -0,0 +1,68 @@
+"""GET condicional: ETag + If-None-Match (304) e revalidação a cada leitura."""
+import pytest
+
+
+@pytest.fixture
+def produto(client, auth_headers):
+    return client.post('/products', json={'codigo_barras': '7891000100103', 'nome': 'Leite'},
+                       headers=auth_headers).get_json()
+
+
+@pytest.fixture
+def compra_finalizada(client, auth_headers, produto):
+    compra_id = client.post('/purchase/start', headers=auth_headers).get_json()['compra_id']
+    client.post(f'/purchase/{compra_id}/add', json={'produto_id': produto['id'], 'preco_pago': '4.50'},
+                headers=auth_headers)
+    assert client.post(f'/purchase/{compra_id}/finish', headers=auth_headers).status_code == 200
+    return compra_id
+
+
+def _condicional(client, url, headers, etag):
+    return client.get(url, headers={**headers, 'If-None-Match': etag})
+
+
+def test_listas_304_ate_a_proxima_escrita(client, auth_headers):
+    r = client.get('/lists', headers=auth_headers)
+    etag = r.headers['ETag']
+    assert r.headers['Cache-Control'] == 'private, no-cache'
+
+    r = _condicional(client, '/lists', auth_headers, etag)
+    assert r.status_code == 304
+    assert r.data == b''
+
+    client.post('/lists', json={'nome': 'Feira'}, headers=auth_headers)
+    r = _condicional(client, '/lists', auth_headers, etag)
+    assert r.status_code == 200
+    assert r.headers['ETag'] != etag
+
+
+def test_etag_depende_da_query_string(client, auth_headers, compra_finalizada):
+    etag = client.get('/history', headers=auth_headers).headers['ETag']
+
+    assert _condicional(client, '/history', auth_headers, etag).status_code == 304
+    assert _condicional(client, '/history?limit=1', auth_headers, etag).status_code == 200
+
+
+def test_detalhe_da_compra_revalida_apos_alterar_itens(client, auth_headers, produto, compra_finalizada):
+    url = f'/history/{compra_finalizada}'
+    r = client.get(url, headers=auth_headers)
+    etag = r.headers['ETag']
+    # Itens de uma compra finalizada ainda mudam: sem max-age, o cliente sempre revalida
+    assert r.headers['Cache-Control'] == 'private, no-cache'
+    assert _condicional(client, url, auth_headers, etag).status_code == 304
+
+    client.post(f'/purchase/{compra_finalizada}/add', json={'produto_id': produto['id'], 'preco_pago': '1.50'},
+                headers=auth_headers)
+    r = _condicional(client, url, auth_headers, etag)
+    assert r.status_code == 200
+    assert r.get_json()['valor_total'] == 6.0
+    assert len(r.get_json()['itens']) == 2
+
+
+def test_produto_por_codigo_de_barras(client, auth_headers, produto):
+    url = '/products/barcode/7891000100103'
+    r = client.get(url, headers=auth_headers)
+    assert r.headers['Cache-Control'] == 'private, no-cache'
+
+    assert _condicional(client, url, auth_headers, r.headers['ETag']).status_code == 304
+    assert _condicional(client, url, auth_headers, 'W/"outra"').status_code == 200
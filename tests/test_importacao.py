@@ -0,0 +1,51 @@
+"""Importação do catálogo: o que /products/barcode responde depois de importar."""
+import pytest
+
+from listify import product_cache
+
+
+@pytest.fixture
+def config_extra():
+    # Confere a versão do catálogo a cada leitura
+    return {'PRODUCT_CACHE_CATALOG_CHECK': 0}
+
+
+@pytest.fixture
+def catalogo(tmp_path):
+    def escrever(linhas):
+        caminho = tmp_path / 'catalogo.csv'
+        caminho.write_text('codigo_barras,nome,marca\n' + ''.join(f'{linha}\n' for linha in linhas))
+        return str(caminho)
+    return escrever
+
+
+def _importar(app, arquivo):
+    resultado = app.test_cli_runner().invoke(args=['products', 'import', arquivo])
+    assert resultado.exit_code == 0, resultado.output
+
+
+def _nome(client, headers, codigo):
+    r = client.get(f'/products/barcode/{codigo}', headers=headers)
+    return r.status_code, (r.get_json() or {}).get('nome')
+
+
+def test_importacao_atualiza_a_busca_por_codigo(app, client, auth_headers, catalogo):
+    _importar(app, catalogo(['7891000100103,Leite integral,Marca A']))
+    assert _nome(client, auth_headers, '7891000100103') == (200, 'Leite integral')
+    assert _nome(client, auth_headers, '7891000200200') == (404, None)  # 404 em cache
+
+    _importar(app, catalogo(['7891000100103,Leite desnatado,Marca A', '7891000200200,Café,Marca B']))
+
+    assert _nome(client, auth_headers, '7891000100103') == (200, 'Leite desnatado')
+    assert _nome(client, auth_headers, '7891000200200') == (200, 'Café')
+
+
+def test_importacao_de_outro_processo_chega_ao_cache_em_memoria(app, client, auth_headers, catalogo, monkeypatch):
+    _importar(app, catalogo(['7891000100103,Leite integral,Marca A']))
+    assert _nome(client, auth_headers, '7891000100103') == (200, 'Leite integral')
+
+    # Outro processo (ex.: a CLI) não alcança o cache em memória deste worker
+    monkeypatch.setattr(product_cache, 'invalidate_many', lambda codigos: None)
+    _importar(app, catalogo(['7891000100103,Leite desnatado,Marca A']))
+
+    assert _nome(client, auth_headers, '7891000100103') == (200, 'Leite desnatado')
@@ -0,0 +1,66 @@
+"""Operações em lote nos itens de lista: PATCH /lists/items/batch e DELETE /lists/<id>/items/completed."""
+import pytest
+
+
+@pytest.fixture
+def lista(client, auth_headers):
+    lista_id = client.post('/lists', json={'nome': 'Mercado'}, headers=auth_headers).get_json()['id']
+    r = client.post(f'/lists/{lista_id}/items/batch', json={'itens': [{'descricao': f'item {n}'} for n in range(6)]},
+                    headers=auth_headers)
+    assert r.status_code == 201
+    return lista_id, [i['id'] for i in r.get_json()['itens']]
+
+
+@pytest.fixture
+def outro_usuario(client):
+    client.post('/auth/register', json={'nome': 'Bia', 'email': 'bia@listify.dev', 'senha': 'Senha1234'})
+    r = client.post('/auth/login', json={'email': 'bia@listify.dev', 'senha': 'Senha1234'})
+    return {'Authorization': f"Bearer {r.get_json()['access_token']}"}
+
+
+def _concluidos(client, headers):
+    listas = client.get('/lists?paginate=false', headers=headers).get_json()
+    return sorted(i['id'] for i in listas[0]['itens'] if i['concluido'])
+
+
+def test_patch_em_lote_conclui_os_itens(client, auth_headers, lista):
+    _, ids = lista
+
+    r = client.patch('/lists/items/batch', json={'ids': ids[:3], 'concluido': True}, headers=auth_headers)
+
+    assert r.status_code == 200 and r.get_json()['atualizados'] == 3
+    assert _concluidos(client, auth_headers) == ids[:3]
+
+
+def test_patch_em_lote_e_tudo_ou_nada(client, auth_headers, lista, outro_usuario):
+    _, ids = lista
+
+    assert client.patch('/lists/items/batch', json={'ids': [ids[0], 99999], 'concluido': True},
+                        headers=auth_headers).status_code == 404
+    assert client.patch('/lists/items/batch', json={'ids': [], 'concluido': True},
+                        headers=auth_headers).status_code == 400
+    assert client.patch('/lists/items/batch', json={'ids': ids[:2], 'concluido': True},
+                        headers=outro_usuario).status_code == 403
+    assert _concluidos(client, auth_headers) == []
+
+
+def test_excluir_concluidos(client, auth_headers, lista):
+    lista_id, ids = lista
+    client.patch('/lists/items/batch', json={'ids': ids[:2], 'concluido': True}, headers=auth_headers)
+    token = client.get('/lists/sync', headers=auth_headers).get_json()['token']
+
+    r = client.delete(f'/lists/{lista_id}/items/completed', headers=auth_headers)
+
+    assert r.status_code == 200
+    assert (r.get_json()['excluidos'], r.get_json()['ids']) == (2, ids[:2])
+    itens = client.get('/lists?paginate=false', headers=auth_headers).get_json()[0]['itens']
+    assert [i['id'] for i in itens] == ids[2:]
+    # as remoções chegam aos clientes pelo sync
+    removidos = client.get(f'/lists/sync?since={token}', headers=auth_headers).get_json()['removidos']
+    assert sorted(removidos['itens']) == ids[:2]
+    assert client.delete(f'/lists/{lista_id}/items/completed', headers=auth_headers).get_json()['excluidos'] == 0
+
+
+def test_excluir_concluidos_de_outro_usuario(client, lista, outro_usuario):
+    lista_id, _ = lista
+    assert client.delete(f'/lists/{lista_id}/items/completed', headers=outro_usuario).status_code == 403
@@ -0,0 +1,27 @@
+"""/metrics exige o METRICS_TOKEN (Bearer) ou o token de admin."""
+import pytest
+
+
+@pytest.fixture
+def config_extra():
+    return {'METRICS_TOKEN': 'segredo-scrape', 'ADMIN_TOKEN': 'segredo-admin'}
+
+
+def test_metrics_sem_token_e_negado(client):
+    assert client.get('/metrics').status_code == 403
+    assert client.get('/metrics', headers={'Authorization': 'Bearer outro'}).status_code == 403
+    assert client.get('/metrics', headers={'X-Admin-Token': 'outro'}).status_code == 403
+
+
+def test_metrics_com_token(client):
+    client.get('/health')
+    r = client.get('/metrics', headers={'Authorization': 'Bearer segredo-scrape'})
+    assert r.status_code == 200
+    assert b'listify_http_request_duration_seconds' in r.data
+
+    assert client.get('/metrics', headers={'X-Admin-Token': 'segredo-admin'}).status_code == 200
+
+
+def test_metrics_sem_tokens_configurados(app, client):
+    app.config.update(METRICS_TOKEN=None, ADMIN_TOKEN=None)
+    assert client.get('/metrics', headers={'Authorization': 'Bearer '}).status_code == 403
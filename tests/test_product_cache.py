@@ -0,0 +1,43 @@
+"""Cache de produtos: falha aberto com o Redis fora do ar e estatísticas só para admin."""
+import pytest
+
+from listify import product_cache
+from listify.cache import SharedBackend
+
+
+class RedisForaDoAr:
+    def __init__(self):
+        self.chamadas = 0
+
+    def _falhar(self, *args, **kwargs):
+        self.chamadas += 1
+        raise ConnectionError('Connection refused')
+
+    get = set = delete = _falhar
+
+
+@pytest.fixture
+def config_extra():
+    return {'ADMIN_TOKEN': 'segredo-admin'}
+
+
+def test_redis_fora_do_ar_cai_para_o_banco(app, client, auth_headers):
+    client.post('/products', json={'codigo_barras': '7891000055120', 'nome': 'Café'}, headers=auth_headers)
+    redis = RedisForaDoAr()
+    product_cache.backend = SharedBackend(redis)
+
+    for _ in range(3):
+        r = client.get('/products/barcode/7891000055120', headers=auth_headers)
+        assert r.status_code == 200
+        assert r.get_json()['nome'] == 'Café'
+
+    # só a primeira leitura chegou ao cliente: o set foi pulado e o backend ficou em pausa
+    assert redis.chamadas == 1
+
+
+def test_estatisticas_exigem_admin(client, auth_headers):
+    assert client.get('/products/cache/stats', headers=auth_headers).status_code == 403
+
+    r = client.get('/products/cache/stats', headers={'X-Admin-Token': 'segredo-admin'})
+    assert r.status_code == 200
+    assert r.get_json()['backend'] == 'memory'
@@ -0,0 +1,40 @@
+"""purchase reconcile --fix: corrige valor_total e o rollup de preços dos dias afetados."""
+from decimal import Decimal
+
+from sqlalchemy import delete, select, update
+
+from listify import db
+from listify.models import Compra, ItemDaCompra, PrecoProdutoDiario
+
+
+def _compra_finalizada(client, headers, itens):
+    compra_id = client.post('/purchase/start', headers=headers).get_json()['compra_id']
+    for item in itens:
+        assert client.post(f'/purchase/{compra_id}/add', json=item, headers=headers).status_code == 201
+    assert client.post(f'/purchase/{compra_id}/finish', headers=headers).status_code == 200
+    return compra_id
+
+
+def test_reconcile_fix_recalcula_rollup(app, client, auth_headers):
+    leite = client.post('/products', json={'codigo_barras': '111', 'nome': 'Leite'}, headers=auth_headers).get_json()
+    cafe = client.post('/products', json={'codigo_barras': '222', 'nome': 'Café'}, headers=auth_headers).get_json()
+    compra_id = _compra_finalizada(client, auth_headers, [
+        {'produto_id': leite['id'], 'preco_pago': '3.50', 'quantidade': 2},
+        {'produto_id': cafe['id'], 'preco_pago': '12.00', 'quantidade': 1},
+    ])
+
+    with app.app_context():
+        # Itens alterados por fora da aplicação: total e rollup ficam desatualizados
+        db.session.execute(update(ItemDaCompra).where(ItemDaCompra.produto_id == leite['id']).values(preco_pago=4))
+        db.session.execute(delete(ItemDaCompra).where(ItemDaCompra.produto_id == cafe['id']))
+        db.session.commit()
+
+    resultado = app.test_cli_runner().invoke(args=['purchase', 'reconcile', '--fix'])
+    assert resultado.exit_code == 0, resultado.output
+    assert '1 compra(s) corrigida(s).' in resultado.output
+
+    with app.app_context():
+        assert db.session.get(Compra, compra_id).valor_total == Decimal('8.00')
+        linhas = db.session.execute(select(PrecoProdutoDiario.produto_id, PrecoProdutoDiario.preco_min,
+                                           PrecoProdutoDiario.valor_total)).all()
+    assert linhas == [(leite['id'], Decimal('4.00'), Decimal('8.00'))]
@@ -0,0 +1,70 @@
+"""GET /lists/sync: alterações desde o token, remoções (tombstones) e token expirado (410)."""
+from listify.lists.sync import expurgar_remocoes
+
+
+def _sync(client, headers, token=None):
+    url = '/lists/sync' if token is None else f'/lists/sync?since={token}'
+    return client.get(url, headers=headers)
+
+
+def _outro_usuario(client):
+    client.post('/auth/register', json={'nome': 'Bia', 'email': 'bia@listify.dev', 'senha': 'Senha1234'})
+    r = client.post('/auth/login', json={'email': 'bia@listify.dev', 'senha': 'Senha1234'})
+    return {'Authorization': f"Bearer {r.get_json()['access_token']}"}
+
+
+def test_sync_completo_e_incremental(client, auth_headers):
+    r = _sync(client, auth_headers)
+    assert r.status_code == 200 and r.get_json()['completo']
+    token = r.get_json()['token']
+
+    lista = client.post('/lists', json={'nome': 'Feira'}, headers=auth_headers).get_json()['id']
+    item = client.post(f'/lists/{lista}/items', json={'descricao': 'Banana'}, headers=auth_headers).get_json()['id']
+
+    dados = _sync(client, auth_headers, token).get_json()
+    assert not dados['completo']
+    assert [l['id'] for l in dados['listas']] == [lista]
+    assert [(i['id'], i['lista_id']) for i in dados['itens']] == [(item, lista)]
+
+    dados = _sync(client, auth_headers, dados['token']).get_json()
+    assert dados['listas'] == [] and dados['itens'] == []
+    assert dados['removidos'] == {'listas': [], 'itens': []}
+
+
+def test_sync_informa_remocoes(client, auth_headers):
+    l1 = client.post('/lists', json={'nome': 'L1'}, headers=auth_headers).get_json()['id']
+    l2 = client.post('/lists', json={'nome': 'L2'}, headers=auth_headers).get_json()['id']
+    i1 = client.post(f'/lists/{l1}/items', json={'descricao': 'a'}, headers=auth_headers).get_json()['id']
+    i2 = client.post(f'/lists/{l1}/items', json={'descricao': 'b'}, headers=auth_headers).get_json()['id']
+    client.post(f'/lists/{l2}/items', json={'descricao': 'c'}, headers=auth_headers)
+    token = _sync(client, auth_headers).get_json()['token']
+
+    client.patch(f'/lists/items/{i2}', json={'concluido': True}, headers=auth_headers)
+    client.delete(f'/lists/items/{i1}', headers=auth_headers)
+    client.delete(f'/lists/{l2}', headers=auth_headers)
+
+    dados = _sync(client, auth_headers, token).get_json()
+    assert [i['id'] for i in dados['itens']] == [i2] and dados['itens'][0]['concluido']
+    assert dados['removidos'] == {'listas': [l2], 'itens': [i1]}
+
+
+def test_sync_token_invalido(client, auth_headers):
+    token = _sync(client, auth_headers).get_json()['token']
+
+    assert _sync(client, auth_headers, 'xx').status_code == 400
+    assert _sync(client, _outro_usuario(client), token).status_code == 400
+
+
+def test_sync_token_mais_antigo_que_a_retencao(app, client, auth_headers):
+    lista = client.post('/lists', json={'nome': 'L1'}, headers=auth_headers).get_json()['id']
+    token = _sync(client, auth_headers).get_json()['token']
+    client.delete(f'/lists/{lista}', headers=auth_headers)
+
+    app.config['SYNC_TOMBSTONE_RETENTION_DAYS'] = -1
+    r = _sync(client, auth_headers, token)
+
+    assert r.status_code == 410 and r.get_json()['error'] == 'sync_token_expired'
+    # o cliente recomeça com um sync completo
+    assert _sync(client, auth_headers).get_json()['completo']
+    with app.app_context():
+        assert expurgar_remocoes(-1) == 1
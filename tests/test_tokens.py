@@ -0,0 +1,95 @@
+"""Refresh, logout e revogação de tokens (sessões de refresh, lista por jti e versões)."""
+import datetime
+
+import pytest
+
+from listify import db, token_revocation, token_versions
+from listify.models import SessaoRefresh, TokenRevogado, Usuario
+from listify.tokens import SharedRevocationStore
+
+
+@pytest.fixture
+def config_extra():
+    return {'JWT_REVOCATION_BACKEND': 'database'}
+
+
+def _login(client, par=False):
+    r = client.post('/auth/login', json={'email': 'ana@listify.dev', 'senha': 'Senha1234'})
+    if par:
+        return r.get_json()
+    return {'Authorization': f"Bearer {r.get_json()['access_token']}"}
+
+
+def _bearer(token):
+    return {'Authorization': f'Bearer {token}'}
+
+
+def test_rotacao_do_refresh_fica_fora_da_lista_de_revogacao(app, client, auth_headers):
+    refresh = _login(client, par=True)['refresh_token']
+
+    r = client.post('/auth/refresh', headers=_bearer(refresh))
+    assert r.status_code == 200
+    novo = r.get_json()
+
+    # o refresh trocado não vale mais; o novo sim
+    r = client.post('/auth/refresh', headers=_bearer(refresh))
+    assert r.status_code == 401
+    assert r.get_json()['error'] == 'jwt_revoked'
+    assert client.post('/auth/refresh', headers=_bearer(novo['refresh_token'])).status_code == 200
+
+    with app.app_context():
+        assert db.session.query(TokenRevogado).count() == 0
+        # uma sessão por login (auth_headers e _login)
+        assert db.session.query(SessaoRefresh).count() == 2
+
+
+def test_logout_encerra_a_sessao_de_refresh(app, client, auth_headers):
+    par = _login(client, par=True)
+
+    r = client.post('/auth/logout', json={'refresh_token': par['refresh_token']},
+                    headers=_bearer(par['access_token']))
+    assert r.status_code == 200
+
+    assert client.get('/auth/me', headers=_bearer(par['access_token'])).status_code == 401
+    assert client.post('/auth/refresh', headers=_bearer(par['refresh_token'])).status_code == 401
+    with app.app_context():
+        # só o access token entra na lista de revogação
+        assert db.session.query(TokenRevogado).count() == 1
+
+
+class RedisForaDoAr:
+    def _falhar(self, *args, **kwargs):
+        raise ConnectionError('Connection refused')
+
+    exists = set = _falhar
+
+
+def test_store_compartilhado_fora_do_ar_responde_503(client, auth_headers):
+    token_revocation.store = SharedRevocationStore(RedisForaDoAr())
+
+    r = client.get('/auth/me', headers=auth_headers)
+
+    assert r.status_code == 503
+    assert r.get_json()['error'] == 'service_unavailable'
+
+
+def test_logout_all_revoga_tokens_emitidos_antes(client, auth_headers):
+    assert client.post('/auth/logout-all', headers=auth_headers).status_code == 200
+
+    assert client.get('/auth/me', headers=auth_headers).status_code == 401
+    assert client.get('/auth/me', headers=_login(client)).status_code == 200
+
+
+def test_cache_de_versoes_carrega_so_revogacoes_recentes(app, client, auth_headers):
+    client.post('/auth/logout-all', headers=auth_headers)
+    with app.app_context():
+        assert len(db.session.execute(token_versions.consulta()).all()) == 1
+
+        # Revogação mais antiga que a maior validade de token: nenhum token anterior a ela segue válido
+        usuario = Usuario.query.filter_by(email='ana@listify.dev').one()
+        usuario.token_revogado_em = datetime.datetime.utcnow() - token_versions.janela - datetime.timedelta(minutes=1)
+        db.session.commit()
+        assert db.session.execute(token_versions.consulta()).all() == []
+
+    token_versions.invalidar()
+    assert client.get('/auth/me', headers=_login(client)).status_code == 200
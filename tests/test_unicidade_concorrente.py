@@ -0,0 +1,44 @@
+"""RN01/RN02 sob concorrência: a constraint decide, o perdedor recebe 409 (nunca 500)."""
+import threading
+from collections import Counter
+
+from listify import db
+from listify.models import Produto, Usuario
+
+PARALELOS = 8
+
+
+def _disparar(app, requisicao):
+    """Executa `requisicao(client)` em PARALELOS threads liberadas juntas; devolve os status."""
+    barreira = threading.Barrier(PARALELOS)
+    status = []
+
+    def trabalhador():
+        client = app.test_client()
+        barreira.wait()
+        status.append(requisicao(client).status_code)
+
+    threads = [threading.Thread(target=trabalhador) for _ in range(PARALELOS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return Counter(status)
+
+
+def test_cadastro_duplicado_concorrente(app):
+    corpo = {'nome': 'Bia', 'email': 'bia@listify.dev', 'senha': 'Senha1234'}
+    status = _disparar(app, lambda c: c.post('/auth/register', json=corpo))
+
+    assert status == {201: 1, 409: PARALELOS - 1}
+    with app.app_context():
+        assert db.session.query(Usuario).filter_by(email='bia@listify.dev').count() == 1
+
+
+def test_produto_duplicado_concorrente(app, auth_headers):
+    corpo = {'codigo_barras': '7891000100103', 'nome': 'Leite'}
+    status = _disparar(app, lambda c: c.post('/products', json=corpo, headers=auth_headers))
+
+    assert status == {201: 1, 409: PARALELOS - 1}
+    with app.app_context():
+        assert db.session.query(Produto).filter_by(codigo_barras='7891000100103').count() == 1